@@ -0,0 +1,134 @@
+"""Script for reading a CSV file inside a 7z archive while it is decompressed, without extracting it to disk."""
+
+import csv
+import io
+import queue
+import threading
+from typing import Iterator, Optional, Union
+
+from py7zr import SevenZipFile
+from py7zr.io import Py7zIO, WriterFactory
+
+CHUNK_SIZE = 1 << 20  # bytes of decompressed data per queued chunk
+CHUNK_QUEUE_SIZE = 16  # the most decompressed chunks waiting to be read at once
+
+
+class StreamCancelled(Exception):
+    """Raised in the decompressing thread when the rows are no longer read."""
+
+
+class _QueueWriter(Py7zIO):
+    """A writer that puts the decompressed data into a bounded queue in chunks of at most CHUNK_SIZE bytes, or drops
+    it if there is no queue."""
+
+    def __init__(self, chunks: Optional[queue.Queue], cancelled: threading.Event) -> None:
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.written = 0
+
+    def write(self, s: Union[bytes, bytearray]) -> int:
+        if self.chunks is not None:
+            for start in range(0, len(s), CHUNK_SIZE):
+                self._put(bytes(s[start:start + CHUNK_SIZE]))
+        self.written += len(s)
+        return len(s)
+
+    def _put(self, chunk: bytes) -> None:
+        while True:
+            if self.cancelled.is_set():
+                raise StreamCancelled
+            try:
+                self.chunks.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        return b''
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.written
+
+    def flush(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return self.written
+
+
+class _QueueWriterFactory(WriterFactory):
+    """Create a _QueueWriter feeding the queue for the wanted archive member, and one dropping the data otherwise."""
+
+    def __init__(self, member: str, chunks: queue.Queue, cancelled: threading.Event) -> None:
+        self.member = member
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def create(self, filename: str) -> Py7zIO:
+        return _QueueWriter(self.chunks if filename == self.member else None, self.cancelled)
+
+
+class _QueueReader(io.RawIOBase):
+    """A binary file reading the chunks put into a queue by a _QueueWriter, until a None chunk marks the end."""
+
+    def __init__(self, chunks: queue.Queue) -> None:
+        super().__init__()
+        self.chunks = chunks
+        self.pending = memoryview(b'')
+        self.finished = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:
+        while not self.pending:
+            if self.finished:
+                return 0
+            chunk = self.chunks.get()
+            if chunk is None:
+                self.finished = True
+            else:
+                self.pending = memoryview(chunk)
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def stream_csv_rows(archive_file: str, member: str) -> Iterator[dict[str, str]]:
+    """Yield the rows of the CSV file member of the 7z archive archive_file as dictionaries, like csv.DictReader.
+
+    The member is decompressed by a background thread while the rows are read, with at most CHUNK_QUEUE_SIZE chunks
+    of CHUNK_SIZE bytes waiting to be read, so neither the member nor the archive is ever held in full on disk or in
+    memory. Decompression stops if the rows are no longer read.
+    """
+    chunks = queue.Queue(maxsize=CHUNK_QUEUE_SIZE)
+    cancelled = threading.Event()
+    errors = []
+
+    def decompress() -> None:
+        try:
+            with SevenZipFile(archive_file, mode='r') as z:
+                z.extract(targets=[member], factory=_QueueWriterFactory(member, chunks, cancelled))
+        except Exception as error:  # re-raised by the reading thread
+            errors.append(error)
+        finally:
+            chunks.put(None)
+
+    thread = threading.Thread(target=decompress, daemon=True)
+    thread.start()
+    try:
+        with io.TextIOWrapper(io.BufferedReader(_QueueReader(chunks)), encoding='utf-8', newline='') as csv_file:
+            yield from csv.DictReader(csv_file)
+    finally:
+        cancelled.set()
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+    if errors and not isinstance(errors[0], StreamCancelled):
+        raise errors[0]
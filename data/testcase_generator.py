@@ -1,10 +1,20 @@
 """Script for generating testcases"""
 
+import csv
 import os
+import random
 from typing import Optional
 
 import polars as pl
 
+from archive_reader import stream_csv_rows
+
+# The columns of clean_no_dupe_itineraries.csv, in order (see README.md)
+ITINERARY_COLUMNS = ['legId', 'startingAirport', 'destinationAirport', 'isNonStop', 'totalFare',
+                     'segmentsArrivalAirportCode', 'segmentsDepartureAirportCode', 'segmentsAirlineName',
+                     'segmentsDepartureWeekday', 'segmentsDepartureTimeOfDay', 'segmentsArrivalWeekday',
+                     'segmentsArrivalTimeOfDay']
+
 
 def generate_testcase_general(itineraries: str, airports: str, size: int, seed: Optional[int]) -> tuple[str, str]:
     """Generate general testcase, using seed for reproducibility."""
@@ -44,5 +54,34 @@ def generate_testcase_direct_flight(itineraries: str, airports: str, size: int,
     itn.write_csv(os.path.join(os.getcwd(), '..', 'data', f'clean_no_dupe_itineraries_direct_{size}.csv'))
     air.write_csv(os.path.join(os.getcwd(), '..', 'data', f'airport_class_direct_{size}.csv'))
 
-    return (os.path.join(os.getcwd(), '..', 'data', f'clean_no_dupe_itineraries_{size}.csv'),
-            os.path.join(os.getcwd(), '..', 'data', f'airport_class_{size}.csv'))
+    return (os.path.join(os.getcwd(), '..', 'data', f'clean_no_dupe_itineraries_direct_{size}.csv'),
+            os.path.join(os.getcwd(), '..', 'data', f'airport_class_direct_{size}.csv'))
+
+
+def generate_testcase_from_archive(archive: str, member: str, airports: str, size: int,
+                                   seed: Optional[int]) -> tuple[str, str]:
+    """Generate general testcase straight from the itineraries file member of the 7z archive, using seed for
+    reproducibility. The archive is decompressed as it is read and the sample is drawn by reservoir sampling, so only
+    the sampled rows are ever held in memory."""
+    rng = random.Random(seed)
+    sample = []
+    for i, row in enumerate(stream_csv_rows(archive, member)):
+        if i < size:
+            sample.append(row)
+        else:
+            j = rng.randint(0, i)
+            if j < size:
+                sample[j] = row
+
+    itn_path = os.path.join(os.getcwd(), '..', 'data', f'clean_no_dupe_itineraries_{size}.csv')
+    with open(itn_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(sample[0]) if sample else ITINERARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(sample)
+
+    iatas = {iata for row in sample for column in ('segmentsDepartureAirportCode', 'segmentsArrivalAirportCode')
+             for iata in row[column].split('||')}
+    air = pl.scan_csv(source=airports).filter(pl.col('iata_code').is_in(list(iatas))).collect()
+    air.write_csv(os.path.join(os.getcwd(), '..', 'data', f'airport_class_{size}.csv'))
+
+    return itn_path, os.path.join(os.getcwd(), '..', 'data', f'airport_class_{size}.csv')
@@ -0,0 +1,408 @@
+"""Benchmarks for the flight searchers.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+from datetime import datetime, timedelta
+from heapq import heappush, heappop
+from queue import PriorityQueue
+
+from network import IATACode, Network
+from flightsearcher import AbstractFlightSearcher, SearchStats
+from main import read_csv_file, read_columnar_csv_file, read_polars_file
+import testcase_generator
+
+
+def generate_queries(flight_network: Network, n: int, seed: int) -> list[tuple[IATACode, IATACode, datetime]]:
+    """Return n random (source, destination, departure date) queries over the airports of flight_network, using
+    seed for reproducibility. Each departure date is a midnight in the same week.
+    """
+    rng = random.Random(seed)
+    iatas = sorted(iata for iata in flight_network.airports if flight_network.airports[iata].tickets)
+    queries = []
+    while len(queries) < n:
+        source, destination = rng.sample(iatas, 2)
+        queries.append((source, destination, datetime(2023, 4, 3) + timedelta(days=rng.randrange(7))))
+    return queries
+
+
+def benchmark_searcher(searcher: AbstractFlightSearcher, queries: list[tuple[IATACode, IATACode, datetime]],
+                       repeat: int = 3) -> dict[str, float]:
+    """Run every query through both search modes of searcher, repeat times, and return the best total wall time
+    (in seconds) of each mode.
+    """
+    timings = {}
+    for mode in ('search_shortest_flight', 'search_cheapest_flight'):
+        search = getattr(searcher, mode)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for source, destination, departure_time in queries:
+                search(source=source, destination=destination, departure_time=departure_time)
+            best = min(best, time.perf_counter() - start)
+        timings[mode] = best
+    return timings
+
+
+def measure_query_allocations(searcher: AbstractFlightSearcher,
+                              queries: list[tuple[IATACode, IATACode, datetime]]) -> dict[str, tuple[float, float]]:
+    """Run every query through both search modes of searcher, and return for each mode the average number of garbage
+    collections and the average peak of memory allocated by a query (in bytes, as traced by tracemalloc) per query.
+    """
+    allocations = {}
+    for mode in ('search_shortest_flight', 'search_cheapest_flight'):
+        search = getattr(searcher, mode)
+        collections, peak = 0, 0
+        gc.collect()
+        tracemalloc.start()
+        for source, destination, departure_time in queries:
+            tracemalloc.reset_peak()
+            start_collections = sum(stats['collections'] for stats in gc.get_stats())
+            start_size, _ = tracemalloc.get_traced_memory()
+            search(source=source, destination=destination, departure_time=departure_time)
+            collections += sum(stats['collections'] for stats in gc.get_stats()) - start_collections
+            peak += tracemalloc.get_traced_memory()[1] - start_size
+        tracemalloc.stop()
+        allocations[mode] = (collections / len(queries), peak / len(queries))
+    return allocations
+
+
+def measure_query_stats(searcher: AbstractFlightSearcher,
+                        queries: list[tuple[IATACode, IATACode, datetime]]) -> dict[str, list[SearchStats]]:
+    """Run every query through both search modes of searcher, and return for each mode the SearchStats of every
+    query, in the order of queries.
+    """
+    query_stats = {}
+    for mode in ('search_shortest_flight', 'search_cheapest_flight'):
+        search = getattr(searcher, mode)
+        query_stats[mode] = []
+        for source, destination, departure_time in queries:
+            stats = SearchStats()
+            search(source=source, destination=destination, departure_time=departure_time, stats=stats)
+            query_stats[mode].append(stats)
+    return query_stats
+
+
+def benchmark_priority_queues(n: int, seed: int) -> dict[str, float]:
+    """Push n random (cost, state) entries into a queue.PriorityQueue and into a heapq list, pop them all again, and
+    return the number of pushes and pops per second of each.
+    """
+    rng = random.Random(seed)
+    entries = [(rng.randrange(10080), state) for state in range(n)]
+    rates = {}
+
+    start = time.perf_counter()
+    pq: PriorityQueue[tuple[int, int]] = PriorityQueue()
+    for entry in entries:
+        pq.put(entry)
+    while not pq.empty():
+        pq.get()
+    rates['PriorityQueue'] = 2 * n / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    heap: list[tuple[int, int]] = []
+    for entry in entries:
+        heappush(heap, entry)
+    while heap:
+        heappop(heap)
+    rates['heapq'] = 2 * n / (time.perf_counter() - start)
+
+    return rates
+
+
+def measure_load_memory(loader: Callable[[str, str], Network], airport_file: str,
+                        flight_file: str) -> tuple[float, int]:
+    """Load a network from airport_file and flight_file with loader, and return the number of bytes the network
+    takes per ticket, as traced by tracemalloc, together with the number of tickets.
+    """
+    tracemalloc.start()
+    flight_network = loader(airport_file, flight_file)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_tickets = sum(len(airport.tickets) for airport in flight_network.airports.values())
+    return size / max(num_tickets, 1), num_tickets
+
+
+GENERATORS = {'general': testcase_generator.generate_testcase_general,
+              'direct': testcase_generator.generate_testcase_direct_flight}
+LOADERS = (read_csv_file, read_polars_file, read_columnar_csv_file)
+SEARCH_MODES = ('search_shortest_flight', 'search_cheapest_flight')
+PERCENTILES = (50, 90, 99)
+LOWER_IS_BETTER = ('_ms', '_seconds', '_bytes')  # suffixes of the metrics of a report where lower is better
+HIGHER_IS_BETTER = ('_per_second',)
+# Differences smaller than these, by suffix, are noise rather than regressions; a throughput is compared by the time it
+# takes per query, in milliseconds.
+NOISE_FLOORS = {'_ms': 0.05, '_seconds': 0.001, '_bytes': 4096, '_per_second': 0.05}
+
+
+def searcher_classes() -> list[type]:
+    """Return every subclass of AbstractFlightSearcher, direct or not, the direct subclasses first.
+    """
+    classes = []
+    pending = list(AbstractFlightSearcher.__subclasses__())
+    while pending:
+        searcher_class = pending.pop(0)
+        if searcher_class not in classes:
+            classes.append(searcher_class)
+            pending.extend(searcher_class.__subclasses__())
+    return classes
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Return the p-th percentile of values by the nearest-rank method.
+
+    Preconditions:
+        - values != []
+        - 0 < p <= 100
+    """
+    ordered = sorted(values)
+    rank = -(-len(ordered) * p // 100)  # ceiling of len(ordered) * p / 100
+    return ordered[max(int(rank), 1) - 1]
+
+
+def profile_searcher(searcher_class: type, flight_network: Network,
+                     queries: list[tuple[IATACode, IATACode, datetime]], repeat: int = 3) -> dict[str, Any]:
+    """Run every query through both search modes of a new searcher_class of flight_network, repeat times, and return
+    the time to build the searcher and, for each mode, the percentiles of the latency of a query (in milliseconds),
+    the throughput of the fastest run (in queries per second) and the peak of memory allocated by a run (in bytes, as
+    traced by tracemalloc).
+
+    Each run uses a new searcher, so that the caches a searcher keeps between queries start empty every time, and the
+    latency of a query is the best over the runs. Memory is traced in a run of its own, since tracing slows it down.
+
+    Preconditions:
+        - queries != []
+        - repeat >= 1
+    """
+    profile = {'build_seconds': float('inf')}
+    latencies = {mode: [float('inf')] * len(queries) for mode in SEARCH_MODES}
+    best_runs = {mode: float('inf') for mode in SEARCH_MODES}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        searcher = searcher_class(flight_network)
+        profile['build_seconds'] = min(profile['build_seconds'], time.perf_counter() - start)
+        for mode in SEARCH_MODES:
+            search = getattr(searcher, mode)
+            run_start = time.perf_counter()
+            for i, (source, destination, departure_time) in enumerate(queries):
+                start = time.perf_counter()
+                search(source=source, destination=destination, departure_time=departure_time)
+                latencies[mode][i] = min(latencies[mode][i], time.perf_counter() - start)
+            best_runs[mode] = min(best_runs[mode], time.perf_counter() - run_start)
+
+    searcher = searcher_class(flight_network)
+    gc.collect()
+    tracemalloc.start()
+    for mode in SEARCH_MODES:
+        search = getattr(searcher, mode)
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for source, destination, departure_time in queries:
+            search(source=source, destination=destination, departure_time=departure_time)
+        profile[mode] = {f'p{p}_ms': percentile(latencies[mode], p) * 1000 for p in PERCENTILES}
+        profile[mode]['max_ms'] = max(latencies[mode]) * 1000
+        profile[mode]['queries_per_second'] = len(queries) / best_runs[mode]
+        profile[mode]['peak_bytes'] = tracemalloc.get_traced_memory()[1] - start_size
+    tracemalloc.stop()
+    return profile
+
+
+def profile_loader(loader: Callable[[str, str], Network], airport_file: str, flight_file: str,
+                   repeat: int = 3) -> dict[str, float]:
+    """Return the best wall time (in seconds) of loader to load airport_file and flight_file over repeat runs, and the
+    peak of memory it allocates (in bytes, as traced by tracemalloc) in a run of its own.
+
+    Preconditions:
+        - repeat >= 1
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader(airport_file, flight_file)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    loader(airport_file, flight_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'load_seconds': best, 'peak_bytes': peak}
+
+
+def run_suite(itineraries: str, airports: str, sizes: list[int], seed: int, num_queries: int,
+              generators: list[str], searchers: list[type], repeat: int = 3) -> dict[str, Any]:
+    """Sample a testcase of each size from the itineraries and airports files with each of the given generators (keys
+    of GENERATORS), using seed for reproducibility, and return a report of every loader in LOADERS and every searcher
+    class of searchers on it, run on num_queries queries generated from the same seed.
+
+    The report is a JSON-compatible dict {"settings": {...}, "networks": {"<generator>-<size>": {...}}}, where each
+    network holds its number of airports and tickets, the profile_loader of each loader by name, and the
+    profile_searcher of each searcher class by name.
+
+    Preconditions:
+        - all(generator in GENERATORS for generator in generators)
+        - num_queries >= 1
+    """
+    report = {'settings': {'itineraries': os.path.basename(itineraries), 'airports': os.path.basename(airports),
+                           'sizes': sizes, 'seed': seed, 'queries': num_queries, 'generators': generators,
+                           'repeat': repeat, 'python': platform.python_version(), 'machine': platform.machine()},
+              'networks': {}}
+    for generator in generators:
+        for size in sizes:
+            flight_file, airport_file = GENERATORS[generator](itineraries, airports, size, seed)
+            flight_network = read_csv_file(airport_file, flight_file)
+            queries = generate_queries(flight_network, num_queries, seed)
+            report['networks'][f'{generator}-{size}'] = {
+                'generator': generator,
+                'size': size,
+                'airports': len(flight_network.airports),
+                'tickets': sum(len(airport.tickets) for airport in flight_network.airports.values()),
+                'loaders': {loader.__name__: profile_loader(loader, airport_file, flight_file, repeat)
+                            for loader in LOADERS},
+                'searchers': {searcher_class.__name__: profile_searcher(searcher_class, flight_network, queries,
+                                                                        repeat)
+                              for searcher_class in searchers}
+            }
+    return report
+
+
+def _metrics(tree: dict[str, Any], path: tuple[str, ...] = ()) -> dict[tuple[str, ...], float]:
+    """Return the numeric metrics of the networks of a report from run_suite, keyed by their path in the report.
+    """
+    metrics = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            metrics.update(_metrics(value, path + (key,)))
+        elif isinstance(value, (int, float)) and key.endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER):
+            metrics[path + (key,)] = value
+    return metrics
+
+
+def compare_reports(baseline: dict[str, Any], report: dict[str, Any],
+                    tolerance: float) -> list[tuple[str, float, float, float]]:
+    """Return the metrics of report that are worse than in baseline by more than the fraction tolerance, as (path,
+    baseline value, report value, ratio of the report value to the baseline value) tuples, worst first. Metrics that
+    are in only one of the reports, or that changed by less than their NOISE_FLOORS, are skipped.
+
+    Preconditions:
+        - tolerance >= 0
+    """
+    old, new = _metrics(baseline['networks']), _metrics(report['networks'])
+    regressions = []
+    for path in old.keys() & new.keys():
+        if old[path] <= 0 or new[path] <= 0:
+            continue
+        suffix = next(suffix for suffix in NOISE_FLOORS if path[-1].endswith(suffix))
+        if suffix in HIGHER_IS_BETTER:
+            difference = abs(1000 / new[path] - 1000 / old[path])
+        else:
+            difference = abs(new[path] - old[path])
+        if difference < NOISE_FLOORS[suffix]:
+            continue
+        ratio = new[path] / old[path]
+        slowdown = ratio if path[-1].endswith(LOWER_IS_BETTER) else 1 / ratio
+        if slowdown > 1 + tolerance:
+            regressions.append(('/'.join(path), old[path], new[path], ratio))
+    return sorted(regressions, key=lambda r: max(r[3], 1 / r[3]), reverse=True)
+
+
+def print_scaling(report: dict[str, Any]) -> None:
+    """Print, for each generator of report, how the median latency of each searcher and mode and the load time of
+    each loader grow with the size of the testcase.
+    """
+    for generator in report['settings']['generators']:
+        networks = [network for network in report['networks'].values() if network['generator'] == generator]
+        networks.sort(key=lambda network: network['size'])
+        print(f'{generator}:', ' '.join(f'{network["size"]:>10}' for network in networks))
+        for name in networks[0]['loaders']:
+            print(f'  {name:<52}', ' '.join(f'{network["loaders"][name]["load_seconds"]:>9.3f}s'
+                                            for network in networks))
+        for name in networks[0]['searchers']:
+            for mode in SEARCH_MODES:
+                print(f'  {name + "." + mode:<52}', ' '.join(f'{network["searchers"][name][mode]["p50_ms"]:>8.3f}ms'
+                                                            for network in networks))
+
+
+def print_profile(airport_file: str, flight_file: str) -> None:
+    """Print the totals, allocations and slowest query of every searcher on the network of airport_file and
+    flight_file, and the memory its loaders take per ticket.
+    """
+    flight_network = read_csv_file(airport_file, flight_file)
+    query_set = generate_queries(flight_network, n=50, seed=65537)
+    for searcher_class in searcher_classes():
+        result = benchmark_searcher(searcher_class(flight_network), query_set)
+        print(searcher_class.__name__, {mode: f'{seconds:.3f}s' for mode, seconds in result.items()})
+        allocated = measure_query_allocations(searcher_class(flight_network), query_set)
+        print(searcher_class.__name__, {mode: f'{count:.1f} collections, {size / 1024:,.0f} KiB peak per query'
+                                        for mode, (count, size) in allocated.items()})
+        for mode, mode_stats in measure_query_stats(searcher_class(flight_network), query_set).items():
+            slowest = max(range(len(query_set)), key=lambda i: mode_stats[i].wall_time)
+            print(searcher_class.__name__, mode, 'slowest query', query_set[slowest][:2],
+                  {name: round(value, 4) for name, value in mode_stats[slowest].to_dict().items()})
+
+    for load in (read_csv_file, read_columnar_csv_file):
+        per_ticket, ticket_count = measure_load_memory(load, airport_file, flight_file)
+        print(flight_file, load.__name__, f'{per_ticket:,.0f} bytes per ticket ({ticket_count:,} tickets)')
+
+
+if __name__ == '__main__':
+    # Run from this directory, since testcase_generator writes the testcases to ../data. For example,
+    #   python benchmark.py --sizes 1000 5000 20000 --output bench.json
+    #   python benchmark.py --sizes 1000 5000 20000 --baseline bench.json --output bench_new.json
+    # writes a report of every searcher and loader on general and direct flight testcases of 1000, 5000 and 20000
+    # itineraries, then compares a later run against it, exiting with status 1 if a metric got worse by more than the
+    # tolerance.
+    parser = argparse.ArgumentParser(description='Benchmark the flight searchers and loaders on sampled testcases.')
+    parser.add_argument('--itineraries', default='../data/clean_no_dupe_itineraries.csv')
+    parser.add_argument('--airports', default='../data/airport_class.csv')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 6969])
+    parser.add_argument('--generators', nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--searchers', nargs='+', help='class names of the searchers to run, all of them by default')
+    parser.add_argument('--seed', type=int, default=65537)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark.json', help='file to write the JSON report to')
+    parser.add_argument('--baseline', help='JSON report of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fraction by which a metric may get worse than in the baseline, 0.25 by default')
+    parser.add_argument('--profile', action='store_true',
+                        help='print the totals, allocations and slowest query of every searcher on each testcase')
+    args = parser.parse_args()
+
+    classes = [c for c in searcher_classes() if args.searchers is None or c.__name__ in args.searchers]
+    suite = run_suite(args.itineraries, args.airports, args.sizes, args.seed, args.queries, args.generators, classes,
+                      args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(suite, f, indent=2)
+    print_scaling(suite)
+
+    if args.profile:
+        for gen in args.generators:
+            for n in args.sizes:
+                flight_path, airport_path = GENERATORS[gen](args.itineraries, args.airports, n, args.seed)
+                print_profile(airport_path, flight_path)
+        print('push/pop per second',
+              {name: f'{rate:,.0f}' for name, rate in benchmark_priority_queues(10 ** 6, 0).items()})
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        changed = {key for key in ('sizes', 'seed', 'queries', 'generators')
+                   if base['settings'].get(key) != suite['settings'][key]}
+        if changed:
+            print('the baseline was run with different settings:', ', '.join(sorted(changed)))
+        worse = compare_reports(base, suite, args.tolerance)
+        for metric, before, after, change in worse:
+            print(f'REGRESSION {metric}: {before:,.3f} -> {after:,.3f} ({change:.2f}x)')
+        print(f'{len(worse)} regressions beyond {args.tolerance:.0%} against {args.baseline}')
+        sys.exit(1 if worse else 0)
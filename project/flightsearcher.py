@@ -1,15 +1,221 @@
 """ flight searcher """
 from __future__ import annotations
-from typing import Optional
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional
 
-from queue import PriorityQueue
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from bisect import bisect_left, bisect_right, insort
+from heapq import heappush, heappop, heappushpop
 from datetime import datetime
 
 from python_ta.contracts import check_contracts
 
 from network import IATACode, DayHourMinute
 from network import MIN_LAYOVER_TIME, MAX_LAYOVER_TIME, MAX_LAYOVER, TOP_K_RESULTS
-from network import Network, Airport, Flight, Ticket
+from network import MINUTES_PER_DAY, MINUTES_PER_WEEK
+from network import Network, ColumnarNetwork, Airport, Flight, Ticket, TicketView
+from landmark import PrunedLandmarkLabelling
+
+CONTINUATION_CACHE_SIZE = 100000
+LANDMARK_CACHE_SIZE = 256  # destinations and metrics whose landmark distances a searcher keeps
+CLOCK_CHECK_INTERVAL = 64  # expansions between two readings of the clock by SearchBudget
+
+
+# @check_contracts
+class LRUCache:
+    """
+    A mapping that holds at most maxsize items, and drops the least recently used item to make room for a new one. It
+    can be shared between threads.
+
+    Instance Attributes:
+        - maxsize: The most items the cache holds at once.
+        - items: The items of the cache, from the least to the most recently used.
+        - hits: The number of lookups that found their key.
+        - misses: The number of lookups that did not find their key.
+        - lock: Held while the items or counts are read or changed.
+
+    Representation Invariants:
+        - self.maxsize > 0
+        - len(self.items) <= self.maxsize
+        - self.hits >= 0 and self.misses >= 0
+    """
+    maxsize: int
+    items: OrderedDict[Hashable, Any]
+    hits: int
+    misses: int
+    lock: threading.Lock
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize an empty cache holding at most maxsize items.
+
+        Preconditions:
+            - maxsize > 0
+        """
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value of key and mark it as the most recently used, or None if key is not in the cache.
+        """
+        with self.lock:
+            value = self.items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value as the most recently used item for key, dropping the least recently used item if the cache
+        is full.
+
+        Preconditions:
+            - value is not None
+        """
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            if len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every item from the cache, keeping the hit and miss counts.
+        """
+        with self.lock:
+            self.items.clear()
+
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups that found their key, or 0.0 if there was no lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SearchBudgetExhausted(Exception):
+    """Raised by SearchBudget.charge when the search has run out of its budget."""
+
+
+# @check_contracts
+class SearchBudget:
+    """
+    A limit on the work of one search, in wall-clock time, in expansions, or both. A searcher given a budget charges it
+    for every expansion, and once the budget runs out it stops and returns the best flights found so far. optimal then
+    tells whether those flights are proven to be the best ones.
+
+    What an expansion is depends on the searcher: a flight path extended by the tickets leaving its last airport for
+    most of them, and a connection scanned for the connection scan searcher.
+
+    Instance Attributes:
+        - deadline: The time.monotonic() time at which the search stops, or None if the search has no time limit.
+        - max_expansions: The most expansions the search may make, or None if they are not limited.
+        - expansions: The number of expansions made so far.
+        - exhausted: Whether the search ran out of budget.
+
+    Representation Invariants:
+        - self.max_expansions is None or self.max_expansions >= 0
+        - self.expansions >= 0
+    """
+    deadline: Optional[float]
+    max_expansions: Optional[int]
+    expansions: int
+    exhausted: bool
+
+    def __init__(self, deadline_ms: Optional[float] = None, max_expansions: Optional[int] = None) -> None:
+        """Initialize a budget of deadline_ms milliseconds from now and max_expansions expansions, where None means no
+        limit.
+
+        Preconditions:
+            - max_expansions is None or max_expansions >= 0
+        """
+        self.deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms is not None else None
+        self.max_expansions = max_expansions
+        self.expansions = 0
+        self.exhausted = False
+
+    def charge(self) -> None:
+        """Count one expansion, and raise SearchBudgetExhausted if the budget has run out. The clock is only read every
+        CLOCK_CHECK_INTERVAL expansions, so a search may go on for a few expansions after its deadline.
+        """
+        if self.exhausted:
+            raise SearchBudgetExhausted
+        self.expansions += 1
+        if (self.max_expansions is not None and self.expansions > self.max_expansions) or \
+                (self.deadline is not None and self.expansions % CLOCK_CHECK_INTERVAL == 0
+                 and time.monotonic() >= self.deadline):
+            self.exhausted = True
+            raise SearchBudgetExhausted
+
+    @property
+    def optimal(self) -> bool:
+        """Return whether the search finished within the budget, so that its flights are the best ones.
+        """
+        return not self.exhausted
+
+
+# @check_contracts
+class SearchStats:
+    """
+    The counters and timings of a search, filled in by the searcher it is given to. A record given to several searches
+    adds up their counts and times.
+
+    The counts are of the work the search actually does. The flight paths taken from a cache (the continuations of
+    NaiveFlightSearcher, or the last front of ParetoFlightSearcher) are not counted again.
+
+    Instance Attributes:
+        - nodes_popped: The number of flight paths (states or labels) taken up to be extended with the tickets leaving
+        their last airport.
+        - heap_pushes: The number of flight paths put aside for later, pushed onto a heap or stored as labels.
+        - tickets_scanned: The number of tickets looked at, departing within the time window of the flight path they
+        would extend, or the number of connections scanned by the connection scan searcher.
+        - rejected_layover: The number of tickets leaving the last airport of a flight path that depart outside its
+        layover window of `MIN_LAYOVER_TIME` to `MAX_LAYOVER_TIME`, counted once for each such flight path and ticket.
+        - rejected_stops: The number of tickets rejected because the flight path would take more than `MAX_LAYOVER`
+        flights, or could not reach the destination within `MAX_LAYOVER` flights according to the landmark index.
+        - backtrack_time: The time spent building the returned tickets from the flight paths found, in seconds.
+        - wall_time: The time spent in the search in total, in seconds.
+
+    Representation Invariants:
+        - self.nodes_popped >= 0 and self.heap_pushes >= 0 and self.tickets_scanned >= 0
+        - self.rejected_layover >= 0 and self.rejected_stops >= 0
+        - 0 <= self.backtrack_time <= self.wall_time
+    """
+    nodes_popped: int
+    heap_pushes: int
+    tickets_scanned: int
+    rejected_layover: int
+    rejected_stops: int
+    backtrack_time: float
+    wall_time: float
+
+    def __init__(self) -> None:
+        """Initialize a record with every count and time at 0.
+        """
+        self.nodes_popped = 0
+        self.heap_pushes = 0
+        self.tickets_scanned = 0
+        self.rejected_layover = 0
+        self.rejected_stops = 0
+        self.backtrack_time = 0.0
+        self.wall_time = 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        """Return the counts and times of this record by name.
+        """
+        return {'nodes_popped': self.nodes_popped,
+                'heap_pushes': self.heap_pushes,
+                'tickets_scanned': self.tickets_scanned,
+                'rejected_layover': self.rejected_layover,
+                'rejected_stops': self.rejected_stops,
+                'backtrack_time': self.backtrack_time,
+                'wall_time': self.wall_time}
 
 
 # @check_contracts
@@ -19,13 +225,87 @@ class AbstractFlightSearcher:
 
     Instance Attributes:
         - flight_network: The network used to look-up flights.
+        - landmark_index: The landmark index of flight_network used to prune flight paths that cannot reach the
+        destination, or None to search without pruning.
+        - landmark_cache: The distances most recently looked up in landmark_index, keyed by destination and metric.
     """
     flight_network: Network
+    landmark_index: Optional[PrunedLandmarkLabelling]
+    landmark_cache: LRUCache
 
     def __init__(self, flight_network: Network) -> None:
         """Initializes a flight network for Abstract Flight Searcher.
         """
         self.flight_network = flight_network
+        self.landmark_index = None
+        self.landmark_cache = LRUCache(LANDMARK_CACHE_SIZE)
+
+    def use_landmark_index(self, landmark_index: Optional[PrunedLandmarkLabelling]) -> None:
+        """Prune the flight paths of later searches with landmark_index, or stop pruning if it is None.
+
+        Preconditions:
+            - landmark_index is None or landmark_index was built from self.flight_network
+        """
+        self.landmark_index = landmark_index
+        self.landmark_cache = LRUCache(LANDMARK_CACHE_SIZE)
+
+    def _landmark_distances(self, destination: Airport, metric: str) -> Optional[dict[Airport, float]]:
+        """Return the distance in the airport graph from each airport that can reach destination to destination for
+        the given metric, according to landmark_index, or None if there is no landmark index. Airports that cannot
+        reach destination are left out.
+        """
+        if self.landmark_index is None:
+            return None
+        distances = self.landmark_cache.get((destination, metric))
+        if distances is None:
+            distances = {self.flight_network.airports[iata]: distance
+                         for iata, distance in self.landmark_index.distances_to(destination.iata, metric).items()}
+            self.landmark_cache.put((destination, metric), distances)
+        return distances
+
+    def _out_of_reach(self, min_flights: Optional[dict[Airport, float]], airport: Airport, num_flights: int) -> bool:
+        """Return whether a flight path that reaches airport after num_flights flights cannot go on to the destination
+        within `MAX_LAYOVER` flights, where min_flights is the least number of flights from each airport to the
+        destination as returned by _landmark_distances, or None if it is unknown.
+        """
+        return min_flights is not None and num_flights + min_flights.get(airport, float('inf')) > MAX_LAYOVER
+
+    @contextmanager
+    def _timing(self, stats: Optional[SearchStats], name: str) -> Iterator[None]:
+        """Add the time spent in the with block, in seconds, to the attribute name of stats, unless stats is None.
+        """
+        if stats is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(stats, name, getattr(stats, name) + time.perf_counter() - start)
+
+    def _count_expansion(self, stats: SearchStats, airport: Airport, tickets: list[Ticket], first: bool) -> None:
+        """Count in stats a flight path at airport extended with tickets, the tickets of airport departing within its
+        time window. The other tickets of airport are rejected by the layover window, unless the path is still empty
+        (first is True), in which case its window is the departure day.
+        """
+        stats.nodes_popped += 1
+        stats.tickets_scanned += len(tickets)
+        if not first:
+            stats.rejected_layover += len(airport.tickets) - len(tickets)
+
+    def _within_budget(self, items: Iterable, budget: Optional[SearchBudget]) -> Iterator:
+        """Yield the items in order, charging budget for each of them, and stop early if budget runs out. Every item
+        is yielded if budget is None.
+        """
+        if budget is None:
+            yield from items
+            return
+        for item in items:
+            try:
+                budget.charge()
+            except SearchBudgetExhausted:
+                return
+            yield item
 
     def _merge_ticket(self, tickets: list[Ticket]) -> Ticket:
         """Merge a list of tickets into one ticket and return the merged ticket.
@@ -52,30 +332,33 @@ class AbstractFlightSearcher:
         """
         return DayHourMinute(date.weekday() + 1, date.hour, date.minute)
 
-    def _minute_diff(self, before: DayHourMinute, after: DayHourMinute) -> int:
-        """Return the difference in time between before and after (in minutes).
+    def _get_minute_of_week(self, date: datetime) -> int:
+        """Returns the number of minutes between Monday 00:00 and the time of the week of a given date.
         """
-        if before.day > after.day:
-            after = DayHourMinute(after.day + 7, after.hour, after.minute)
-        elif before.day == after.day and before.hour > after.hour:
-            after = DayHourMinute(after.day + 7, after.hour, after.minute)
-        elif before.day == after.day and before.hour == after.hour and before.minute > after.minute:
-            after = DayHourMinute(after.day + 7, after.hour, after.minute)
+        return date.weekday() * MINUTES_PER_DAY + date.hour * 60 + date.minute
 
-        return (after.day * 1440 + after.hour * 60 + after.minute) - \
-            (before.day * 1440 + before.hour * 60 + before.minute)
+    def _minute_diff(self, before: int, after: int) -> int:
+        """Return the difference in time between before and after (in minutes), where both are given in minutes
+        since Monday 00:00. If after is earlier in the week than before, it is taken from the following week.
+        """
+        return (after - before) % MINUTES_PER_WEEK
 
-    def _day_hour_minute_diff(self, before: DayHourMinute, after: DayHourMinute) -> DayHourMinute:
+    def _day_hour_minute_diff(self, before: int, after: int) -> DayHourMinute:
         """Return the difference of time between before and after.
         """
         minute_diff = self._minute_diff(before, after)
         return DayHourMinute(day=minute_diff // 1440, hour=(minute_diff % 1440) // 60, minute=minute_diff % 60)
 
-    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime) -> list[Ticket]:
+    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
         """ An abstract function that returns a list of tickets where each ticket departs from `source` and ends at
         `destination`. The flight departs on the same day as `departure_time`. The ticket is sorted in non-decreasing
         flight duration.
 
+        If budget is given and runs out, the search stops and returns the best tickets it found so far, and
+        budget.optimal is False. If stats is given, the counts and times of the search are added to it.
+
         Preconditions:
             - source in self.flight_network.airports
             - destination in self.flight_network.airports
@@ -83,11 +366,16 @@ class AbstractFlightSearcher:
         """
         raise NotImplementedError
 
-    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime) -> list[Ticket]:
+    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
         """ An abstract function that returns a list of tickets where each ticket departs from `source` and ends at
         `destination`. The flight departs on the same day as `departure_time`. The ticket is sorted in non-decreasing
         price.
 
+        If budget is given and runs out, the search stops and returns the best tickets it found so far, and
+        budget.optimal is False. If stats is given, the counts and times of the search are added to it.
+
         Preconditions:
             - source in self.flight_network.airports
             - destination in self.flight_network.airports
@@ -99,48 +387,226 @@ class AbstractFlightSearcher:
 # @check_contracts
 class NaiveFlightSearcher(AbstractFlightSearcher):
     """A naive implementation of flight searcher.
+
+    The flight paths that go on from an airport after the first flight are kept in a cache, keyed by the airport,
+    the minute of the week it is reached, the number of airports the path may still visit and the destination. They
+    are found as if the airport was the only one visited so far, together with the set of airports each of them
+    visits, so that a path reaching the airport again only keeps those that do not visit its airports a second time.
+
+    Instance Attributes:
+        - flight_network: The network used to look-up flights.
+        - continuations: The cache of flight paths going on from an airport, or None to search without it. Each value
+        is a list of (tickets, airports) pairs, where airports is the set of airports the tickets visit.
     """
-    # Make more helper functions
+    continuations: Optional[LRUCache]
 
-    def __init__(self, flight_network: Network) -> None:
-        """Initializes a flight network for NaiveFlightSearcher.
+    def __init__(self, flight_network: Network, cache_size: int = CONTINUATION_CACHE_SIZE) -> None:
+        """Initializes a flight network for NaiveFlightSearcher, with a cache of at most cache_size continuations,
+        or no cache if cache_size is 0.
+
+        Preconditions:
+            - cache_size >= 0
         """
         AbstractFlightSearcher.__init__(self, flight_network)
+        self.continuations = LRUCache(cache_size) if cache_size > 0 else None
 
-    def _search_all_flight(self, source: Airport, destination: Airport, departure_time: DayHourMinute,
-                           visited: set[Airport]) -> list[Optional[Ticket]]:
-        """Returns all possible flight paths that departs from the `source`, on the same day as departure_time to the
+    def use_landmark_index(self, landmark_index: Optional[PrunedLandmarkLabelling]) -> None:
+        """Prune the flight paths of later searches with landmark_index, or stop pruning if it is None. The cached
+        continuations were pruned with the previous index, so they are dropped.
+
+        Preconditions:
+            - landmark_index is None or landmark_index was built from self.flight_network
+        """
+        AbstractFlightSearcher.use_landmark_index(self, landmark_index)
+        if self.continuations is not None:
+            self.continuations.clear()
+
+    def _search_all_flight(self, source: Airport, destination: Airport, departure_time: int,
+                           visited: set[Airport], parent: Optional[tuple] = None,
+                           pruned: Optional[Callable[[tuple], bool]] = None,
+                           budget: Optional[SearchBudget] = None,
+                           stats: Optional[SearchStats] = None) -> Iterator[tuple]:
+        """Yields all possible flight paths that departs from the `source`, on the same day as departure_time to the
         given `destination`. Each ticket can only visit each airport at most once. This function also takes into
         consideration the minimum and maximum layover time, and the maximum number of layovers.
+
+        Flight paths are yielded as handles (price, ticket, parent), where price is the total price of the path,
+        ticket is its last ticket and parent is the handle of the path before ticket, or None. parent is the handle of
+        the path that reached `source`. Use _to_ticket to merge a handle into a ticket.
+
+        A path is neither extended nor yielded if pruned returns True for its handle, which it is only asked once the
+        path reaches a new airport. If there is a continuation cache, the paths after the first ticket are taken from
+        it and only checked against pruned once they reach the destination, which prunes the same paths since the
+        cost of a path never decreases as it grows.
+
+        budget is charged for every path extended from its last airport and every path taken from the cache, and
+        raises SearchBudgetExhausted out of the generator when it runs out. The work of the search is counted in
+        stats, unless it is None.
+
+        departure_time is given in minutes since Monday 00:00.
         """
         if source == destination:
-            return [None]
+            yield parent
+            return
+
+        if budget is not None:
+            budget.charge()
+        price = parent[0] if parent is not None else 0
+        min_flights = self._landmark_distances(destination, 'flights')
+        if len(visited) == 1:  # 24 hour gap for first flight.
+            tickets = source.get_tickets_departing(departure_time, departure_time + 2 * MAX_LAYOVER_TIME - 1)
+        else:
+            tickets = source.get_tickets_departing(departure_time + MIN_LAYOVER_TIME, departure_time + MAX_LAYOVER_TIME)
+        if stats is not None:
+            self._count_expansion(stats, source, tickets, len(visited) == 1)
 
-        paths = []
-        for ticket in source.tickets:
-            minute_diff = self._minute_diff(departure_time, ticket.departure_time)
+        for ticket in tickets:
             if any(flight.destination in visited for flight in ticket.flights):
                 continue
-            if not ((MIN_LAYOVER_TIME <= minute_diff <= MAX_LAYOVER_TIME)
-                    or (len(visited) == 1 and minute_diff < 2 * MAX_LAYOVER_TIME)):  # 24 hour gap for first flight.
-                continue
 
             next_visited = visited.union(flight.destination for flight in ticket.flights)
-            if len(next_visited) > MAX_LAYOVER + 1:
+            if len(next_visited) > MAX_LAYOVER + 1 or \
+                    self._out_of_reach(min_flights, ticket.destination, len(next_visited) - 1):
+                if stats is not None:
+                    stats.rejected_stops += 1
                 continue
-            next_paths = self._search_all_flight(source=ticket.destination,
-                                                 destination=destination,
-                                                 departure_time=ticket.arrival_time,
-                                                 visited=next_visited)
-            for path in next_paths:
-                if path is None:
-                    paths.append(ticket)
+            path = (price + ticket.price, ticket, parent)
+            if pruned is not None and pruned(path):
+                continue
+            if self.continuations is None:
+                yield from self._search_all_flight(source=ticket.destination,
+                                                   destination=destination,
+                                                   departure_time=ticket.arrival_minute,
+                                                   visited=next_visited,
+                                                   parent=path,
+                                                   pruned=pruned,
+                                                   budget=budget,
+                                                   stats=stats)
+                continue
+
+            for continuation, airports in self._get_continuations(ticket.destination, destination,
+                                                                  ticket.arrival_minute,
+                                                                  MAX_LAYOVER + 1 - len(next_visited), budget, stats):
+                if budget is not None:
+                    budget.charge()
+                if airports.isdisjoint(next_visited):
+                    full_path = path
+                    for next_ticket in continuation:
+                        full_path = (full_path[0] + next_ticket.price, next_ticket, full_path)
+                    if pruned is None or not pruned(full_path):
+                        yield full_path
+
+    def _get_continuations(self, source: Airport, destination: Airport, arrival_time: int, remaining: int,
+                           budget: Optional[SearchBudget],
+                           stats: Optional[SearchStats]) -> list[tuple[tuple[Ticket, ...], frozenset[Airport]]]:
+        """Return the flight paths from source to destination after reaching source at arrival_time (in minutes since
+        Monday 00:00), that visit at most remaining more airports and never visit source again, in the order
+        _search_all_flight finds them. Each path is a pair (tickets, airports), where airports is the set of airports
+        the tickets visit, source excluded.
+
+        budget, if not None, is charged for every list of paths that is not cached yet. A list is only cached once it
+        is complete, so running out of budget leaves the cache as it was. The work of the search is counted in stats,
+        unless it is None.
+
+        Preconditions:
+            - self.continuations is not None
+            - 0 <= remaining <= MAX_LAYOVER
+        """
+        if source == destination:
+            return [((), frozenset())]
+
+        key = (source, arrival_time % MINUTES_PER_WEEK, remaining, destination)
+        continuations = self.continuations.get(key)
+        if continuations is not None:
+            return continuations
+
+        if budget is not None:
+            budget.charge()
+        continuations = []
+        min_flights = self._landmark_distances(destination, 'flights')
+        departing = source.get_tickets_departing(arrival_time + MIN_LAYOVER_TIME, arrival_time + MAX_LAYOVER_TIME)
+        if stats is not None:
+            self._count_expansion(stats, source, departing, False)
+        for ticket in departing:
+            airports = frozenset(flight.destination for flight in ticket.flights)
+            if source in airports:
+                continue
+            if len(airports) > remaining or \
+                    self._out_of_reach(min_flights, ticket.destination, MAX_LAYOVER - remaining + len(airports)):
+                if stats is not None:
+                    stats.rejected_stops += 1
+                continue
+            for tickets, next_airports in self._get_continuations(ticket.destination, destination,
+                                                                  ticket.arrival_minute, remaining - len(airports),
+                                                                  budget, stats):
+                if source not in next_airports and airports.isdisjoint(next_airports):
+                    continuations.append(((ticket,) + tickets, airports | next_airports))
+
+        self.continuations.put(key, continuations)
+        return continuations
+
+    def _to_ticket(self, handle: tuple[float, Ticket, Optional[tuple]]) -> Ticket:
+        """Return the ticket of the flight path of handle, as returned by _search_all_flight.
+        """
+        path = []
+        while handle is not None:
+            path.append(handle[1])
+            handle = handle[2]
+        path.reverse()
+        return self._merge_ticket(path)
+
+    def _search(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                by_price: bool, budget: Optional[SearchBudget] = None,
+                stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Return the `TOP_K_RESULTS` flights with the shortest flight duration or, if by_price is True, the cheapest
+        ticket price, with ties in the order `_search_all_flight` finds them.
+
+        The best flight paths found so far are kept in a heap of at most `TOP_K_RESULTS` paths, whose top is the worst
+        of them. Once the heap is full, a path is pruned if it already costs at least as much as the top, since
+        neither a ticket price nor the time spent travelling can be negative. If budget runs out, the paths in the
+        heap are returned.
+        """
+        source_airport = self.flight_network.airports[source]
+        destination_airport = self.flight_network.airports[destination]
+        departure_weektime = self._get_minute_of_week(departure_time)
+
+        def cost(path: tuple) -> float:
+            if by_price:
+                return path[0]
+            return (path[1].arrival_minute - departure_weektime) % MINUTES_PER_WEEK
+
+        # Entries are (-cost, -order found, path), so that the top of the heap is the last worst path found.
+        best: list[tuple[float, int, tuple]] = []
+
+        def pruned(path: tuple) -> bool:
+            return len(best) == TOP_K_RESULTS and cost(path) >= -best[0][0]
+
+        paths = self._search_all_flight(source=source_airport,
+                                        destination=destination_airport,
+                                        departure_time=departure_weektime,
+                                        visited={source_airport},
+                                        pruned=pruned,
+                                        budget=budget,
+                                        stats=stats)
+        try:
+            for order, path in enumerate(paths):
+                if len(best) < TOP_K_RESULTS:
+                    heappush(best, (-cost(path), -order, path))
                 else:
-                    paths.append(self._merge_ticket([ticket, path]))
-        return paths
+                    heappushpop(best, (-cost(path), -order, path))
+                if stats is not None:
+                    stats.heap_pushes += 1
+        except SearchBudgetExhausted:
+            pass
+
+        best.sort(reverse=True)
+        with self._timing(stats, 'backtrack_time'):
+            return [self._to_ticket(path) for _, _, path in best]
 
-    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime) -> list[Ticket]:
-        """Calls the `_search_all_flight` function to generate all possible paths. Then, returns the `TOP_K_RESULTS`
+    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Calls the `_search_all_flight` function to generate all possible paths, and returns the `TOP_K_RESULTS`
         flights with the shortest flight duration.
 
         Preconditions:
@@ -148,20 +614,13 @@ class NaiveFlightSearcher(AbstractFlightSearcher):
             - destination in self.flight_network.airports
             - departure_time.hour == 0 and departure_time.minute == 0
         """
-        source_airport = self.flight_network.airports[source]
-        destination_airport = self.flight_network.airports[destination]
-        departure_weektime = self._get_day_of_week(departure_time)
-        visited = {source_airport}
-
-        tickets = self._search_all_flight(source=source_airport,
-                                          destination=destination_airport,
-                                          departure_time=departure_weektime,
-                                          visited=visited)
-        tickets.sort(key=lambda x: x.arrival_time)
-        return tickets[:TOP_K_RESULTS]
-
-    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime) -> list[Ticket]:
-        """Calls the `_search_all_flight` function to generate all possible paths. Then, returns the `TOP_K_RESULTS`
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=False, budget=budget, stats=stats)
+
+    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Calls the `_search_all_flight` function to generate all possible paths, and returns the `TOP_K_RESULTS`
         flights with the lowest ticket price.
 
         Preconditions:
@@ -169,17 +628,8 @@ class NaiveFlightSearcher(AbstractFlightSearcher):
             - destination in self.flight_network.airports
             - departure_time.hour == 0 and departure_time.minute == 0
         """
-        source_airport = self.flight_network.airports[source]
-        destination_airport = self.flight_network.airports[destination]
-        departure_weektime = self._get_day_of_week(departure_time)
-        visited = {source_airport}
-
-        tickets = self._search_all_flight(source=source_airport,
-                                          destination=destination_airport,
-                                          departure_time=departure_weektime,
-                                          visited=visited)
-        tickets.sort(key=lambda x: x.price)
-        return tickets[:TOP_K_RESULTS]
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=True, budget=budget, stats=stats)
 
 
 class DijkstraFlightSearcher(AbstractFlightSearcher):
@@ -190,7 +640,125 @@ class DijkstraFlightSearcher(AbstractFlightSearcher):
         """
         AbstractFlightSearcher.__init__(self, flight_network)
 
-    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime) -> list[Ticket]:
+    def _search(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                by_price: bool, budget: Optional[SearchBudget] = None,
+                stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Uses dijkstra algorithm to find and return the `TOP_K_RESULTS` flights with the shortest flight duration
+        or, if by_price is True, the cheapest ticket price.
+
+        Every airport is reached at most `TOP_K_RESULTS` times, and each way of reaching an airport is a state. The
+        heap only holds (cost, state) pairs of numbers, while everything else about a state is kept in the state_*
+        lists. State ids increase in the order they are pushed, so ties in cost are popped first-in first-out.
+
+        budget is charged for every state popped. If it runs out, the states settled at the destination are returned,
+        followed by the cheapest states reaching the destination that are still in the heap. The work of the search is
+        counted in stats, unless it is None.
+        """
+        source_airport = self.flight_network.airports[source]
+        destination_airport = self.flight_network.airports[destination]
+        dep_time_simpl = self._get_minute_of_week(departure_time)
+        dep_day = dep_time_simpl // MINUTES_PER_DAY
+
+        # For each state:
+        # state_airport denote the current position after doing some flights
+        # state_ticket denote the ticket bought immediately before reaching this state, is useful for backtracking
+        # state_parent denote the state in which state_ticket was bought
+        # state_flights denote the number of flights that have been done, which reflects the number of layover.
+        # The cost of a state is either the time difference from 00:00 departure day to the current flight's arrival
+        # time in minutes, or the price of the tickets to go from source to the current position.
+        # The heap is ordered by the cost of a state plus the lower bound on its remaining cost, if any.
+        lower_bounds = self._lower_bounds(destination_airport, by_price)
+        min_flights = self._landmark_distances(destination_airport, 'flights')
+        heap: list[tuple[float, int]] = [(0, 0)]
+        state_airport: list[Airport] = [source_airport]
+        state_ticket: list[Optional[Ticket]] = [None]
+        state_parent: list[int] = [-1]
+        state_flights: list[int] = [0]
+        state_cost: list[float] = [0]
+        settled: dict[Airport, list[int]] = {airport: [] for airport in self.flight_network.airports.values()}
+
+        try:
+            while heap and len(settled[destination_airport]) < TOP_K_RESULTS:
+                if budget is not None:
+                    budget.charge()
+                _, state = heappop(heap)
+                curr_pos = state_airport[state]
+                if len(settled[curr_pos]) == TOP_K_RESULTS:
+                    continue
+                settled[curr_pos].append(state)
+                cost = state_cost[state]
+
+                prev_ticket = state_ticket[state]
+                num_flights = state_flights[state]
+                # If this is not the first flight, we allow layover time between [MIN_LAYOVER_TIME, MAX_LAYOVER_TIME]
+                if prev_ticket is not None:
+                    tickets = curr_pos.get_tickets_departing(prev_ticket.arrival_minute + MIN_LAYOVER_TIME,
+                                                             prev_ticket.arrival_minute + MAX_LAYOVER_TIME)
+                # If this is the first flight, we force the first ticket to be on the same day as the query.
+                else:
+                    tickets = curr_pos.get_tickets_departing(dep_day * MINUTES_PER_DAY,
+                                                             (dep_day + 1) * MINUTES_PER_DAY - 1)
+                if stats is not None:
+                    self._count_expansion(stats, curr_pos, tickets, prev_ticket is None)
+
+                for ticket in tickets:
+                    next_flights = num_flights + len(ticket.flights)
+                    if next_flights > MAX_LAYOVER or self._out_of_reach(min_flights, ticket.destination, next_flights):
+                        if stats is not None:
+                            stats.rejected_stops += 1
+                        continue
+                    if by_price:
+                        next_cost = cost + ticket.price
+                    else:
+                        next_cost = (ticket.arrival_minute - dep_time_simpl) % MINUTES_PER_WEEK
+
+                    if lower_bounds is None:
+                        heappush(heap, (next_cost, len(state_airport)))
+                    elif ticket.destination in lower_bounds:
+                        heappush(heap, (next_cost + lower_bounds[ticket.destination], len(state_airport)))
+                    else:
+                        continue  # destination cannot be reached from ticket.destination
+                    if stats is not None:
+                        stats.heap_pushes += 1
+                    state_airport.append(ticket.destination)
+                    state_ticket.append(ticket)
+                    state_parent.append(state)
+                    state_flights.append(next_flights)
+                    state_cost.append(next_cost)
+            found = settled[destination_airport]
+        except SearchBudgetExhausted:
+            # The lower bound of the destination is 0, so these states are in the order they would have been popped.
+            reached = sorted(entry for entry in heap if state_airport[entry[1]] == destination_airport)
+            found = settled[destination_airport] + [state for _, state in reached]
+            found = found[:TOP_K_RESULTS]
+
+        results = []
+
+        # backtracking process
+        with self._timing(stats, 'backtrack_time'):
+            for state in found:
+                path = []
+                while state_ticket[state] is not None:
+                    path.append(state_ticket[state])
+                    state = state_parent[state]
+
+                path.reverse()
+                results.append(self._merge_ticket(path))
+
+        return results
+
+    def _lower_bounds(self, destination: Airport, by_price: bool) -> Optional[dict[Airport, float]]:
+        """Return a lower bound on the remaining flight duration or, if by_price is True, the remaining ticket price
+        from each airport to destination. Airports that cannot reach destination are left out.
+
+        Plain dijkstra searches without lower bounds and returns None, unless there is a landmark index, in which case
+        the bounds are the cheapest price or the shortest total block time in the airport graph.
+        """
+        return self._landmark_distances(destination, 'price' if by_price else 'duration')
+
+    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
         """Uses dijkstra algorithm to find and return the `TOP_K_RESULTS` flights with the shortest flight duration.
 
         Preconditions:
@@ -198,132 +766,857 @@ class DijkstraFlightSearcher(AbstractFlightSearcher):
             - destination in self.flight_network.airports
             - departure_time.hour == 0 and departure_time.minute == 0
         """
-        dep_time_simpl = DayHourMinute(departure_time.isoweekday(), departure_time.hour, departure_time.minute)
-        pq: PriorityQueue[tuple[int, IATACode, Optional[Ticket], int, int]] = PriorityQueue()
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=False, budget=budget, stats=stats)
 
-        # The tuple in pq is (time_dist, curr_pos, prev_ticket, prev_k, num_flights)
-        # time_dist denote the time difference from 00:00 departure day to the current flight's arrival time in minutes
-        # curr_pos denote the current position after doing some flights
-        # prev_ticket denote the ticket bought immediately before this ticket, is useful for backtracking
-        # prev_k denote the number of optimal flights found, note that we only need up to `TOP_K_RESULTS` flights
-        # num_flights denote the number of flights that have been done, which reflects the number of layover.
-        pq.put((0, source, None, 0, 0))
-        distance: dict[IATACode, list[int]] = {iata: [] for iata in self.flight_network.airports}
-        previous: dict[IATACode, list[tuple[Ticket, int]]] = {iata: [] for iata in self.flight_network.airports}
+    def search_cheapest_flight(self, source: str, destination: str, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Uses dijkstra algorithm to find and return the `TOP_K_RESULTS` flights with the cheapest ticket price.
 
-        while not pq.empty():
-            time_dist, curr_pos, prev_ticket, prev_k, num_flights = pq.get()
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=True, budget=budget, stats=stats)
+
+
+class AStarFlightSearcher(DijkstraFlightSearcher):
+    """Use A* search, which is dijkstra algorithm directed towards the destination by lower bounds on the remaining
+    cost from each airport.
 
-            if len(distance[curr_pos]) == TOP_K_RESULTS or num_flights > MAX_LAYOVER:
+    The lower bounds come from a reverse dijkstra search from the destination over a relaxation of the network, in which
+    each pair of airports is joined by the cheapest price and the shortest block time (arrival minus departure) of the
+    tickets between them, ignoring departure times. Every ticket after the first one waits at least `MIN_LAYOVER_TIME`
+    before departing, so that wait is added to the block time of each edge. Every ticket then costs at least as much as
+    its edge in the relaxation, so the lower bounds never overestimate and the results are the same as dijkstra
+    algorithm.
+
+    Instance Attributes:
+        - flight_network: The network used to look-up flights.
+        - relaxed_edges: For each airport, the cheapest price and the shortest block time plus `MIN_LAYOVER_TIME` of the
+        tickets reaching it from each other airport, or None if it has not been computed yet.
+        - lower_bound_cache: The lower bounds computed so far, keyed by destination and whether they bound the price.
+    """
+    relaxed_edges: Optional[dict[Airport, dict[Airport, tuple[float, int]]]]
+    lower_bound_cache: dict[tuple[Airport, bool], dict[Airport, float]]
+
+    def __init__(self, flight_network: Network) -> None:
+        """Initialize a flight network for A* flight searcher. The lower bounds are computed on the first search to
+        each destination.
+        """
+        DijkstraFlightSearcher.__init__(self, flight_network)
+        self.relaxed_edges = None
+        self.lower_bound_cache = {}
+
+    def _get_relaxed_edges(self) -> dict[Airport, dict[Airport, tuple[float, int]]]:
+        """Return the reversed edges of the relaxation of the network, computing them if necessary.
+        """
+        if self.relaxed_edges is None:
+            relaxed_edges: dict[Airport, dict[Airport, tuple[float, int]]] = {}
+            for airport, destination, departure, arrival, ticket_price, _ in self.flight_network.ticket_summaries():
+                edges = relaxed_edges.setdefault(destination, {})
+                block_time = arrival - departure + MIN_LAYOVER_TIME
+                if airport in edges:
+                    price, duration = edges[airport]
+                    edges[airport] = (min(price, ticket_price), min(duration, block_time))
+                else:
+                    edges[airport] = (ticket_price, block_time)
+            self.relaxed_edges = relaxed_edges
+        return self.relaxed_edges
+
+    def _lower_bounds(self, destination: Airport, by_price: bool) -> Optional[dict[Airport, float]]:
+        """Return the cheapest price or, if by_price is False, the shortest total block time from each airport to
+        destination in the relaxation of the network. Airports that cannot reach destination are left out.
+        """
+        if (destination, by_price) in self.lower_bound_cache:
+            return self.lower_bound_cache[(destination, by_price)]
+
+        relaxed_edges = self._get_relaxed_edges()
+        lower_bounds: dict[Airport, float] = {}
+        heap: list[tuple[float, int, Airport]] = [(0, 0, destination)]
+        pushed = 1
+        while heap:
+            bound, _, airport = heappop(heap)
+            if airport in lower_bounds:
                 continue
-            distance[curr_pos].append(time_dist)
+            lower_bounds[airport] = bound
+            for previous, (price, block_time) in relaxed_edges.get(airport, {}).items():
+                if previous not in lower_bounds:
+                    heappush(heap, (bound + (price if by_price else block_time), pushed, previous))
+                    pushed += 1
 
-            # this is later used for backtracking
-            if prev_ticket is not None:
-                previous[curr_pos].append((prev_ticket, prev_k))
+        self.lower_bound_cache[(destination, by_price)] = lower_bounds
+        return lower_bounds
 
-            for ticket in self.flight_network.airports[curr_pos].tickets:
-                # If this is not the first flight, we allow layover time between [MIN_LAYOVER_TIME, MAX_LAYOVER_TIME]
-                if prev_ticket is not None:
-                    time_to_depart = self._minute_diff(prev_ticket.arrival_time, ticket.departure_time)
-                    if not MIN_LAYOVER_TIME <= time_to_depart <= MAX_LAYOVER_TIME:
-                        continue
-                # If this is the first flight, we force the first ticket to be on the same day as the query.
-                elif prev_ticket is None and ticket.departure_time.day != dep_time_simpl.day:
+
+class ConnectionScanFlightSearcher(AbstractFlightSearcher):
+    """Use the connection scan algorithm to find the earliest arriving flight paths.
+
+    Every ticket of the network is a connection. The connections are kept in a single list sorted by departure time,
+    and a query is answered by one pass over the week following the departure day. Since a ticket always arrives
+    after it departs, every way of reaching an airport is known before any connection leaving that airport is scanned.
+
+    In a ColumnarNetwork, a connection is the row of its ticket, and a TicketView is only created for the connections
+    that some flight path can take.
+
+    Instance Attributes:
+        - flight_network: The network used to look-up flights.
+        - connections: All the tickets in flight_network, or their rows if it is a ColumnarNetwork, sorted in
+        non-decreasing departure time, or None if they have not been sorted yet.
+        - departure_minutes: The departure_minute of each ticket in connections, or None with connections.
+
+    Representation Invariants:
+        - (self.connections is None) == (self.departure_minutes is None)
+        - self.connections is None or len(self.departure_minutes) == len(self.connections)
+    """
+    connections: Optional[list[Ticket] | array]
+    departure_minutes: Optional[list[int] | array]
+
+    def __init__(self, flight_network: Network) -> None:
+        """Initialize a flight network for connection scan flight searcher. The tickets are sorted by departure time on
+        the first search.
+        """
+        AbstractFlightSearcher.__init__(self, flight_network)
+        self.connections = None
+        self.departure_minutes = None
+
+    def sorted_connections(self) -> tuple[list[int] | array, list[Ticket] | array]:
+        """Return departure_minutes and connections, sorting the tickets of the network first if it was not done yet.
+
+        A searcher over the same network may take both instead of sorting the tickets again.
+        """
+        if self.connections is None:
+            if isinstance(self.flight_network, ColumnarNetwork):
+                departures = self.flight_network.ticket_departure
+                connections = array('i', sorted(range(len(departures)), key=departures.__getitem__))
+                departure_minutes = array('i', (departures[row] for row in connections))
+            else:
+                airports = self.flight_network.airports.values()
+                connections = sorted((ticket for airport in airports for ticket in airport.tickets),
+                                     key=lambda x: x.departure_minute)
+                departure_minutes = [ticket.departure_minute for ticket in connections]
+            # Set connections last, so that a search in another thread never sees it without departure_minutes.
+            self.departure_minutes = departure_minutes
+            self.connections = connections
+        return self.departure_minutes, self.connections
+
+    def _scan_connections(self, departure_time: int) -> Iterator[tuple[int, Airport, Ticket | int]]:
+        """Yield every connection departing in the week that starts at departure_time (in minutes since Monday
+        00:00), in departure order, together with its departure time counted from the start of that week and its
+        origin. Use _connection_ticket to get the ticket of a connection.
+        """
+        departure_minutes, connections = self.sorted_connections()
+        columnar = isinstance(self.flight_network, ColumnarNetwork)
+        airport_list, ticket_origin = (self.flight_network.airport_list, self.flight_network.ticket_origin) \
+            if columnar else (None, None)
+
+        start = bisect_left(departure_minutes, departure_time)
+        for offset, indices in ((0, range(start, len(connections))), (MINUTES_PER_WEEK, range(start))):
+            for i in indices:
+                connection = connections[i]
+                origin = airport_list[ticket_origin[connection]] if columnar else connection.origin
+                yield departure_minutes[i] + offset, origin, connection
+
+    def _connection_ticket(self, connection: Ticket | int) -> Ticket:
+        """Return the ticket of a connection yielded by _scan_connections.
+        """
+        if isinstance(connection, int):
+            return TicketView(self.flight_network, connection)
+        return connection
+
+    def _search(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                by_price: bool, budget: Optional[SearchBudget] = None,
+                stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Return the `TOP_K_RESULTS` flight paths from source to destination departing on the same day as
+        departure_time, sorted by arrival time or, if by_price is True, by price.
+
+        Each label is a way of reaching an airport and is stored across the label_* lists. For every airport, arrival
+        time and set of airports visited, at most `TOP_K_RESULTS` of the cheapest labels are kept, since all of them
+        can continue with exactly the same connections. Labels that visited other airports are kept apart, as a
+        connection one of them cannot take may still be open to the others.
+
+        budget is charged for every connection scanned. If it runs out, the scan stops and the flight paths reaching
+        the destination so far are returned. The work of the search is counted in stats, unless it is None, where
+        every label a connection is appended to counts as a node popped.
+        """
+        source_airport = self.flight_network.airports[source]
+        destination_airport = self.flight_network.airports[destination]
+        dep_time_simpl = self._get_minute_of_week(departure_time)
+        first_day_end = dep_time_simpl - dep_time_simpl % MINUTES_PER_DAY + MINUTES_PER_DAY
+        min_flights = self._landmark_distances(destination_airport, 'flights')
+
+        label_arrival: list[int] = []
+        label_price: list[float] = []
+        label_flights: list[int] = []
+        label_parent: list[int] = []
+        label_ticket: list[Ticket] = []
+        label_visited: list[frozenset[Airport]] = []
+        source_visited = frozenset((source_airport,))
+
+        # arrivals[airport] is the sorted list of distinct arrival times of labels at airport,
+        # and labels_at[(airport, arrival)] is the list of labels reaching airport at that time.
+        arrivals: dict[Airport, list[int]] = {}
+        labels_at: dict[tuple[Airport, int], list[int]] = {}
+        label_counts: dict[Airport, int] = {}  # the number of labels in labels_at at each airport, kept for stats only
+        results: list[tuple[float, int]] = []  # (arrival time or price, label) of labels at destination
+
+        bound = float('inf')  # the cost of the k-th result found so far
+        horizon = first_day_end  # no label can be extended by a connection departing at or after the horizon
+        for curr_time, curr_pos, connection in self._within_budget(self._scan_connections(dep_time_simpl), budget):
+            if curr_time >= horizon or (not by_price and curr_time >= bound):
+                break  # every remaining connection departs too late or arrives after the current k-th result
+            if stats is not None:
+                stats.tickets_scanned += 1
+
+            if curr_pos == source_airport and curr_time < first_day_end:
+                parents = [-1]
+            elif curr_pos in arrivals:
+                parents = []
+            else:
+                continue
+            if curr_pos in arrivals:
+                times = arrivals[curr_pos]
+                for i in range(bisect_left(times, curr_time - MAX_LAYOVER_TIME),
+                               bisect_right(times, curr_time - MIN_LAYOVER_TIME)):
+                    parents.extend(labels_at[(curr_pos, times[i])])
+            if stats is not None:
+                # The labels at curr_pos arriving outside the layover window of the connection cannot take it.
+                stats.nodes_popped += len(parents)
+                in_window = len(parents) - (1 if parents[:1] == [-1] else 0)
+                stats.rejected_layover += label_counts.get(curr_pos, 0) - in_window
+            if not parents:
+                continue
+
+            ticket = self._connection_ticket(connection)
+            arrival_time = curr_time + ticket.arrival_minute - ticket.departure_minute
+            for parent in parents:
+                num_flights = len(ticket.flights) + (label_flights[parent] if parent != -1 else 0)
+                price = ticket.price + (label_price[parent] if parent != -1 else 0.0)
+                cost = price if by_price else arrival_time
+                if num_flights > MAX_LAYOVER or self._out_of_reach(min_flights, ticket.destination, num_flights):
+                    if stats is not None:
+                        stats.rejected_stops += 1
                     continue
+                if cost >= bound:
+                    continue
+                parent_visited = label_visited[parent] if parent != -1 else source_visited
+                visited = parent_visited.union(flight.destination for flight in ticket.flights)
+                if len(visited) != len(parent_visited) + len(ticket.flights):
+                    continue  # the flight path would visit an airport twice
 
-                time_to_arrive = self._minute_diff(dep_time_simpl, ticket.arrival_time)
-                pq.put((time_to_arrive, ticket.destination.iata,
-                        ticket, len(distance[curr_pos]) - 1, num_flights + len(ticket.flights)))
+                label = len(label_arrival)
+                if ticket.destination == destination_airport:
+                    insort(results, (cost, label))
+                    if len(results) >= TOP_K_RESULTS:
+                        bound = results[TOP_K_RESULTS - 1][0]
+                else:
+                    state = labels_at.setdefault((ticket.destination, arrival_time), [])
+                    same_airports = [other for other in state if label_visited[other] == visited]
+                    if len(same_airports) >= TOP_K_RESULTS:
+                        worst = max(same_airports, key=lambda x: label_price[x])
+                        if label_price[worst] <= price:
+                            continue
+                        state.remove(worst)
+                        if stats is not None:
+                            label_counts[ticket.destination] -= 1
+                    if not state:
+                        insort(arrivals.setdefault(ticket.destination, []), arrival_time)
+                        horizon = max(horizon, arrival_time + MAX_LAYOVER_TIME + 1)
+                    state.append(label)
+                    if stats is not None:
+                        label_counts[ticket.destination] = label_counts.get(ticket.destination, 0) + 1
 
-        results = []
+                label_arrival.append(arrival_time)
+                label_price.append(price)
+                label_flights.append(num_flights)
+                label_parent.append(parent)
+                label_ticket.append(ticket)
+                label_visited.append(visited)
+                if stats is not None:
+                    stats.heap_pushes += 1
+
+        tickets = []
+        with self._timing(stats, 'backtrack_time'):
+            for _, label in results[:TOP_K_RESULTS]:
+                path = []
+                while label != -1:
+                    path.append(label_ticket[label])
+                    label = label_parent[label]
+                path.reverse()
+                tickets.append(self._merge_ticket(path))
+
+        return tickets
+
+    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Uses the connection scan algorithm to find and return the `TOP_K_RESULTS` flights with the shortest flight
+        duration. The scan stops as soon as the remaining connections depart after the `TOP_K_RESULTS`-th arrival.
+
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=False, budget=budget, stats=stats)
+
+    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Uses the connection scan algorithm to find and return the `TOP_K_RESULTS` flights with the cheapest ticket
+        price. Unlike search_shortest_flight, this scans every connection departing within the week.
+
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=True, budget=budget, stats=stats)
 
-        # backtracking process
-        for i in range(len(distance[destination])):
-            path = []
-            now_pos = destination
-            prev_tuple: tuple[Optional[Ticket], int] = (None, i)
-            while now_pos != source:
-                prev_tuple = previous[now_pos][prev_tuple[1]]
-                path.append(prev_tuple[0])
-                now_pos = prev_tuple[0].origin.iata
-
-            assert now_pos == source
-            path.reverse()
-            results.append(self._merge_ticket(path))
+
+class RaptorFlightSearcher(AbstractFlightSearcher):
+    """Use a round-based search, in the style of RAPTOR, to find flight paths with a bounded number of flights.
+
+    Round k holds the ways of reaching each airport with exactly k flights. Since every ticket takes at least one
+    flight, round k only depends on earlier rounds, so the rounds are computed in order without a priority queue and
+    round `MAX_LAYOVER` is the last one. A single run gives the best flight paths for every number of stops, sorted by
+    both duration and price.
+    """
+
+    def __init__(self, flight_network: Network) -> None:
+        """Initialize a flight network for raptor flight searcher.
+        """
+        AbstractFlightSearcher.__init__(self, flight_network)
+
+    def _run_rounds(self, source: Airport, destination: Airport, departure_time: int,
+                    budget: Optional[SearchBudget] = None,
+                    stats: Optional[SearchStats] = None) -> list[list[tuple[int, float, Ticket, Optional[tuple]]]]:
+        """Return, for each k from 0 to `MAX_LAYOVER`, the labels reaching destination with exactly k flights when
+        departing from source on the same day as departure_time (in minutes since Monday 00:00).
+
+        A label is a tuple (arrival_time, price, ticket, previous_label), where arrival_time is counted from Monday
+        00:00 of the departure week and previous_label is None for the first ticket. For every airport, arrival time
+        and set of airports visited, at most `TOP_K_RESULTS` of the cheapest labels are kept, since all of them can
+        continue with exactly the same tickets. The set of airports visited also fixes the round of the labels.
+
+        budget is charged for every label expanded. If it runs out, the labels reaching destination so far are returned.
+        The work of the search is counted in stats, unless it is None.
+        """
+        first_day = departure_time - departure_time % MINUTES_PER_DAY
+        min_flights = self._landmark_distances(destination, 'flights')
+        # rounds[k][(airport, arrival_time, visited)] holds the labels of round k at each state
+        rounds: list[dict[tuple[Airport, int, frozenset[Airport]], list[tuple]]] = [{} for _ in range(MAX_LAYOVER + 1)]
+        results: list[list[tuple]] = [[] for _ in range(MAX_LAYOVER + 1)]
+
+        # Round 0 is the passenger waiting at the source, which may take any ticket departing on the query day.
+        for k in range(MAX_LAYOVER + 1):
+            if k == 0:
+                expansions = [(source, first_day, first_day + MINUTES_PER_DAY - 1, None, frozenset([source]))]
+            else:
+                expansions = [(airport, arrival + MIN_LAYOVER_TIME, arrival + MAX_LAYOVER_TIME, label, visited)
+                              for (airport, arrival, visited), labels in rounds[k].items() for label in labels]
+
+            for airport, earliest, latest, label, visited in self._within_budget(expansions, budget):
+                tickets = airport.get_tickets_departing(earliest, latest)
+                if stats is not None:
+                    self._count_expansion(stats, airport, tickets, k == 0)
+                for ticket in tickets:
+                    num_flights = k + len(ticket.flights)
+                    if num_flights > MAX_LAYOVER or self._out_of_reach(min_flights, ticket.destination, num_flights):
+                        if stats is not None:
+                            stats.rejected_stops += 1
+                        continue
+                    if any(flight.destination in visited for flight in ticket.flights):
+                        continue
+
+                    # The departure time counted from the start of the week of `earliest`.
+                    curr_time = earliest + (ticket.departure_minute - earliest) % MINUTES_PER_WEEK
+                    arrival_time = curr_time + ticket.arrival_minute - ticket.departure_minute
+                    new_label = (arrival_time, ticket.price + (label[1] if label is not None else 0.0), ticket, label)
+                    if ticket.destination == destination:
+                        results[num_flights].append(new_label)
+                        if stats is not None:
+                            stats.heap_pushes += 1
+                        continue
+
+                    next_visited = visited.union(flight.destination for flight in ticket.flights)
+                    state = rounds[num_flights].setdefault((ticket.destination, arrival_time, next_visited), [])
+                    if len(state) >= TOP_K_RESULTS:
+                        worst = max(state, key=lambda x: x[1])
+                        if worst[1] <= new_label[1]:
+                            continue
+                        state.remove(worst)
+                    state.append(new_label)
+                    if stats is not None:
+                        stats.heap_pushes += 1
 
         return results
 
-    def search_cheapest_flight(self, source: str, destination: str, departure_time: datetime) -> list[Ticket]:
-        """Uses dijkstra algorithm to find and return the `TOP_K_RESULTS` flights with the cheapest ticket price.
+    def _to_ticket(self, label: tuple[int, float, Ticket, Optional[tuple]]) -> Ticket:
+        """Return the ticket of the flight path ending at label.
+        """
+        path = []
+        while label is not None:
+            path.append(label[2])
+            label = label[3]
+        path.reverse()
+        return self._merge_ticket(path)
+
+    def search_by_stops(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                        budget: Optional[SearchBudget] = None,
+                        stats: Optional[SearchStats] = None) -> tuple[list[list[Ticket]], list[list[Ticket]]]:
+        """Return a tuple of two lists computed from a single run. In the first list, the k-th element contains the
+        `TOP_K_RESULTS` flights with at most k stops and the shortest flight duration. The second list is the same,
+        but by cheapest ticket price. If budget runs out, the lists hold the flights found so far. If stats is given,
+        the counts and times of the search are added to it.
 
         Preconditions:
             - source in self.flight_network.airports
             - destination in self.flight_network.airports
             - departure_time.hour == 0 and departure_time.minute == 0
         """
-        dep_time_simpl = DayHourMinute(departure_time.isoweekday(), departure_time.hour, departure_time.minute)
-        pq: PriorityQueue[tuple[float, IATACode, Optional[Ticket], int, int]] = PriorityQueue()
+        with self._timing(stats, 'wall_time'):
+            results = self._run_rounds(self.flight_network.airports[source],
+                                       self.flight_network.airports[destination],
+                                       self._get_minute_of_week(departure_time), budget, stats)
+            by_duration, by_price = [], []
+            labels = []
+            with self._timing(stats, 'backtrack_time'):
+                for k in range(1, MAX_LAYOVER + 1):
+                    labels.extend(results[k])
+                    labels.sort(key=lambda x: (x[0], x[1]))
+                    by_duration.append([self._to_ticket(label) for label in labels[:TOP_K_RESULTS]])
+                    by_price.append([self._to_ticket(label) for label in sorted(labels, key=lambda x: (x[1], x[0]))
+                                     [:TOP_K_RESULTS]])
+            return by_duration, by_price
 
-        # The tuple in pq is (curr_price, curr_pos, prev_ticket, prev_k, num_flights)
-        # curr_price denote the price until of ticket to go from source to curr_pos
-        # curr_pos denote the current position after doing some flights
-        # prev_ticket denote the ticket bought immediately before this ticket, is useful for backtracking
-        # prev_k denote the number of optimal flights found, note that we only need up to `TOP_K_RESULTS` flights
-        # num_flights denote the number of flights that have been done, which reflects the number of layover.
-        pq.put((0.0, source, None, 0, 0))
-        cheapest: dict[IATACode, list[float]] = {iata: [] for iata in self.flight_network.airports}
-        previous: dict[IATACode, list[tuple[Ticket, int]]] = {iata: [] for iata in self.flight_network.airports}
+    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Runs every round and returns the `TOP_K_RESULTS` flights with the shortest flight duration.
 
-        while not pq.empty():
-            curr_price, curr_pos, prev_ticket, prev_k, num_flights = pq.get()
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            results = self._run_rounds(self.flight_network.airports[source],
+                                       self.flight_network.airports[destination],
+                                       self._get_minute_of_week(departure_time), budget, stats)
+            labels = sorted((label for labels in results for label in labels), key=lambda x: (x[0], x[1]))
+            with self._timing(stats, 'backtrack_time'):
+                return [self._to_ticket(label) for label in labels[:TOP_K_RESULTS]]
 
-            if len(cheapest[curr_pos]) == TOP_K_RESULTS or num_flights > MAX_LAYOVER:
-                continue
-            cheapest[curr_pos].append(curr_price)
+    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Runs every round and returns the `TOP_K_RESULTS` flights with the cheapest ticket price.
 
-            # this is later used for backtracking
-            if prev_ticket is not None:
-                previous[curr_pos].append((prev_ticket, prev_k))
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            results = self._run_rounds(self.flight_network.airports[source],
+                                       self.flight_network.airports[destination],
+                                       self._get_minute_of_week(departure_time), budget, stats)
+            labels = sorted((label for labels in results for label in labels), key=lambda x: (x[1], x[0]))
+            with self._timing(stats, 'backtrack_time'):
+                return [self._to_ticket(label) for label in labels[:TOP_K_RESULTS]]
 
-            for ticket in self.flight_network.airports[curr_pos].tickets:
-                # If this is not the first flight, we allow layover time between [MIN_LAYOVER_TIME, MAX_LAYOVER_TIME]
-                if prev_ticket is not None:
-                    time_to_depart = self._minute_diff(prev_ticket.arrival_time, ticket.departure_time)
-                    if not MIN_LAYOVER_TIME <= time_to_depart <= MAX_LAYOVER_TIME:
+
+class ParetoFlightSearcher(RaptorFlightSearcher):
+    """Use a round-based search to find the flight paths that are not dominated in arrival time, price and number of
+    flights, so that the same set of tickets can be sorted by either duration or price.
+
+    A flight path dominates another if it arrives no later, costs no more and takes no more flights. Two labels at the
+    same airport are only compared when they arrive at the same time, since an earlier arrival may miss a connection
+    because of `MAX_LAYOVER_TIME`, and when the airports visited by the dominating one are among those visited by the
+    other, since a flight path may not visit an airport twice. Every loop-free flight path of the front is then found.
+
+    The searches by duration and by price return tickets of the front only, so they return fewer than `TOP_K_RESULTS`
+    tickets when the front is smaller, even if there are more tickets.
+
+    Instance Attributes:
+        - flight_network: The network used to look-up flights.
+        - last_search: The last query, as (source, destination, minute of the week), and its non-dominated labels, as
+        returned by _pareto_front.
+    """
+    last_search: Optional[tuple[tuple[IATACode, IATACode, int], list[tuple]]]
+
+    def __init__(self, flight_network: Network) -> None:
+        """Initialize a flight network for pareto flight searcher.
+        """
+        RaptorFlightSearcher.__init__(self, flight_network)
+        self.last_search = None
+
+    def _run_pareto_rounds(self, source: Airport, destination: Airport, departure_time: int,
+                           budget: Optional[SearchBudget] = None,
+                           stats: Optional[SearchStats] = None) -> list[tuple[int, float, int, tuple]]:
+        """Return the non-dominated labels reaching destination when departing from source on the same day as
+        departure_time (in minutes since Monday 00:00), as tuples (arrival_time, price, num_flights, label).
+
+        Labels are the same as in RaptorFlightSearcher._run_rounds. Before round k is expanded, a label of round k is
+        dropped if a label expanded in round k or an earlier round reaches the same airport at the same time for no more
+        money after visiting only airports it visited too, or if a label at the destination already dominates it.
+
+        budget is charged for every label expanded. If it runs out, the labels reaching destination so far that are not
+        dominated by one another are returned. The work of the search is counted in stats, unless it is None.
+        """
+        first_day = departure_time - departure_time % MINUTES_PER_DAY
+        min_flights = self._landmark_distances(destination, 'flights')
+        rounds: list[dict[tuple[Airport, int], list[tuple]]] = [{} for _ in range(MAX_LAYOVER + 1)]
+        # The price and visited airports of the labels expanded at each state so far
+        expanded: dict[tuple[Airport, int], list[tuple[float, frozenset[Airport]]]] = {}
+        front: list[tuple[int, float, int, tuple]] = []
+
+        for k in range(MAX_LAYOVER + 1):
+            if k == 0:
+                expansions = [(source, first_day, first_day + MINUTES_PER_DAY - 1, None, frozenset([source]))]
+            else:
+                expansions = []
+                for state, labels in rounds[k].items():
+                    done = expanded.setdefault(state, [])
+                    for label in sorted(labels, key=lambda x: x[1]):
+                        visited = self._visited(label, source)
+                        if any(price <= label[1] and other <= visited for price, other in done) or \
+                                self._is_dominated((label[0], label[1], k), front):
+                            continue
+                        done.append((label[1], visited))
+                        expansions.append((state[0], label[0] + MIN_LAYOVER_TIME, label[0] + MAX_LAYOVER_TIME, label,
+                                           visited))
+
+            for airport, earliest, latest, label, visited in self._within_budget(expansions, budget):
+                tickets = airport.get_tickets_departing(earliest, latest)
+                if stats is not None:
+                    self._count_expansion(stats, airport, tickets, k == 0)
+                for ticket in tickets:
+                    num_flights = k + len(ticket.flights)
+                    if num_flights > MAX_LAYOVER or self._out_of_reach(min_flights, ticket.destination, num_flights):
+                        if stats is not None:
+                            stats.rejected_stops += 1
                         continue
-                # If this is the first flight, we force the first ticket to be on the same day as the query.
-                elif prev_ticket is None and ticket.departure_time.day != dep_time_simpl.day:
+                    if any(flight.destination in visited for flight in ticket.flights):
+                        continue
+
+                    curr_time = earliest + (ticket.departure_minute - earliest) % MINUTES_PER_WEEK
+                    arrival_time = curr_time + ticket.arrival_minute - ticket.departure_minute
+                    new_label = (arrival_time, ticket.price + (label[1] if label is not None else 0.0), ticket, label)
+                    criteria = (arrival_time, new_label[1], num_flights)
+                    if self._is_dominated(criteria, front):
+                        continue
+
+                    if ticket.destination == destination:
+                        front = [other for other in front if not self._dominates(criteria, other)]
+                        front.append(criteria + (new_label,))
+                    else:
+                        rounds[num_flights].setdefault((ticket.destination, arrival_time), []).append(new_label)
+                    if stats is not None:
+                        stats.heap_pushes += 1
+
+        return front
+
+    def _visited(self, label: tuple[int, float, Ticket, Optional[tuple]], source: Airport) -> frozenset[Airport]:
+        """Return the airports visited by the flight path from source ending at label.
+        """
+        visited = {source}
+        while label is not None:
+            visited.update(flight.destination for flight in label[2].flights)
+            label = label[3]
+        return frozenset(visited)
+
+    def _dominates(self, criteria: tuple[int, float, int], other: tuple) -> bool:
+        """Return whether the (arrival_time, price, num_flights) in criteria are all at most those of other.
+        """
+        return criteria[0] <= other[0] and criteria[1] <= other[1] and criteria[2] <= other[2]
+
+    def _is_dominated(self, criteria: tuple[int, float, int], front: list[tuple]) -> bool:
+        """Return whether some label in front dominates the (arrival_time, price, num_flights) in criteria.
+        """
+        return any(self._dominates(other, criteria) for other in front)
+
+    def _pareto_front(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                      budget: Optional[SearchBudget] = None, stats: Optional[SearchStats] = None) -> list[tuple]:
+        """Return the non-dominated labels reaching destination, as returned by _run_pareto_rounds, sorted in
+        non-decreasing arrival time, then price, then number of flights.
+
+        The labels of the last query are kept, so asking for the same query again does not search again. The labels of
+        a search that ran out of budget are not kept.
+        """
+        query = (source, destination, self._get_minute_of_week(departure_time))
+        last_search = self.last_search
+        if last_search is not None and last_search[0] == query:
+            return list(last_search[1])
+
+        front = self._run_pareto_rounds(self.flight_network.airports[source],
+                                        self.flight_network.airports[destination],
+                                        query[2], budget, stats)
+        front.sort(key=lambda x: (x[0], x[1], x[2]))
+        if budget is None or budget.optimal:
+            self.last_search = (query, front)
+        return list(front)
+
+    def search_pareto_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                             budget: Optional[SearchBudget] = None,
+                             stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Return every ticket from source to destination departing on the same day as departure_time that no other
+        ticket beats in arrival time, price and number of flights at once, sorted in non-decreasing flight duration.
+        If budget runs out, the tickets found so far that do not beat one another are returned. If stats is given, the
+        counts and times of the search are added to it.
+
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            front = self._pareto_front(source, destination, departure_time, budget, stats)
+            with self._timing(stats, 'backtrack_time'):
+                return [self._to_ticket(criteria[3]) for criteria in front]
+
+    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Returns the `TOP_K_RESULTS` non-dominated flights with the shortest flight duration, or every
+        non-dominated flight if there are fewer.
+
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            front = self._pareto_front(source, destination, departure_time, budget, stats)
+            with self._timing(stats, 'backtrack_time'):
+                return [self._to_ticket(criteria[3]) for criteria in front[:TOP_K_RESULTS]]
+
+    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Returns the `TOP_K_RESULTS` non-dominated flights with the cheapest ticket price, or every non-dominated
+        flight if there are fewer.
+
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            front = self._pareto_front(source, destination, departure_time, budget, stats)
+            front.sort(key=lambda x: x[1])
+            with self._timing(stats, 'backtrack_time'):
+                return [self._to_ticket(criteria[3]) for criteria in front[:TOP_K_RESULTS]]
+
+
+class KShortestFlightSearcher(AbstractFlightSearcher):
+    """Use Yen's algorithm to find the k best flight paths that visit each airport at most once.
+
+    The best path is found by a dijkstra search over (airport, arrival time, number of flights, visited airports)
+    states, which is exact with layover windows since two ways of reaching the same state can continue with the same
+    tickets. The visited airports are part of a state, since a cheaper path that flew through an airport cannot go on
+    to it where a dearer path that did not can. Each further path deviates from an earlier one after a shared prefix.
+    With Lawler's improvement, only the prefixes at or after the point where a path deviated from its parent are
+    searched again, and the tickets already used after each prefix are kept in a dictionary keyed by the prefix, so
+    large k stays cheap.
+
+    Instance Attributes:
+        - flight_network: The network used to look-up flights.
+        - k: The number of flight paths returned by each search.
+
+    Representation Invariants:
+        - self.k >= 1
+    """
+    k: int
+
+    def __init__(self, flight_network: Network, k: int = TOP_K_RESULTS) -> None:
+        """Initialize a flight network for k-shortest flight searcher, returning k flight paths per search.
+
+        Preconditions:
+            - k >= 1
+        """
+        AbstractFlightSearcher.__init__(self, flight_network)
+        self.k = k
+
+    def _spur_search(self, spur: Airport, destination: Airport, start: tuple[int, float, int], first_day: Optional[int],
+                     visited: set[Airport], banned: set[Ticket], by_price: bool,
+                     budget: Optional[SearchBudget] = None,
+                     stats: Optional[SearchStats] = None) -> Optional[list[tuple[Ticket, tuple[int, float, int]]]]:
+        """Return the best continuation from spur to destination, as a list of tickets each with the (arrival_time,
+        price, num_flights) of the flight path after it, or None if destination cannot be reached. budget is charged
+        for every state popped, and None is also returned if it runs out. The work of the search is counted in stats,
+        unless it is None.
+
+        The flight path so far ends at spur with the (arrival_time, price, num_flights) in start and visits the
+        airports in visited. If first_day is not None, the path is still empty and the first ticket departs on the day
+        starting at first_day. The first ticket may not be one of banned. Times are in minutes since Monday 00:00 of
+        the departure week.
+        """
+        # The entries of heap are (cost, sequence number, state), and each state is stored in the lists below.
+        heap: list[tuple[float, int, int]] = [(0.0, 0, 0)]
+        state_airport = [spur]
+        state_criteria = [start]
+        state_parent = [-1]
+        state_ticket: list[Optional[Ticket]] = [None]
+        settled = set()
+        min_flights = self._landmark_distances(destination, 'flights')
+
+        while heap:
+            if budget is not None:
+                try:
+                    budget.charge()
+                except SearchBudgetExhausted:
+                    return None
+            _, _, state = heappop(heap)
+            airport = state_airport[state]
+            arrival_time, price, num_flights = state_criteria[state]
+            if airport == destination:
+                path = []
+                while state != 0:
+                    path.append((state_ticket[state], state_criteria[state]))
+                    state = state_parent[state]
+                path.reverse()
+                return path
+
+            path_visited = set(visited)
+            parent = state
+            while parent != 0:
+                path_visited.update(flight.destination for flight in state_ticket[parent].flights)
+                parent = state_parent[parent]
+            key = (airport, arrival_time, num_flights, frozenset(path_visited))
+            if key in settled:
+                continue
+            settled.add(key)
+
+            if state == 0 and first_day is not None:
+                earliest, latest = first_day, first_day + MINUTES_PER_DAY - 1
+            else:
+                earliest, latest = arrival_time + MIN_LAYOVER_TIME, arrival_time + MAX_LAYOVER_TIME
+
+            tickets = airport.get_tickets_departing(earliest, latest)
+            if stats is not None:
+                self._count_expansion(stats, airport, tickets, state == 0 and first_day is not None)
+            for ticket in tickets:
+                next_flights = num_flights + len(ticket.flights)
+                if next_flights > MAX_LAYOVER or self._out_of_reach(min_flights, ticket.destination, next_flights):
+                    if stats is not None:
+                        stats.rejected_stops += 1
+                    continue
+                if (state == 0 and ticket in banned) or \
+                        any(flight.destination in path_visited for flight in ticket.flights):
                     continue
+                curr_time = earliest + (ticket.departure_minute - earliest) % MINUTES_PER_WEEK
+                criteria = (curr_time + ticket.arrival_minute - ticket.departure_minute, price + ticket.price,
+                            next_flights)
+                state_airport.append(ticket.destination)
+                state_criteria.append(criteria)
+                state_parent.append(state)
+                state_ticket.append(ticket)
+                heappush(heap, (criteria[1] if by_price else criteria[0], len(state_ticket) - 1,
+                                len(state_ticket) - 1))
+                if stats is not None:
+                    stats.heap_pushes += 1
 
-                pq.put((curr_price + ticket.price,
-                        ticket.destination.iata, ticket,
-                        len(cheapest[curr_pos]) - 1, num_flights + len(ticket.flights)))
+        return None
 
-        results = []
+    def _search(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                by_price: bool, budget: Optional[SearchBudget] = None,
+                stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Return the k best flight paths from source to destination departing on the same day as departure_time,
+        sorted by arrival time or, if by_price is True, by price.
 
-        # backtracking process
-        for i in range(len(cheapest[destination])):
-            path = []
-            now_pos = destination
-            prev_tuple: tuple[Optional[Ticket], int] = (None, i)
-            while now_pos != source:
-                prev_tuple = previous[now_pos][prev_tuple[1]]
-                path.append(prev_tuple[0])
-                now_pos = prev_tuple[0].origin.iata
-
-            assert now_pos == source
-            path.reverse()
-            results.append(self._merge_ticket(path))
+        Once budget runs out, no spur search finds a path any more, so the paths already found are returned together
+        with the best candidates left, up to k paths. The work of the search is counted in stats, unless it is None.
+        """
+        source_airport = self.flight_network.airports[source]
+        destination_airport = self.flight_network.airports[destination]
+        dep_time_simpl = self._get_minute_of_week(departure_time)
+        first_day = dep_time_simpl - dep_time_simpl % MINUTES_PER_DAY
+        origin_criteria = (first_day, 0.0, 0)
 
-        return results
+        best = self._spur_search(source_airport, destination_airport, origin_criteria, first_day, {source_airport},
+                                 set(), by_price, budget, stats)
+        if best is None:
+            return []
+
+        # Each path is a tuple of (ticket, criteria) steps. The candidates are (cost, sequence number, path, deviation).
+        found: list[tuple] = []
+        candidates: list[tuple[float, int, tuple, int]] = [(0.0, 0, tuple(best), 0)]
+        seen = {tuple(ticket for ticket, _ in best)}
+        used_after: dict[tuple[Ticket, ...], set[Ticket]] = {}
+
+        while candidates and len(found) < self.k:
+            _, _, path, deviation = heappop(candidates)
+            found.append(path)
+            tickets = tuple(ticket for ticket, _ in path)
+            for i in range(len(path)):
+                used_after.setdefault(tickets[:i], set()).add(tickets[i])
+
+            for i in range(deviation, len(path)):
+                root = path[:i]
+                spur = root[-1][0].destination if root else source_airport
+                visited = {source_airport}
+                for ticket, _ in root:
+                    visited.update(flight.destination for flight in ticket.flights)
+
+                spur_path = self._spur_search(spur, destination_airport, root[-1][1] if root else origin_criteria,
+                                              None if root else first_day, visited, used_after[tickets[:i]], by_price,
+                                              budget, stats)
+                if spur_path is None:
+                    continue
+                candidate = root + tuple(spur_path)
+                candidate_tickets = tuple(ticket for ticket, _ in candidate)
+                if candidate_tickets in seen:
+                    continue
+                seen.add(candidate_tickets)
+                arrival_time, price, _ = candidate[-1][1]
+                heappush(candidates, (price if by_price else arrival_time, len(seen), candidate, i))
+                if stats is not None:
+                    stats.heap_pushes += 1
+
+        found.sort(key=lambda x: (x[-1][1][1], x[-1][1][0]) if by_price else (x[-1][1][0], x[-1][1][1]))
+        with self._timing(stats, 'backtrack_time'):
+            return [self._merge_ticket([ticket for ticket, _ in path]) for path in found]
+
+    def search_shortest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Uses Yen's algorithm to find and return the k flights with the shortest flight duration.
+
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=False, budget=budget, stats=stats)
+
+    def search_cheapest_flight(self, source: IATACode, destination: IATACode, departure_time: datetime,
+                               budget: Optional[SearchBudget] = None,
+                               stats: Optional[SearchStats] = None) -> list[Ticket]:
+        """Uses Yen's algorithm to find and return the k flights with the cheapest ticket price.
+
+        Preconditions:
+            - source in self.flight_network.airports
+            - destination in self.flight_network.airports
+            - departure_time.hour == 0 and departure_time.minute == 0
+        """
+        with self._timing(stats, 'wall_time'):
+            return self._search(source, destination, departure_time, by_price=True, budget=budget, stats=stats)
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['network', 'datetime', 'queue'],
+        'extra-imports': ['network', 'landmark', 'datetime', 'bisect', 'heapq', 'collections', 'threading', 'time',
+                          'contextlib'],
         'disable': ['unused-import', 'too-many-branches', 'extra-imports', 'too-many-locals', 'too-many-nested-blocks'],
         'allowed-io': []
     })
@@ -0,0 +1,160 @@
+""" landmark.py """
+from __future__ import annotations
+
+import json
+from heapq import heappush, heappop
+
+from python_ta.contracts import check_contracts
+
+from network import IATACode, Network
+
+INDEX_VERSION = 1
+METRICS = ('flights', 'price', 'duration')
+
+
+# @check_contracts
+class PrunedLandmarkLabelling:
+    """
+    A 2-hop label index over the airport graph, built by pruned landmark labelling (Akiba et al.).
+
+    The airport graph joins two airports if a ticket goes from one to the other, ignoring departure times and layovers.
+    Each edge has three weights, one per metric: the least number of flights, the cheapest price and the shortest block
+    time (arrival minus departure, in minutes) of the tickets between the two airports. For each metric, every airport
+    stores the distance to and from a few landmark airports, so that the distance between two airports in the airport
+    graph is the smallest sum of distances through a landmark common to both. This gives whether an airport can be
+    reached within a number of flights, and lower bounds on the price and block time of any flight path between two
+    airports.
+
+    Instance Attributes:
+        - out_labels: For each metric, a dictionary that maps an airport's IATA code to the distance from that airport
+        to each of its landmarks.
+        - in_labels: For each metric, a dictionary that maps an airport's IATA code to the distance from each of its
+        landmarks to that airport.
+
+    Representation Invariants:
+        - set(self.out_labels) == set(METRICS) and set(self.in_labels) == set(METRICS)
+    """
+    out_labels: dict[str, dict[IATACode, dict[IATACode, float]]]
+    in_labels: dict[str, dict[IATACode, dict[IATACode, float]]]
+
+    def __init__(self, out_labels: dict[str, dict[IATACode, dict[IATACode, float]]],
+                 in_labels: dict[str, dict[IATACode, dict[IATACode, float]]]) -> None:
+        """Initialize an index with the given labels.
+        """
+        self.out_labels = out_labels
+        self.in_labels = in_labels
+
+    @classmethod
+    def from_network(cls, flight_network: Network) -> PrunedLandmarkLabelling:
+        """Build and return the index of the airport graph of flight_network.
+
+        Airports are taken as landmarks in non-increasing order of the number of airports they are joined to, so that
+        the hubs, which lie on most shortest paths, are labelled first and prune the later searches the most.
+        """
+        edges: dict[IATACode, dict[IATACode, tuple[float, float, float]]] = {}
+        for iata in flight_network.airports:
+            edges[iata] = {}
+        for origin, destination, departure, arrival, price, num_flights in flight_network.ticket_summaries():
+            weights = (num_flights, price, arrival - departure)
+            previous = edges[origin.iata].get(destination.iata, weights)
+            edges[origin.iata][destination.iata] = tuple(min(x, y) for x, y in zip(previous, weights))
+
+        reverse_edges: dict[IATACode, dict[IATACode, tuple[float, float, float]]] = {iata: {} for iata in edges}
+        for iata, neighbours in edges.items():
+            for neighbour, weights in neighbours.items():
+                reverse_edges[neighbour][iata] = weights
+
+        order = sorted(edges, key=lambda x: (-(len(edges[x]) + len(reverse_edges[x])), x))
+        out_labels = {metric: {iata: {} for iata in edges} for metric in METRICS}
+        in_labels = {metric: {iata: {} for iata in edges} for metric in METRICS}
+        index = cls(out_labels, in_labels)
+
+        for i, metric in enumerate(METRICS):
+            for landmark in order:
+                # Labels of landmark's descendants, then of its ancestors.
+                index._pruned_dijkstra(landmark, metric, i, edges, forward=True)
+                index._pruned_dijkstra(landmark, metric, i, reverse_edges, forward=False)
+
+        return index
+
+    def _pruned_dijkstra(self, landmark: IATACode, metric: str, weight_index: int,
+                         edges: dict[IATACode, dict[IATACode, tuple[float, float, float]]], forward: bool) -> None:
+        """Run a dijkstra search from landmark over edges, labelling every airport reached with its distance from
+        landmark (or to landmark if forward is False). An airport whose distance is already answered by the labels of
+        earlier landmarks is neither labelled nor expanded.
+        """
+        labels = self.in_labels[metric] if forward else self.out_labels[metric]
+        heap: list[tuple[float, IATACode]] = [(0, landmark)]
+        done = set()
+        while heap:
+            distance, iata = heappop(heap)
+            if iata in done:
+                continue
+            done.add(iata)
+
+            known = self.distance(landmark, iata, metric) if forward else self.distance(iata, landmark, metric)
+            if known <= distance:
+                continue
+            labels[iata][landmark] = distance
+
+            for neighbour, weights in edges[iata].items():
+                if neighbour not in done:
+                    heappush(heap, (distance + weights[weight_index], neighbour))
+
+    def distance(self, source: IATACode, destination: IATACode, metric: str) -> float:
+        """Return the distance from source to destination in the airport graph for the given metric, or infinity if
+        destination cannot be reached from source.
+
+        Preconditions:
+            - metric in METRICS
+        """
+        out_label = self.out_labels[metric].get(source, {})
+        in_label = self.in_labels[metric].get(destination, {})
+        if len(in_label) < len(out_label):
+            out_label, in_label = in_label, out_label
+        return min((distance + in_label[landmark] for landmark, distance in out_label.items() if landmark in in_label),
+                   default=float('inf'))
+
+    def distances_to(self, destination: IATACode, metric: str) -> dict[IATACode, float]:
+        """Return the distance from every airport that can reach destination to destination, for the given metric.
+
+        Preconditions:
+            - metric in METRICS
+        """
+        distances = {}
+        for source in self.out_labels[metric]:
+            distance = self.distance(source, destination, metric)
+            if distance != float('inf'):
+                distances[source] = distance
+        return distances
+
+    def is_reachable(self, source: IATACode, destination: IATACode, max_flights: int) -> bool:
+        """Return whether destination can be reached from source with at most max_flights flights.
+        """
+        return self.distance(source, destination, 'flights') <= max_flights
+
+    def save(self, index_file: str) -> None:
+        """Write this index to index_file.
+        """
+        with open(index_file, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'out_labels': self.out_labels, 'in_labels': self.in_labels}, f)
+
+    @classmethod
+    def load(cls, index_file: str) -> PrunedLandmarkLabelling:
+        """Read and return the index written to index_file by save.
+        """
+        with open(index_file) as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError('Invalid landmark index file')
+        return cls(data['out_labels'], data['in_labels'])
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['network', 'json', 'heapq'],
+        'disable': ['unused-import', 'too-many-branches', 'extra-imports', 'too-many-locals', 'too-many-arguments'],
+        'allowed-io': ['PrunedLandmarkLabelling.save', 'PrunedLandmarkLabelling.load']
+    })
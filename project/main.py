@@ -1,7 +1,7 @@
 """The main file that will be run by the grader.
 """
 from __future__ import annotations
-from typing import Optional
+from typing import Iterable, Optional
 
 import os
 import sys
@@ -10,43 +10,87 @@ import subprocess
 import webbrowser
 from datetime import datetime, timedelta
 import requests
-from py7zr import SevenZipFile
+import polars as pl
 
 from python_ta.contracts import check_contracts
 
 from network import IATACode, DayHourMinute
 from network import MIN_LAYOVER_TIME, MAX_LAYOVER_TIME, MAX_LAYOVER, TOP_K_RESULTS
-from network import Network, Airport, Flight, Ticket
+from network import MINUTES_PER_DAY, MINUTES_PER_WEEK
+from network import Network, ColumnarNetwork, FlightInterner, Airport, Flight, Ticket
 from flightsearcher import AbstractFlightSearcher, NaiveFlightSearcher, DijkstraFlightSearcher
+from flightsearcher import ConnectionScanFlightSearcher, RaptorFlightSearcher, ParetoFlightSearcher
+from flightsearcher import KShortestFlightSearcher, AStarFlightSearcher
+from landmark import PrunedLandmarkLabelling
 
 sys.path.append(os.path.join(os.getcwd(), '..', 'data'))
 
 import airport_data_cleaner
+import archive_reader
 import flight_data_cleaner
 import testcase_generator
 
 ALWAYS_NO = False
 
+SEGMENT_COLUMNS = ['segmentsDepartureAirportCode', 'segmentsArrivalAirportCode', 'segmentsAirlineName',
+                   'segmentsDepartureWeekday', 'segmentsDepartureTimeOfDay', 'segmentsArrivalWeekday',
+                   'segmentsArrivalTimeOfDay']
+ITINERARY_DATATYPES = {
+    'legId': pl.Utf8, 'isNonStop': pl.Boolean, 'totalFare': pl.Float64,
+    'startingAirport': pl.Utf8, 'destinationAirport': pl.Utf8, **{column: pl.Utf8 for column in SEGMENT_COLUMNS}
+}
+
+
+def read_csv_file(airport_file: str, flight_file: str) -> Network:
+    """
+    Read and load the CSV file into a network. A flight that appears in several itineraries is created once and shared
+    by their tickets.
+
+    Preconditions:
+        - airport_file.endswith('.csv')
+        - flight_file.endswith('.csv')
 
-def unpack_csv() -> None:
-    """Unpack /data/clean_no_dupe_itineraries.7z to /data/clean_no_dupe_itineraries.csv
     """
-    prev_path = os.getcwd()
-    os.chdir(os.path.join(os.getcwd(), '..', 'data'))
-    with SevenZipFile('clean_no_dupe_itineraries.7z', mode='r') as z:
-        z.extractall()
+    with open(flight_file) as csv_file:
+        reader = csv.DictReader(csv_file)
+        header = {
+            'legId',
+            'isNonStop',
+            'totalFare',
+            'segmentsDepartureAirportCode',
+            'segmentsArrivalAirportCode',
+            'segmentsAirlineName',
+            'segmentsDepartureWeekday',
+            'segmentsDepartureTimeOfDay',
+            'segmentsArrivalWeekday',
+            'segmentsArrivalTimeOfDay',
+            'startingAirport',
+            'destinationAirport'
+        }
+        assert set(reader.fieldnames) == header
 
-    os.chdir(prev_path)
+        return read_itineraries(airport_file, reader)
 
 
-def read_csv_file(airport_file: str, flight_file: str) -> Network:
+def read_archive(airport_file: str, archive_file: str, member: str) -> Network:
     """
-    Read and load the CSV file into a network
+    Read and load the airport CSV file and the itinerary CSV file member of the 7z archive archive_file into a network,
+    decompressing the member as it is read instead of extracting it to disk first.
 
     Preconditions:
         - airport_file.endswith('.csv')
-        - flight_file.endswith('.csv')
+        - member.endswith('.csv')
+    """
+    return read_itineraries(airport_file, archive_reader.stream_csv_rows(archive_file, member))
+
+
+def read_itineraries(airport_file: str, rows: Iterable[dict[str, str]]) -> Network:
+    """
+    Read and load the airport CSV file and the given itinerary rows into a network, where each row maps the columns of
+    clean_no_dupe_itineraries.csv to its values. The rows are read one at a time, so they can be streamed.
 
+    Preconditions:
+        - airport_file.endswith('.csv')
     """
     res_network = Network()
 
@@ -67,88 +111,274 @@ def read_csv_file(airport_file: str, flight_file: str) -> Network:
             )
             res_network.add_airport(airport)
 
-    with open(flight_file) as csv_file:
+    airport_ticket = {}  # dict[str, list[Ticket]]
+    interner = FlightInterner()  # shares each distinct flight between the tickets containing it
+    for row in rows:
+        flight_id = row['legId']
+        airline = row['segmentsAirlineName'].split('||')
+        price = float(row['totalFare'])
+
+        origin = res_network.get_airport_from_iata(row['startingAirport'])
+        destination = res_network.get_airport_from_iata(row['destinationAirport'])
+
+        departure = row['segmentsDepartureAirportCode'].split('||')
+        departure = [res_network.get_airport_from_iata(airport_d) for airport_d in departure]
+
+        departure_weekday = list(map(int, row['segmentsDepartureWeekday'].split('||')))
+        departure_timeday = row['segmentsDepartureTimeOfDay'].split('||')
+        departure_timeday = [tuple(map(int, timeday.split(':'))) for timeday in departure_timeday]
+
+        arrival = row['segmentsArrivalAirportCode'].split('||')
+        arrival = [res_network.get_airport_from_iata(airport_a) for airport_a in arrival]
+
+        arrival_weekday = list(map(int, row['segmentsArrivalWeekday'].split('||')))
+        arrival_timeday = row['segmentsArrivalTimeOfDay'].split('||')
+        arrival_timeday = [tuple(map(int, timeday.split(':'))) for timeday in arrival_timeday]
+
+        try:
+            assert origin == departure[0] and destination == arrival[-1]
+        except AssertionError:
+            raise ValueError('Invalid CSV File')
+        assert len(departure) == len(arrival)
+
+        flights = []
+        for i in range(len(departure)):
+            flight = interner.get_flight(
+                airline=airline[i],
+                flight_id=flight_id,
+                origin=departure[i],
+                destination=arrival[i],
+                departure_time=DayHourMinute(
+                    day=departure_weekday[i], hour=departure_timeday[i][0], minute=departure_timeday[i][1]
+                ),
+                arrival_time=DayHourMinute(arrival_weekday[i], arrival_timeday[i][0], arrival_timeday[i][1])
+            )
+            flights.append(flight)
+
+        ticket = Ticket(
+            origin=origin,
+            destination=destination,
+            departure_time=flights[0].departure_time,
+            arrival_time=flights[-1].arrival_time,
+            flights=flights,
+            price=price
+        )
+
+        if origin not in airport_ticket:
+            airport_ticket[origin] = []
+        airport_ticket[origin].append(ticket)
+
+    for origin in airport_ticket:
+        tickets = airport_ticket[origin]
+        tickets.sort(key=lambda x: x.departure_minute)
+
+        for ticket in tickets:
+            origin.add_ticket(ticket)
+
+    return res_network
+
+
+def read_polars_file(airport_file: str, flight_file: str) -> Network:
+    """
+    Read and load the airport CSV file and the itinerary CSV or Parquet file into a network, which is the same as the
+    network read by read_csv_file.
+
+    The itineraries are parsed in columnar form by polars: the '||' segment columns are split and exploded into one
+    row per flight, airport codes are mapped to airport ids with a join, and the tickets are ordered by origin and
+    departure time with a single sort. Repeated flights are merged by polars as well, so that only the distinct Flight
+    objects and the Ticket objects are built in Python.
+
+    Preconditions:
+        - airport_file.endswith('.csv')
+        - flight_file.endswith('.csv') or flight_file.endswith('.parquet')
+        - the itinerary file has the columns of clean_no_dupe_itineraries.csv
+    """
+    res_network = Network()
+    airports = pl.read_csv(airport_file, dtypes={'iata_code': pl.Utf8, 'name': pl.Utf8, 'municipality': pl.Utf8})
+    airport_list = [Airport(iata=iata, name=name, city=city) for iata, name, city in
+                    zip(airports.get_column('iata_code').to_list(), airports.get_column('name').to_list(),
+                        airports.get_column('municipality').to_list())]
+    for airport in airport_list:
+        res_network.add_airport(airport)
+    airport_ids = airports.lazy().with_row_count('airportId').select(['iata_code', 'airportId'])
+
+    if flight_file.endswith('.parquet'):
+        itineraries = pl.scan_parquet(source=flight_file).with_columns([
+            pl.col(column).cast(pl.Utf8) for column in SEGMENT_COLUMNS
+        ])
+    else:
+        itineraries = pl.scan_csv(source=flight_file, dtypes=ITINERARY_DATATYPES)
+    itineraries = itineraries.with_row_count('row')
+
+    legs = (
+        itineraries
+        .select(['row', 'legId'] + [pl.col(column).str.split('||') for column in SEGMENT_COLUMNS])
+        .explode(SEGMENT_COLUMNS)
+        .with_row_count('leg')
+        .join(airport_ids, left_on='segmentsDepartureAirportCode', right_on='iata_code', how='left')
+        .rename({'airportId': 'originId'})
+        .join(airport_ids, left_on='segmentsArrivalAirportCode', right_on='iata_code', how='left')
+        .rename({'airportId': 'destinationId'})
+        .select([
+            'leg', 'legId', 'segmentsAirlineName', 'originId', 'destinationId',
+            pl.col('segmentsDepartureWeekday').cast(pl.Int32),
+            pl.col('segmentsDepartureTimeOfDay').str.split(':').arr.get(0).cast(pl.Int32).alias('departureHour'),
+            pl.col('segmentsDepartureTimeOfDay').str.split(':').arr.get(1).cast(pl.Int32).alias('departureMinute'),
+            pl.col('segmentsArrivalWeekday').cast(pl.Int32),
+            pl.col('segmentsArrivalTimeOfDay').str.split(':').arr.get(0).cast(pl.Int32).alias('arrivalHour'),
+            pl.col('segmentsArrivalTimeOfDay').str.split(':').arr.get(1).cast(pl.Int32).alias('arrivalMinute'),
+        ])
+        .sort('leg')
+    )
+
+    # Each distinct flight keeps the flight id of the first itinerary it appears in, as in FlightInterner.
+    flight_key = legs.columns[2:]
+    distinct_flights = legs.unique(subset=flight_key, keep='first', maintain_order=True).with_row_count('flight')
+    leg_flights = (
+        legs.join(distinct_flights.select(flight_key + ['flight']), on=flight_key, how='left')
+        .sort('leg')
+        .select('flight')
+    ).collect().get_column('flight').to_list()
+    distinct_flights = distinct_flights.select(['legId'] + flight_key).collect()
+
+    departure_times = pl.col('segmentsDepartureTimeOfDay').str.split('||').arr.first().str.split(':')
+    tickets = (
+        itineraries
+        .select([
+            'row', 'totalFare', 'startingAirport', 'destinationAirport',
+            pl.col('segmentsDepartureAirportCode').str.split('||').arr.first().alias('firstOrigin'),
+            pl.col('segmentsArrivalAirportCode').str.split('||').arr.last().alias('lastDestination'),
+            pl.col('segmentsDepartureAirportCode').str.split('||').arr.lengths().alias('numFlights'),
+            ((pl.col('segmentsDepartureWeekday').str.split('||').arr.first().cast(pl.Int32) - 1) * MINUTES_PER_DAY
+             + departure_times.arr.get(0).cast(pl.Int32) * 60
+             + departure_times.arr.get(1).cast(pl.Int32)).alias('departureTime')
+        ])
+        .join(airport_ids, left_on='startingAirport', right_on='iata_code', how='left')
+        .sort('row')
+    ).collect()
+
+    if (tickets.get_column('startingAirport') != tickets.get_column('firstOrigin')).any() or \
+            (tickets.get_column('destinationAirport') != tickets.get_column('lastDestination')).any():
+        raise ValueError('Invalid CSV File')
+
+    interner = FlightInterner()
+    flight_columns = [distinct_flights.get_column(column).to_list() for column in distinct_flights.columns]
+    flights = [interner.get_flight(airline=airline, flight_id=flight_id, origin=airport_list[origin],
+                                   destination=airport_list[destination],
+                                   departure_time=(departure_day, departure_hour, departure_minute),
+                                   arrival_time=(arrival_day, arrival_hour, arrival_minute))
+               for flight_id, airline, origin, destination, departure_day, departure_hour, departure_minute,
+               arrival_day, arrival_hour, arrival_minute in zip(*flight_columns)]
+
+    ticket_list = []
+    start = 0
+    for num_flights, price in zip(tickets.get_column('numFlights').to_list(),
+                                  tickets.get_column('totalFare').to_list()):
+        ticket_flights = [flights[flight] for flight in leg_flights[start:start + num_flights]]
+        start += num_flights
+        ticket_list.append(Ticket(origin=ticket_flights[0].origin,
+                                  destination=ticket_flights[-1].destination,
+                                  departure_time=ticket_flights[0].departure_time,
+                                  arrival_time=ticket_flights[-1].arrival_time,
+                                  flights=ticket_flights,
+                                  price=price))
+
+    for row in tickets.sort(['airportId', 'departureTime', 'row']).get_column('row').to_list():
+        ticket_list[row].origin.add_ticket(ticket_list[row])
+
+    return res_network
+
+
+def read_columnar_csv_file(airport_file: str, flight_file: str) -> ColumnarNetwork:
+    """
+    Read and load the CSV file into a columnar network, which holds the same tickets as read_csv_file but takes a
+    fraction of the memory.
+
+    Preconditions:
+        - airport_file.endswith('.csv')
+        - flight_file.endswith('.csv')
+    """
+    res_network = ColumnarNetwork()
+
+    with open(airport_file) as csv_file:
         reader = csv.DictReader(csv_file)
-        header = {
-            'legId',
-            'isNonStop',
-            'totalFare',
-            'segmentsDepartureAirportCode',
-            'segmentsArrivalAirportCode',
-            'segmentsAirlineName',
-            'segmentsDepartureWeekday',
-            'segmentsDepartureTimeOfDay',
-            'segmentsArrivalWeekday',
-            'segmentsArrivalTimeOfDay',
-            'startingAirport',
-            'destinationAirport'
-        }
-        assert set(reader.fieldnames) == header
+        assert set(reader.fieldnames) == {'iata_code', 'name', 'municipality'}
 
-        airport_ticket = {}  # dict[str, list[Ticket]]
         for row in reader:
-            flight_id = row['legId']
+            res_network.add_airport(Airport(iata=row['iata_code'], name=row['name'], city=row['municipality']))
+
+    with open(flight_file) as csv_file:
+        reader = csv.DictReader(csv_file)
+        for row in reader:
+            departure = row['segmentsDepartureAirportCode'].split('||')
+            arrival = row['segmentsArrivalAirportCode'].split('||')
             airline = row['segmentsAirlineName'].split('||')
-            price = float(row['totalFare'])
+            departure_minute = [_to_minute_of_week(weekday, timeday) for weekday, timeday in
+                                zip(row['segmentsDepartureWeekday'].split('||'),
+                                    row['segmentsDepartureTimeOfDay'].split('||'))]
+            arrival_minute = [_to_minute_of_week(weekday, timeday) for weekday, timeday in
+                              zip(row['segmentsArrivalWeekday'].split('||'),
+                                  row['segmentsArrivalTimeOfDay'].split('||'))]
+
+            if row['startingAirport'] != departure[0] or row['destinationAirport'] != arrival[-1]:
+                raise ValueError('Invalid CSV File')
+            assert len(departure) == len(arrival)
 
-            origin = res_network.get_airport_from_iata(row['startingAirport'])
-            destination = res_network.get_airport_from_iata(row['destinationAirport'])
+            flight_id = [row['legId']] * len(departure)
+            res_network.add_itinerary(price=float(row['totalFare']),
+                                      flights=list(zip(flight_id, departure, arrival, airline, departure_minute,
+                                                       arrival_minute)))
 
-            departure = row['segmentsDepartureAirportCode'].split('||')
-            departure = [res_network.get_airport_from_iata(airport_d) for airport_d in departure]
+    res_network.build()
+    return res_network
 
-            departure_weekday = list(map(int, row['segmentsDepartureWeekday'].split('||')))
-            departure_timeday = row['segmentsDepartureTimeOfDay'].split('||')
-            departure_timeday = [tuple(map(int, timeday.split(':'))) for timeday in departure_timeday]
 
-            arrival = row['segmentsArrivalAirportCode'].split('||')
-            arrival = [res_network.get_airport_from_iata(airport_a) for airport_a in arrival]
+def load_network(airport_file: str, flight_file: str) -> ColumnarNetwork:
+    """Return the network of airport_file and flight_file.
 
-            arrival_weekday = list(map(int, row['segmentsArrivalWeekday'].split('||')))
-            arrival_timeday = row['segmentsArrivalTimeOfDay'].split('||')
-            arrival_timeday = [tuple(map(int, timeday.split(':'))) for timeday in arrival_timeday]
+    The network is loaded from the snapshot file next to flight_file if that file is newer than both CSV files, which
+    takes well under a second even for the full dataset. Otherwise, the CSV files are read with read_columnar_csv_file
+    and the snapshot is written for later runs, so that the network is columnar on every run.
 
-            try:
-                assert origin == departure[0] and destination == arrival[-1]
-            except AssertionError:
-                raise ValueError('Invalid CSV File')
-            assert len(departure) == len(arrival)
+    Preconditions:
+        - airport_file.endswith('.csv')
+        - flight_file.endswith('.csv')
+    """
+    snapshot_file = flight_file[:-len('.csv')] + '.snapshot'
+    if os.path.exists(snapshot_file) and \
+            os.path.getmtime(snapshot_file) >= max(os.path.getmtime(airport_file), os.path.getmtime(flight_file)):
+        return Network.load_snapshot(snapshot_file)
+
+    flight_network = read_columnar_csv_file(airport_file, flight_file)
+    flight_network.write_snapshot(snapshot_file)
+    return flight_network
 
-            flights = []
-            for i in range(len(departure)):
-                flight = Flight(
-                    airline=airline[i],
-                    flight_id=flight_id,
-                    origin=departure[i],
-                    destination=arrival[i],
-                    departure_time=DayHourMinute(
-                        day=departure_weekday[i], hour=departure_timeday[i][0], minute=departure_timeday[i][1]
-                    ),
-                    arrival_time=DayHourMinute(arrival_weekday[i], arrival_timeday[i][0], arrival_timeday[i][1])
-                )
-                flights.append(flight)
-
-            ticket = Ticket(
-                origin=origin,
-                destination=destination,
-                departure_time=flights[0].departure_time,
-                arrival_time=flights[-1].arrival_time,
-                flights=flights,
-                price=price
-            )
 
-            if origin not in airport_ticket:
-                airport_ticket[origin] = []
-            airport_ticket[origin].append(ticket)
+def _to_minute_of_week(weekday: str, timeday: str) -> int:
+    """Return the number of minutes between Monday 00:00 and the given weekday (1 to 7) and time of day (HH:MM).
+    """
+    hour, minute = timeday.split(':')
+    return (int(weekday) - 1) * MINUTES_PER_DAY + int(hour) * 60 + int(minute)
 
-        for origin in airport_ticket:
-            tickets = airport_ticket[origin]
-            tickets.sort(key=lambda x: x.departure_time)
 
-            for ticket in tickets:
-                origin.add_ticket(ticket)
+def get_pruned_landmark_labelling(flight_network: Network, airport_file: str,
+                                  flight_file: str) -> PrunedLandmarkLabelling:
+    """Return the landmark index of flight_network, which was read from airport_file and flight_file.
 
-    return res_network
+    The index is read from the index file next to flight_file if that file is newer than both CSV files. Otherwise, the
+    index is built and written to the index file, so that later runs can skip building it.
+
+    Preconditions:
+        - flight_file.endswith('.csv')
+    """
+    index_file = flight_file[:-len('.csv')] + '_landmark.json'
+    if os.path.exists(index_file) and \
+            os.path.getmtime(index_file) >= max(os.path.getmtime(airport_file), os.path.getmtime(flight_file)):
+        return PrunedLandmarkLabelling.load(index_file)
+
+    landmark_index = PrunedLandmarkLabelling.from_network(flight_network)
+    landmark_index.save(index_file)
+    return landmark_index
 
 
 def generate_data_from_scratch() -> None:
@@ -233,33 +463,45 @@ def _get_iata_input(prompt_city: str, prompt_airport: str, flight_network: Netwo
     return iata
 
 
-def _get_date(pivot_datetime: datetime, query_weektime: DayHourMinute) -> str:
-    day_diff = query_weektime.day - pivot_datetime.isoweekday()
-    if day_diff < 0:
-        day_diff += 7
+def _get_date(pivot_datetime: datetime, query_weektime: int) -> str:
+    minute_diff = (query_weektime - pivot_datetime.weekday() * MINUTES_PER_DAY) % MINUTES_PER_WEEK
 
     departure_time = pivot_datetime
-    departure_time += timedelta(days=int(day_diff), hours=query_weektime.hour, minutes=query_weektime.minute)
+    departure_time += timedelta(minutes=minute_diff)
     return departure_time.strftime("%d %b, %H:%M")
 
 
 def run(airport_file: str, flight_file: str, searcher_type: str) -> None:
     """Runs a flight search on a network based on 'airport_file' and 'flight_file'. 'searcher_type' determines the
-    algorithm used, 'naive' refers to naive traversal, while 'dijsktra' refers to dijsktra algorithm.
+    algorithm used, 'naive' refers to naive traversal, 'dijsktra' refers to dijsktra algorithm, 'connection_scan'
+    refers to the connection scan algorithm, 'raptor' refers to the round-based raptor algorithm, 'pareto' refers to
+    the search for tickets that are not beaten in both duration and price, 'k_shortest' refers to Yen's k shortest
+    paths algorithm, while 'astar' refers to A* search.
 
     Preconditions:
-        - searcher_type == 'naive' or searcher_type == 'dijsktra'
+        - searcher_type in {'naive', 'dijsktra', 'connection_scan', 'raptor', 'pareto', 'k_shortest', 'astar'}
     """
-    flight_network = read_csv_file(airport_file, flight_file)
+    flight_network = load_network(airport_file, flight_file)
 
     searcher = None
     if searcher_type == 'naive':
         searcher = NaiveFlightSearcher(flight_network)
     elif searcher_type == 'dijsktra':
         searcher = DijkstraFlightSearcher(flight_network)
+    elif searcher_type == 'connection_scan':
+        searcher = ConnectionScanFlightSearcher(flight_network)
+    elif searcher_type == 'raptor':
+        searcher = RaptorFlightSearcher(flight_network)
+    elif searcher_type == 'pareto':
+        searcher = ParetoFlightSearcher(flight_network)
+    elif searcher_type == 'k_shortest':
+        searcher = KShortestFlightSearcher(flight_network)
+    elif searcher_type == 'astar':
+        searcher = AStarFlightSearcher(flight_network)
     else:
         raise ValueError('Invalid Flight Searcher')
     assert searcher is not None
+    searcher.use_landmark_index(get_pruned_landmark_labelling(flight_network, airport_file, flight_file))
 
     # Asks for Airport Departure/Arrival
     departure_airport = _get_iata_input(
@@ -308,36 +550,57 @@ def run(airport_file: str, flight_file: str, searcher_type: str) -> None:
 
     print('Here are the tickets from your departure airport to your arrival airport: ')
     for ticket in tickets:
-        print(f'{ticket.origin}[{_get_date(departure_date, ticket.departure_time)}] to '
-              f'{ticket.destination}[{_get_date(departure_date, ticket.arrival_time)}] | {ticket.price}')
+        print(f'{ticket.origin}[{_get_date(departure_date, ticket.departure_minute)}] to '
+              f'{ticket.destination}[{_get_date(departure_date, ticket.arrival_minute)}] | {ticket.price}')
         for flight in ticket.flights:
-            print(f'\t{flight.origin}[{_get_date(departure_date, flight.departure_time)}] to '
-                  f'{flight.destination}[{_get_date(departure_date, flight.arrival_time)}]')
+            print(f'\t{flight.origin}[{_get_date(departure_date, flight.departure_minute)}] to '
+                  f'{flight.destination}[{_get_date(departure_date, flight.arrival_minute)}]')
         print()
 
 
 def django_helper(airport_file: str, flight_file: str) -> \
-        tuple[AbstractFlightSearcher, AbstractFlightSearcher, list[Airport]]:
+        tuple[dict[str, AbstractFlightSearcher], list[Airport]]:
     """ A django helper method.
-    When this function is called, it will return a tuple of [NaiveFlightSearcher, DijsktraFlightSearcher, Airports]
-    to the django server.
+    When this function is called, it will return a tuple of [Searchers, Airports] to the django server, where Searchers
+    maps each searcher type selectable on the website to its flight searcher. Every searcher prunes its search with
+    the landmark index of the network.
     """
     # os.chdir('../data')
-    flight_network = read_csv_file(airport_file, flight_file)
+    flight_network = load_network(airport_file, flight_file)
+    landmark_index = get_pruned_landmark_labelling(flight_network, airport_file, flight_file)
+
+    flight_searchers = {
+        'naive': NaiveFlightSearcher(flight_network=flight_network),
+        'dijkstra': DijkstraFlightSearcher(flight_network=flight_network),
+        'connection_scan': ConnectionScanFlightSearcher(flight_network=flight_network),
+        'raptor': RaptorFlightSearcher(flight_network=flight_network),
+        'pareto': ParetoFlightSearcher(flight_network=flight_network),
+        'k_shortest': KShortestFlightSearcher(flight_network=flight_network),
+        'astar': AStarFlightSearcher(flight_network=flight_network),
+    }
+    for searcher in flight_searchers.values():
+        searcher.use_landmark_index(landmark_index)
 
     return (
-        NaiveFlightSearcher(flight_network=flight_network),
-        DijkstraFlightSearcher(flight_network=flight_network),
+        flight_searchers,
         list(sorted(flight_network.airports.values(), key=lambda x: x.city))
     )
 
 
 def run_django_project(airport_file: str, flight_file: str) -> None:
     """ Python script to deploy the django web server
+
+    The server loads the network of airport_file and flight_file when it starts (see index.apps.IndexConfig.ready),
+    before it answers any request.
     """
+    # The server learns the files from its environment, with paths that do not depend on its working directory.
+    env = dict(os.environ,
+               SKYSEARCHER_AIRPORT_FILE=os.path.abspath(airport_file),
+               SKYSEARCHER_FLIGHT_FILE=os.path.abspath(flight_file))
+
     # Move the directory and Start the Django server using subprocess
     os.chdir('../skysearcher')
-    with subprocess.Popen(['python', 'manage.py', 'runserver', '--noreload']) as _:
+    with subprocess.Popen(['python', 'manage.py', 'runserver', '--noreload'], env=env) as _:
         # Wait for the server to start up
         url = 'http://localhost:8000'
         while True:
@@ -348,13 +611,6 @@ def run_django_project(airport_file: str, flight_file: str) -> None:
             except requests.exceptions.ConnectionError:
                 pass
 
-        # Send a POST request to trigger Django to call django_helper
-        data = {
-            'airport_file': airport_file,
-            'flight_file': flight_file
-        }
-        requests.post(url, data=data)
-
         # Open the project in a web browser
         webbrowser.open(url)
 
@@ -373,12 +629,16 @@ WARNING: This action will use ~16GB of memory, ~16GB of disk space, and ~6GB of
 as well as around 5 to 40 minutes depending on the computer's processing power and download speed.
 Proceed with caution.""", default=False):
         generate_data_from_scratch()
+
+        # Select which generator you would like
+        testcase_generator.generate_testcase_general(
+            '../data/clean_no_dupe_itineraries.csv', '../data/airport_class.csv', N, seed=65537)
     else:
-        unpack_csv()
+        # Sample straight from the archive, without extracting clean_no_dupe_itineraries.csv to disk
+        testcase_generator.generate_testcase_from_archive(
+            '../data/clean_no_dupe_itineraries.7z', 'clean_no_dupe_itineraries.csv', '../data/airport_class.csv', N,
+            seed=65537)
 
-    # Select which generator you would like
-    testcase_generator.generate_testcase_general(
-        '../data/clean_no_dupe_itineraries.csv', '../data/airport_class.csv', N, seed=65537)
     # testcase_generator.generate_testcase_direct_flight(
     #     '../data/clean_no_dupe_itineraries.csv', '../data/airport_class.csv', 1000, seed=94231)
 
@@ -391,9 +651,9 @@ Proceed with caution.""", default=False):
     # import python_ta
     # python_ta.check_all(config={
     #     'max-line-length': 120,
-    #     'extra-imports': ['datetime', 'os', 'sys', 'csv', 'py7zr', 'datetime', 'network', 'flightsearcher',
-    #                       'airport_data_cleaner', 'flight_data_cleaner', 'testcase_generator', 'subprocess',
-    #                       'webbrowser', 'requests'],
+    #     'extra-imports': ['datetime', 'os', 'sys', 'csv', 'datetime', 'network', 'flightsearcher',
+    #                       'landmark', 'airport_data_cleaner', 'archive_reader', 'flight_data_cleaner',
+    #                       'testcase_generator', 'subprocess', 'webbrowser', 'requests'],
     #     'disable': ['unused-import', 'too-many-branches', 'extra-imports', 'E9992', 'E9997', 'too-many-locals'],
     #     'allowed-io': ['read_csv_file', 'run', '_get_iata_input', 'ask_yes_no']
     # })
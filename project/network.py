@@ -2,8 +2,16 @@
 
 from __future__ import annotations
 
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import namedtuple
-from typing import Any, TypeAlias
+from itertools import islice
+from typing import Any, Iterator, TypeAlias
 from datetime import datetime
 
 from python_ta.contracts import check_contracts
@@ -17,6 +25,34 @@ MAX_LAYOVER_TIME = 720  # minutes
 MAX_LAYOVER = 3         # stops
 TOP_K_RESULTS = 10
 
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+SNAPSHOT_MAGIC = b'SKYSNAP\0'
+SNAPSHOT_VERSION = 1
+
+
+def minute_of_week(time: DayHourMinute) -> int:
+    """Return the number of minutes between Monday 00:00 and the given time of the week.
+
+    Preconditions:
+        - 1 <= time.day <= 7
+        - 0 <= time.hour < 24
+        - 0 <= time.minute < 60
+    """
+    return (time.day - 1) * MINUTES_PER_DAY + time.hour * 60 + time.minute
+
+
+def day_hour_minute(minute: int) -> DayHourMinute:
+    """Return the time of the week that is the given number of minutes after Monday 00:00, wrapping around to the
+    start of the week if minute is beyond its end.
+
+    Preconditions:
+        - minute >= 0
+    """
+    minute %= MINUTES_PER_WEEK
+    return DayHourMinute(minute // MINUTES_PER_DAY + 1, minute % MINUTES_PER_DAY // 60, minute % 60)
+
 
 # @check_contracts
 class Network:
@@ -66,6 +102,29 @@ class Network:
         """
         return {self.get_airport_from_iata(iata) for iata in self.city_airport[city]}
 
+    def ticket_summaries(self) -> Iterator[tuple[Airport, Airport, int, int, float, int]]:
+        """Return an iterator over the origin, destination, departure_minute, arrival_minute, price and number of
+        flights of every ticket of this network, for code that only needs those and not the tickets themselves.
+        """
+        for airport in self.airports.values():
+            for ticket in airport.tickets:
+                yield (airport, ticket.destination, ticket.departure_minute, ticket.arrival_minute, ticket.price,
+                       len(ticket.flights))
+
+    def save_snapshot(self, snapshot_file: str) -> None:
+        """Write the airports, tickets and flights of this network to snapshot_file in a compact binary format that
+        load_snapshot reads back almost instantly.
+        """
+        columnar = self if isinstance(self, ColumnarNetwork) else ColumnarNetwork.from_network(self)
+        columnar.write_snapshot(snapshot_file)
+
+    @staticmethod
+    def load_snapshot(snapshot_file: str) -> ColumnarNetwork:
+        """Return the network written to snapshot_file by save_snapshot. The snapshot is memory-mapped, so its tickets
+        are only read from disk when they are first accessed.
+        """
+        return ColumnarNetwork.read_snapshot(snapshot_file)
+
 
 # @check_contracts
 class Airport:
@@ -77,18 +136,23 @@ class Airport:
         - name: The name of the airport.
         - city: The city in which this airport is located in.
         - tickets: A list of tickets which represents the possible flight paths from this airport,
-         sorted in non-decreasing departure time.
+         sorted in non-decreasing departure time. In a ColumnarNetwork, this is a TicketColumn instead.
+        - departure_minutes: The departure_minute of each ticket in tickets, used to look up the tickets departing
+         within a time window by bisection.
 
 
     Representation Invariants:
         - len(self.iata) == 3
         - all(ticket.origin == self for ticket in tickets)
         - all(ticket[i].departure_time <= ticket[i + 1].departure_time for i in range(len(tickets) - 1))
+        - self.departure_minutes == [ticket.departure_minute for ticket in self.tickets]
     """
+    __slots__ = ('iata', 'name', 'city', 'tickets', 'departure_minutes')
     iata: IATACode
     name: str
     city: str
-    tickets: list[Ticket]
+    tickets: list[Ticket] | TicketColumn
+    departure_minutes: list[int] | array | memoryview
 
     def __init__(self, iata: IATACode, name: str, city: str) -> None:
         """Initialize an airport with the given IATA code, name and city with no flights.
@@ -97,11 +161,36 @@ class Airport:
         self.name = name
         self.city = city
         self.tickets = []
+        self.departure_minutes = []
 
     def add_ticket(self, ticket: Ticket) -> None:
         """Add a ticket to the list of flights in this airport.
+
+        Preconditions:
+            - self.tickets == [] or self.tickets[-1].departure_minute <= ticket.departure_minute
         """
         self.tickets.append(ticket)
+        self.departure_minutes.append(ticket.departure_minute)
+
+    def get_tickets_departing(self, earliest: int, latest: int) -> list[Ticket]:
+        """Return the tickets departing from this airport between earliest and latest (inclusive), in order of
+        departure. Both are given in minutes since Monday 00:00 and may lie beyond the end of the week, in which case
+        the window wraps around to the start of the week.
+
+        Preconditions:
+            - 0 <= earliest <= latest
+        """
+        if latest - earliest >= MINUTES_PER_WEEK:
+            return self.tickets
+
+        start = earliest % MINUTES_PER_WEEK
+        end = start + (latest - earliest)
+        low = bisect_left(self.departure_minutes, start)
+        if end < MINUTES_PER_WEEK:
+            return self.tickets[low:bisect_right(self.departure_minutes, end)]
+
+        high = bisect_right(self.departure_minutes, end - MINUTES_PER_WEEK)
+        return self.tickets[low:] + self.tickets[:high]
 
     def __str__(self) -> str:
         """Return a string representing the iata code, name and location(city) of the airport.
@@ -121,16 +210,25 @@ class Flight:
         - destination: The destination airport of the flight.
         - departure_time: A tuple representing the day of the week, hour and minute of the departure time.
         - arrival_time: A tuple representing the day of the week, hour and minute of the arrival time.
+        - departure_minute: The departure time as the number of minutes since Monday 00:00.
+        - arrival_minute: The arrival time as the number of minutes since Monday 00:00 of the departure week.
+        This may exceed MINUTES_PER_WEEK when the flight lands in the following week.
 
     Representation Invariants:
         - self.origin != self.destination
+        - 0 <= self.departure_minute < MINUTES_PER_WEEK
+        - self.departure_minute <= self.arrival_minute < self.departure_minute + MINUTES_PER_WEEK
     """
+    __slots__ = ('airline', 'flight_id', 'origin', 'destination', 'departure_time', 'arrival_time',
+                 'departure_minute', 'arrival_minute')
     airline: str
     flight_id: str
     origin: Airport
     destination: Airport
     departure_time: DayHourMinute  # Day of the week, hour, minute
     arrival_time: DayHourMinute
+    departure_minute: int
+    arrival_minute: int
 
     def __init__(self, airline: str, flight_id: str, origin: Airport, destination: Airport,
                  departure_time: DayHourMinute, arrival_time: DayHourMinute) -> None:
@@ -140,8 +238,9 @@ class Flight:
         self.flight_id = flight_id
         self.origin = origin
         self.destination = destination
-        self.departure_time = DayHourMinute(*departure_time)
-        self.arrival_time = DayHourMinute(*arrival_time)
+        self.departure_time = _as_day_hour_minute(departure_time)
+        self.arrival_time = _as_day_hour_minute(arrival_time)
+        self.departure_minute, self.arrival_minute = _week_interval(self.departure_time, self.arrival_time)
 
     def __str__(self) -> str:
         """Return a string representing the flight_id, airline, iata code of the origin airport, departure time, iata
@@ -163,6 +262,9 @@ class Ticket:
         flight in the ticket.
         - arrival_time: A tuple representing the day of the week, hour and minute of the arrival time of the last flight
         in the ticket.
+        - departure_minute: The departure time as the number of minutes since Monday 00:00.
+        - arrival_minute: The arrival time as the number of minutes since Monday 00:00 of the departure week.
+        This may exceed MINUTES_PER_WEEK when the ticket lands in the following week.
         - flights: A list of the flights on the ticket.
         - price: The total price of all the flights on the ticket.
 
@@ -176,11 +278,17 @@ class Ticket:
         - self.price > 0
         - self.departure_time == self.flights[0].departure_time
         - self.arrival_time == self.flights[-1].arrival_time
+        - 0 <= self.departure_minute < MINUTES_PER_WEEK
+        - self.departure_minute <= self.arrival_minute < self.departure_minute + MINUTES_PER_WEEK
     """
+    __slots__ = ('origin', 'destination', 'departure_time', 'arrival_time', 'departure_minute', 'arrival_minute',
+                 'flights', 'price')
     origin: Airport
     destination: Airport
     departure_time: DayHourMinute
     arrival_time: DayHourMinute
+    departure_minute: int
+    arrival_minute: int
     flights: list[Flight]
     price: float
 
@@ -191,8 +299,9 @@ class Ticket:
         """
         self.origin = origin
         self.destination = destination
-        self.departure_time = DayHourMinute(*departure_time)
-        self.arrival_time = DayHourMinute(*arrival_time)
+        self.departure_time = _as_day_hour_minute(departure_time)
+        self.arrival_time = _as_day_hour_minute(arrival_time)
+        self.departure_minute, self.arrival_minute = _week_interval(self.departure_time, self.arrival_time)
         self.flights = flights
         self.price = price
 
@@ -205,18 +314,543 @@ class Ticket:
         return f'{self.origin.iata} to {self.destination.iata} | {self.price} \n\t{flight_info}'
 
     def __lt__(self, other: Ticket) -> bool:
-        """placeholder for less than"""
-        if self.flights[-1].arrival_time < other.flights[-1].arrival_time:
-            return True
-        elif self.flights[0].departure_time < other.flights[0].departure_time:
-            return True
-        return False
+        """Return whether this ticket arrives earlier in the week than other, or departs earlier if both arrive at the
+        same time.
+        """
+        return (self.arrival_minute, self.departure_minute) < (other.arrival_minute, other.departure_minute)
+
+    def to_record(self) -> tuple[float, tuple[tuple, ...]]:
+        """Return this ticket as a tuple of plain values, (price, flights), where each flight is a tuple (airline,
+        flight_id, origin iata, destination iata, departure_time, arrival_time). Unlike the ticket itself, the record
+        does not refer to the airports, so it can be stored or sent without the rest of the network.
+        """
+        return (self.price, tuple((flight.airline, flight.flight_id, flight.origin.iata, flight.destination.iata,
+                                   tuple(flight.departure_time), tuple(flight.arrival_time))
+                                  for flight in self.flights))
+
+    @staticmethod
+    def from_record(network: Network, record: tuple[float, tuple[tuple, ...]]) -> Ticket:
+        """Return the ticket of the given record, as returned by to_record, with its airports taken from network.
+
+        Preconditions:
+            - all(flight[2] in network.airports and flight[3] in network.airports for flight in record[1])
+        """
+        price, flight_records = record
+        flights = [Flight(airline, flight_id, network.airports[origin], network.airports[destination],
+                          DayHourMinute(*departure_time), DayHourMinute(*arrival_time))
+                   for airline, flight_id, origin, destination, departure_time, arrival_time in flight_records]
+        return Ticket(origin=flights[0].origin,
+                      destination=flights[-1].destination,
+                      departure_time=flights[0].departure_time,
+                      arrival_time=flights[-1].arrival_time,
+                      flights=flights,
+                      price=price)
+
+
+def _as_day_hour_minute(time: tuple[int, int, int]) -> DayHourMinute:
+    """Return time as a DayHourMinute, reusing time itself if it already is one so that shared times stay shared.
+    """
+    return time if isinstance(time, DayHourMinute) else DayHourMinute(*time)
+
+
+def _week_interval(departure_time: DayHourMinute, arrival_time: DayHourMinute) -> tuple[int, int]:
+    """Return the departure and arrival minute of the week of a trip, where the arrival is moved into the
+    following week if it is earlier in the week than the departure.
+    """
+    departure_minute = minute_of_week(departure_time)
+    arrival_minute = minute_of_week(arrival_time)
+    if arrival_minute < departure_minute:
+        arrival_minute += MINUTES_PER_WEEK
+    return departure_minute, arrival_minute
+
+
+# @check_contracts
+class FlightInterner:
+    """
+    A pool that stores each distinct flight, airline name and time of the week once, so that the tickets of a network
+    share them instead of each holding its own copy.
+
+    The same physical flight (same airline, airports and times) often appears in hundreds of itineraries. A shared
+    flight keeps the flight id of the first itinerary it was created for.
+
+    Instance Attributes:
+        - flights: A dictionary that maps the airline, origin, destination, departure time and arrival time of each
+        flight created so far to the flight.
+        - times: A dictionary that maps each (day, hour, minute) created so far to its DayHourMinute.
+    """
+    __slots__ = ('flights', 'times')
+    flights: dict[tuple[str, IATACode, IATACode, DayHourMinute, DayHourMinute], Flight]
+    times: dict[tuple[int, int, int], DayHourMinute]
+
+    def __init__(self) -> None:
+        """Initialize an empty pool. """
+        self.flights = {}
+        self.times = {}
+
+    def get_time(self, day: int, hour: int, minute: int) -> DayHourMinute:
+        """Return the shared DayHourMinute with the given day, hour and minute.
+        """
+        key = (day, hour, minute)
+        if key not in self.times:
+            self.times[key] = DayHourMinute(day, hour, minute)
+        return self.times[key]
+
+    def get_flight(self, airline: str, flight_id: str, origin: Airport, destination: Airport,
+                   departure_time: DayHourMinute, arrival_time: DayHourMinute) -> Flight:
+        """Return the shared flight with the given airline, airports and times, creating it with flight_id if there is
+        none yet.
+        """
+        departure_time = self.get_time(*departure_time)
+        arrival_time = self.get_time(*arrival_time)
+        key = (airline, origin.iata, destination.iata, departure_time, arrival_time)
+        if key not in self.flights:
+            self.flights[key] = Flight(airline=sys.intern(airline), flight_id=flight_id, origin=origin,
+                                       destination=destination, departure_time=departure_time,
+                                       arrival_time=arrival_time)
+        return self.flights[key]
+
+
+# @check_contracts
+class ColumnarNetwork(Network):
+    """
+    A network that stores its tickets and flights in columns of numbers instead of objects.
+
+    Each ticket is a row of the ticket_* columns, and each distinct flight is a row of the flight_* columns. As in
+    FlightInterner, a flight that appears in several itineraries is stored once and keeps the flight id of the first
+    one. The tickets are sorted by origin and then by departure time. Airports are ordinary Airport objects, but their
+    tickets are a TicketColumn, which creates a TicketView of a row only when it is accessed. A ticket and its flights
+    then take about 100 bytes instead of several hundred bytes of Python objects.
+
+    Tickets are added with add_itinerary, which only appends to pending columns, and are only visible from the airports
+    after build is called. A network read from a snapshot has memoryview columns of the snapshot file instead of arrays,
+    and no tickets can be added to it.
+
+    Instance Attributes:
+        - airport_list: The airports of this network, where the id of an airport is its index in this list.
+        - airport_ids: A dictionary that maps an airport's IATA code to its id.
+        - airlines: The distinct airline names, where the id of an airline is its index in this list.
+        - airline_ids: A dictionary that maps an airline name to its id.
+        - ticket_origin: The id of the origin airport of each ticket.
+        - ticket_destination: The id of the destination airport of each ticket.
+        - ticket_departure: The departure_minute of each ticket.
+        - ticket_arrival: The arrival_minute of each ticket.
+        - ticket_price: The price of each ticket.
+        - ticket_flight_start: The offset in ticket_flights of the flights of each ticket, followed by the length of
+        ticket_flights.
+        - ticket_flights: The rows of the flights of the tickets concatenated, each ticket's flights in order.
+        - flight_origin: The id of the origin airport of each flight.
+        - flight_destination: The id of the destination airport of each flight.
+        - flight_departure: The departure_minute of each flight.
+        - flight_arrival: The arrival_minute of each flight.
+        - flight_airline: The id of the airline of each flight.
+        - flight_id_start: The offset in flight_ids of the flight id of each flight, followed by the length of
+        flight_ids.
+        - flight_ids: The flight ids of the flights concatenated, encoded in ASCII.
+        - flight_rows: A dictionary that maps the airline id, airport ids, departure and arrival of each flight to its
+        row. It is only needed to add itineraries and is emptied by build.
+
+    Representation Invariants:
+        - all(self.airport_list[self.airport_ids[iata]] is self.airports[iata] for iata in self.airports)
+        - len(self.ticket_flight_start) == len(self.ticket_price) + 1
+        - len(self.flight_id_start) == len(self.flight_origin) + 1
+    """
+    airport_list: list[Airport]
+    airport_ids: dict[IATACode, int]
+    airlines: list[str]
+    airline_ids: dict[str, int]
+    ticket_origin: array | memoryview
+    ticket_destination: array | memoryview
+    ticket_departure: array | memoryview
+    ticket_arrival: array | memoryview
+    ticket_price: array | memoryview
+    ticket_flight_start: array | memoryview
+    ticket_flights: array | memoryview
+    flight_origin: array | memoryview
+    flight_destination: array | memoryview
+    flight_departure: array | memoryview
+    flight_arrival: array | memoryview
+    flight_airline: array | memoryview
+    flight_id_start: array | memoryview
+    flight_ids: bytearray | memoryview
+    flight_rows: dict[tuple[int, int, int, int, int], int]
+
+    def __init__(self) -> None:
+        """Initialize an empty network. """
+        Network.__init__(self)
+        self.airport_list = []
+        self.airport_ids = {}
+        self.airlines = []
+        self.airline_ids = {}
+        self.ticket_origin, self.ticket_destination = array('i'), array('i')
+        self.ticket_departure, self.ticket_arrival = array('i'), array('i')
+        self.ticket_price = array('d')
+        self.ticket_flight_start, self.ticket_flights = array('q', [0]), array('i')
+        self.flight_origin, self.flight_destination = array('i'), array('i')
+        self.flight_departure, self.flight_arrival = array('i'), array('i')
+        self.flight_airline = array('i')
+        self.flight_id_start, self.flight_ids = array('q', [0]), bytearray()
+        self.flight_rows = {}
+
+    def add_airport(self, airport: Airport) -> None:
+        """Add an airport to this network and adds its corresponding city to this network
+         if the city is not in this network.
+
+        Preconditions:
+            - airport.iata not in self.airports
+        """
+        Network.add_airport(self, airport)
+        self.airport_ids[airport.iata] = len(self.airport_list)
+        self.airport_list.append(airport)
+
+    def add_itinerary(self, price: float, flights: list[tuple[str, IATACode, IATACode, str, int, int]]) -> None:
+        """Add a ticket with the given price, whose flights are given as tuples (flight_id, origin, destination,
+        airline, departure, arrival) where departure and arrival are in minutes since Monday 00:00.
+
+        Preconditions:
+            - flights != []
+            - all(flight[1] in self.airports and flight[2] in self.airports for flight in flights)
+            - all(0 <= flight[4] < MINUTES_PER_WEEK and 0 <= flight[5] < MINUTES_PER_WEEK for flight in flights)
+        """
+        for flight_id, origin, destination, airline, departure, arrival in flights:
+            if airline not in self.airline_ids:
+                self.airline_ids[airline] = len(self.airlines)
+                self.airlines.append(sys.intern(airline))
+            key = (self.airline_ids[airline], self.airport_ids[origin], self.airport_ids[destination], departure,
+                   arrival + (MINUTES_PER_WEEK if arrival < departure else 0))
+            if key not in self.flight_rows:
+                self.flight_rows[key] = len(self.flight_origin)
+                self.flight_airline.append(key[0])
+                self.flight_origin.append(key[1])
+                self.flight_destination.append(key[2])
+                self.flight_departure.append(key[3])
+                self.flight_arrival.append(key[4])
+                self.flight_ids.extend(flight_id.encode('ascii'))
+                self.flight_id_start.append(len(self.flight_ids))
+            self.ticket_flights.append(self.flight_rows[key])
+
+        departure, arrival = flights[0][4], flights[-1][5]
+        self.ticket_origin.append(self.airport_ids[flights[0][1]])
+        self.ticket_destination.append(self.airport_ids[flights[-1][2]])
+        self.ticket_departure.append(departure)
+        self.ticket_arrival.append(arrival + (MINUTES_PER_WEEK if arrival < departure else 0))
+        self.ticket_price.append(price)
+        self.ticket_flight_start.append(len(self.ticket_flights))
+
+    def build(self) -> None:
+        """Sort the tickets by origin and then by departure time, keeping tickets that depart at the same time in the
+        order they were added, and make them visible from their origin airports.
+        """
+        self.flight_rows = {}
+        order = sorted(range(len(self.ticket_price)), key=lambda x: (self.ticket_origin[x], self.ticket_departure[x]))
+
+        ticket_flight_start, ticket_flights = array('q', [0]), array('i')
+        for row in order:
+            ticket_flights.extend(self.ticket_flights[self.ticket_flight_start[row]:self.ticket_flight_start[row + 1]])
+            ticket_flight_start.append(len(ticket_flights))
+        self.ticket_flight_start, self.ticket_flights = ticket_flight_start, ticket_flights
+
+        for name in ('ticket_origin', 'ticket_destination', 'ticket_departure', 'ticket_arrival', 'ticket_price'):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in order)))
+
+        self._attach_tickets()
+
+    def ticket_summaries(self) -> Iterator[tuple[Airport, Airport, int, int, float, int]]:
+        """Return an iterator over the origin, destination, departure_minute, arrival_minute, price and number of
+        flights of every ticket of this network, read straight from the ticket columns without creating any
+        TicketView.
+        """
+        airports = self.airport_list
+        starts = self.ticket_flight_start
+        for origin, destination, departure, arrival, price, start, end in zip(
+                self.ticket_origin, self.ticket_destination, self.ticket_departure, self.ticket_arrival,
+                self.ticket_price, starts, islice(starts, 1, None)):
+            yield airports[origin], airports[destination], departure, arrival, price, end - start
+
+    @classmethod
+    def from_network(cls, flight_network: Network) -> ColumnarNetwork:
+        """Return a columnar network with the same airports, tickets and flights as flight_network.
+        """
+        res_network = cls()
+        for airport in flight_network.airports.values():
+            res_network.add_airport(Airport(iata=airport.iata, name=airport.name, city=airport.city))
+        for airport in flight_network.airports.values():
+            for ticket in airport.tickets:
+                res_network.add_itinerary(price=ticket.price,
+                                          flights=[(flight.flight_id, flight.origin.iata, flight.destination.iata,
+                                                    flight.airline, flight.departure_minute,
+                                                    flight.arrival_minute % MINUTES_PER_WEEK)
+                                                   for flight in ticket.flights])
+        res_network.build()
+        return res_network
+
+    def write_snapshot(self, snapshot_file: str) -> None:
+        """Write this network to snapshot_file.
+
+        The file starts with SNAPSHOT_MAGIC, then the SNAPSHOT_VERSION and the length of a JSON header as two
+        little-endian 32-bit integers, then the header, which holds the airports, the airlines and the position of
+        each column. The columns follow as raw machine values, each starting at a multiple of 8 bytes so that they can
+        be memory-mapped in place.
+
+        Preconditions:
+            - build has been called since the last call to add_itinerary
+        """
+        columns = [(name, memoryview(getattr(self, name))) for name in _SNAPSHOT_COLUMNS]
+        header = {
+            'byteorder': sys.byteorder,
+            'airports': [[airport.iata, airport.name, airport.city] for airport in self.airport_list],
+            'airlines': self.airlines,
+            'columns': []
+        }
+        offset = 0
+        for name, column in columns:
+            header['columns'].append([name, column.format, column.itemsize, offset, len(column)])
+            offset += _padded(column.nbytes)
+        header_bytes = json.dumps(header).encode('utf-8')
+
+        with open(snapshot_file, 'wb') as f:
+            start = _padded(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+            f.write(SNAPSHOT_MAGIC + struct.pack('<II', SNAPSHOT_VERSION, len(header_bytes)) + header_bytes)
+            f.write(bytes(start - f.tell()))
+            for _, column in columns:
+                f.write(column.cast('B'))
+                f.write(bytes(_padded(column.nbytes) - column.nbytes))
+
+    @classmethod
+    def read_snapshot(cls, snapshot_file: str) -> ColumnarNetwork:
+        """Return the network written to snapshot_file by write_snapshot. Its columns are views of a read-only memory
+        map of the file.
+
+        Raise ValueError if snapshot_file is not a snapshot of this version and byte order, or is truncated or has an
+        incomplete header.
+        """
+        with open(snapshot_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < len(SNAPSHOT_MAGIC) + 8:  # mmap cannot map an empty file
+                raise ValueError('Invalid snapshot file')
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(data)
+
+        prefix = len(SNAPSHOT_MAGIC) + 8
+        if view[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError('Invalid snapshot file')
+        version, header_length = struct.unpack('<II', view[len(SNAPSHOT_MAGIC):prefix])
+        if version != SNAPSHOT_VERSION or len(view) < prefix + header_length:
+            raise ValueError('Invalid snapshot file')
+        try:
+            header = json.loads(bytes(view[prefix:prefix + header_length]))
+        except ValueError as error:
+            raise ValueError('Invalid snapshot file') from error
+        if not isinstance(header, dict) or any(key not in header for key in _SNAPSHOT_HEADER_KEYS) \
+                or header['byteorder'] != sys.byteorder:
+            raise ValueError('Invalid snapshot file')
+
+        res_network = cls()
+        for iata, name, city in header['airports']:
+            res_network.add_airport(Airport(iata=iata, name=name, city=city))
+        res_network.airlines = header['airlines']
+        res_network.airline_ids = {airline: i for i, airline in enumerate(res_network.airlines)}
+
+        start = _padded(prefix + header_length)
+        for name, column_format, itemsize, offset, length in header['columns']:
+            if array(column_format).itemsize != itemsize or start + offset + length * itemsize > len(view):
+                raise ValueError('Invalid snapshot file')
+            setattr(res_network, name, view[start + offset:start + offset + length * itemsize].cast(column_format))
+
+        res_network._attach_tickets()
+        return res_network
+
+    def _attach_tickets(self) -> None:
+        """Make the tickets visible from their origin airports.
+
+        Preconditions:
+            - the tickets are sorted by origin and then by departure time
+        """
+        start = 0
+        for airport_id, airport in enumerate(self.airport_list):
+            end = bisect_right(self.ticket_origin, airport_id, start)
+            airport.tickets = TicketColumn(self, start, end)
+            airport.departure_minutes = self.ticket_departure[start:end]
+            start = end
+
+
+_SNAPSHOT_COLUMNS = ('ticket_origin', 'ticket_destination', 'ticket_departure', 'ticket_arrival', 'ticket_price',
+                     'ticket_flight_start', 'ticket_flights', 'flight_origin', 'flight_destination', 'flight_departure',
+                     'flight_arrival', 'flight_airline', 'flight_id_start', 'flight_ids')
+_SNAPSHOT_HEADER_KEYS = ('byteorder', 'airports', 'airlines', 'columns')
+
+
+def _padded(size: int) -> int:
+    """Return size rounded up to a multiple of 8.
+    """
+    return (size + 7) // 8 * 8
+
+
+class TicketColumn:
+    """
+    The tickets in a range of rows of a ColumnarNetwork, which behaves like a read-only list of TicketView.
+
+    Instance Attributes:
+        - network: The network storing the tickets.
+        - start: The first row in the range.
+        - end: The row after the last row in the range.
+
+    Representation Invariants:
+        - 0 <= self.start <= self.end <= len(self.network.ticket_price)
+    """
+    network: ColumnarNetwork
+    start: int
+    end: int
+
+    def __init__(self, network: ColumnarNetwork, start: int, end: int) -> None:
+        """Initialize the tickets in rows start to end - 1 of network.
+        """
+        self.network = network
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        """Return the number of tickets. """
+        return self.end - self.start
+
+    def __iter__(self) -> Iterator[TicketView]:
+        """Return an iterator over the tickets in order. """
+        return (TicketView(self.network, row) for row in range(self.start, self.end))
+
+    def __getitem__(self, index: int | slice) -> TicketView | list[TicketView]:
+        """Return the ticket at the given index, or a list of the tickets in the given slice.
+        """
+        if isinstance(index, slice):
+            return [TicketView(self.network, self.start + i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('ticket index out of range')
+        return TicketView(self.network, self.start + index)
+
+
+class TicketView(Ticket):
+    """
+    A ticket stored in a row of a ColumnarNetwork. Its flights and times of the week are only created when they are
+    accessed. Two views are equal if they view the same row of the same network.
+
+    Instance Attributes:
+        - network: The network storing the ticket.
+        - row: The row of the ticket in the ticket_* columns of network.
+    """
+    __slots__ = ('network', 'row')
+    network: ColumnarNetwork
+    row: int
+
+    def __init__(self, network: ColumnarNetwork, row: int) -> None:
+        """Initialize a view of the given row of network. """
+        # pylint: disable=super-init-not-called
+        self.network = network
+        self.row = row
+        self.origin = network.airport_list[network.ticket_origin[row]]
+        self.destination = network.airport_list[network.ticket_destination[row]]
+        self.departure_minute = network.ticket_departure[row]
+        self.arrival_minute = network.ticket_arrival[row]
+        self.price = network.ticket_price[row]
+
+    @property
+    def departure_time(self) -> DayHourMinute:
+        """The day of the week, hour and minute of the departure time. """
+        return day_hour_minute(self.departure_minute)
+
+    @property
+    def arrival_time(self) -> DayHourMinute:
+        """The day of the week, hour and minute of the arrival time. """
+        return day_hour_minute(self.arrival_minute)
+
+    @property
+    def flights(self) -> list[FlightView]:
+        """The flights on the ticket. """
+        network = self.network
+        return [FlightView(network, flight) for flight in
+                network.ticket_flights[network.ticket_flight_start[self.row]:network.ticket_flight_start[self.row + 1]]]
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether other views the same ticket as this view. """
+        return isinstance(other, TicketView) and self.network is other.network and self.row == other.row
+
+    def __hash__(self) -> int:
+        """Return the hash of the row viewed. """
+        return hash(self.row)
+
+
+class FlightView(Flight):
+    """
+    A flight stored in a row of a ColumnarNetwork. Two views are equal if they view the same row of the same network.
+
+    Instance Attributes:
+        - network: The network storing the flight.
+        - row: The row of the flight in the flight_* columns of network.
+    """
+    __slots__ = ('network', 'row')
+    network: ColumnarNetwork
+    row: int
+
+    def __init__(self, network: ColumnarNetwork, row: int) -> None:
+        """Initialize a view of the given row of network. """
+        # pylint: disable=super-init-not-called
+        self.network = network
+        self.row = row
+
+    @property
+    def airline(self) -> str:
+        """The airline operating the flight. """
+        return self.network.airlines[self.network.flight_airline[self.row]]
+
+    @property
+    def flight_id(self) -> str:
+        """The unique identifier of the flight. """
+        network = self.network
+        start, end = network.flight_id_start[self.row], network.flight_id_start[self.row + 1]
+        return str(network.flight_ids[start:end], 'ascii')
+
+    @property
+    def origin(self) -> Airport:
+        """The departure airport of the flight. """
+        return self.network.airport_list[self.network.flight_origin[self.row]]
+
+    @property
+    def destination(self) -> Airport:
+        """The destination airport of the flight. """
+        return self.network.airport_list[self.network.flight_destination[self.row]]
+
+    @property
+    def departure_minute(self) -> int:
+        """The departure time as the number of minutes since Monday 00:00. """
+        return self.network.flight_departure[self.row]
+
+    @property
+    def arrival_minute(self) -> int:
+        """The arrival time as the number of minutes since Monday 00:00 of the departure week. """
+        return self.network.flight_arrival[self.row]
+
+    @property
+    def departure_time(self) -> DayHourMinute:
+        """The day of the week, hour and minute of the departure time. """
+        return day_hour_minute(self.departure_minute)
+
+    @property
+    def arrival_time(self) -> DayHourMinute:
+        """The day of the week, hour and minute of the arrival time. """
+        return day_hour_minute(self.arrival_minute)
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether other views the same flight as this view. """
+        return isinstance(other, FlightView) and self.network is other.network and self.row == other.row
+
+    def __hash__(self) -> int:
+        """Return the hash of the row viewed. """
+        return hash(self.row)
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['datetime', 'collections'],
+        'extra-imports': ['datetime', 'collections', 'itertools', 'array', 'os', 'sys', 'json', 'mmap', 'struct'],
         'disable': ['unused-import', 'too-many-branches', 'extra-imports', 'E9992', 'E9997', 'too-many-arguments'],
     })
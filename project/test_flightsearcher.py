@@ -0,0 +1,599 @@
+""" Tests of the flight searchers on small networks, checked against a brute-force search of every flight path
+"""
+from __future__ import annotations
+
+import random
+from datetime import datetime
+
+import pytest
+
+from network import IATACode, DayHourMinute, MIN_LAYOVER_TIME, MAX_LAYOVER_TIME, MAX_LAYOVER, TOP_K_RESULTS
+from network import MINUTES_PER_DAY, MINUTES_PER_WEEK
+from network import Network, ColumnarNetwork, Airport, Flight, Ticket, TicketView
+import flightsearcher
+from flightsearcher import NaiveFlightSearcher, DijkstraFlightSearcher, AStarFlightSearcher
+from flightsearcher import ConnectionScanFlightSearcher, RaptorFlightSearcher, ParetoFlightSearcher
+from flightsearcher import KShortestFlightSearcher, SearchBudget, SearchStats
+from landmark import PrunedLandmarkLabelling
+
+MONDAY = datetime(2023, 4, 3)
+SUNDAY = datetime(2023, 4, 9)
+SEEDS = range(8)
+AIRPORTS = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE', 'FFF']
+QUERIES = [(source, destination) for source in AIRPORTS[:3] for destination in AIRPORTS[3:]]
+
+# The searchers that return the best flight paths that visit each airport at most once, like a brute-force search.
+EXACT_SEARCHERS = [NaiveFlightSearcher, ConnectionScanFlightSearcher, RaptorFlightSearcher, KShortestFlightSearcher]
+# Every searcher, including those that only return good flight paths. Pareto only returns non-dominated flight paths,
+# and Dijkstra and A* keep a bounded number of states per airport that may visit an airport twice.
+ALL_SEARCHERS = [NaiveFlightSearcher, DijkstraFlightSearcher, AStarFlightSearcher, ConnectionScanFlightSearcher,
+                 RaptorFlightSearcher, ParetoFlightSearcher, KShortestFlightSearcher]
+# The searchers that never return a flight path visiting an airport twice.
+LOOP_FREE_SEARCHERS = [NaiveFlightSearcher, ConnectionScanFlightSearcher, RaptorFlightSearcher, ParetoFlightSearcher,
+                       KShortestFlightSearcher]
+
+Itinerary = tuple[float, list[tuple[str, IATACode, IATACode, int, int]]]
+
+
+def day_hour_minute_of(minute: int) -> DayHourMinute:
+    """Return the time of the week that is the given number of minutes after Monday 00:00, wrapping around the week.
+    """
+    minute %= MINUTES_PER_WEEK
+    return DayHourMinute(minute // MINUTES_PER_DAY + 1, minute % MINUTES_PER_DAY // 60, minute % 60)
+
+
+def build_network(airports: list[IATACode], itineraries: list[Itinerary]) -> Network:
+    """Return a network of the given airports and itineraries. Each itinerary is a price and a list of flights
+    (flight_id, origin, destination, departure, arrival), with times in minutes since Monday 00:00.
+    """
+    network = Network()
+    for iata in airports:
+        network.add_airport(Airport(iata=iata, name=f'{iata} Airport', city=f'{iata} City'))
+
+    tickets = []
+    for price, flights in itineraries:
+        flights = [Flight('Air X', flight_id, network.airports[origin], network.airports[destination],
+                          day_hour_minute_of(departure), day_hour_minute_of(arrival))
+                   for flight_id, origin, destination, departure, arrival in flights]
+        tickets.append(Ticket(flights[0].origin, flights[-1].destination, flights[0].departure_time,
+                              flights[-1].arrival_time, flights, price))
+    for ticket in sorted(tickets, key=lambda x: x.departure_minute):
+        ticket.origin.add_ticket(ticket)
+    return network
+
+
+def random_itineraries(seed: int, num_itineraries: int = 160) -> list[Itinerary]:
+    """Return num_itineraries random itineraries of one to three flights between AIRPORTS, departing on Monday or
+    Tuesday.
+    """
+    rng = random.Random(seed)
+    itineraries = []
+    for i in range(num_itineraries):
+        airports = rng.sample(AIRPORTS, rng.choice([2, 2, 2, 3, 3, 4]))
+        time = rng.randrange(0, 2 * MINUTES_PER_DAY, 15)
+        flights = []
+        for j, (origin, destination) in enumerate(zip(airports, airports[1:])):
+            arrival = time + rng.randrange(60, 300, 15)
+            flights.append((f'{i}-{j}', origin, destination, time, arrival))
+            time = arrival + rng.randrange(MIN_LAYOVER_TIME, 300, 15)
+        itineraries.append((float(rng.randrange(50, 500, 10)), flights))
+    return itineraries
+
+
+def random_network(seed: int) -> Network:
+    """Return the network of AIRPORTS and the random itineraries of seed."""
+    return build_network(AIRPORTS, random_itineraries(seed))
+
+
+def all_flight_paths(network: Network, source: IATACode, destination: IATACode,
+                     departure_time: datetime = MONDAY) -> list[tuple[int, float, tuple[str, ...]]]:
+    """Return the (arrival, price, flight ids) of every flight path from source to destination departing on the day
+    of departure_time that visits each airport at most once, found by trying every ticket of every airport. arrival
+    is counted in minutes since Monday 00:00 of the week of departure_time.
+    """
+    first_day = departure_time.weekday() * MINUTES_PER_DAY
+    paths = []
+
+    def extend(airport: Airport, time: int, visited: set[Airport], price: float, flights: tuple[str, ...]) -> None:
+        if airport.iata == destination:
+            paths.append((time, price, flights))
+            return
+        for ticket in airport.tickets:
+            if flights == ():
+                wait = ticket.departure_minute - first_day
+                if not 0 <= wait < MINUTES_PER_DAY:
+                    continue
+            else:
+                wait = (ticket.departure_minute - time) % MINUTES_PER_WEEK
+                if not MIN_LAYOVER_TIME <= wait <= MAX_LAYOVER_TIME:
+                    continue
+            next_visited = visited | {flight.destination for flight in ticket.flights}
+            if len(next_visited) == len(visited) + len(ticket.flights) and len(next_visited) <= MAX_LAYOVER + 1:
+                extend(ticket.destination, time + wait + ticket.arrival_minute - ticket.departure_minute,
+                       next_visited, price + ticket.price, flights + tuple(f.flight_id for f in ticket.flights))
+
+    source_airport = network.airports[source]
+    extend(source_airport, first_day, {source_airport}, 0.0, ())
+    return paths
+
+
+def flight_ids(ticket: Ticket) -> tuple[str, ...]:
+    """Return the flight ids of the flights of ticket."""
+    return tuple(flight.flight_id for flight in ticket.flights)
+
+
+def assert_valid(tickets: list[Ticket], source: IATACode, destination: IATACode, departure_time: datetime) -> None:
+    """Check that every ticket goes from source to destination, leaves on the day of departure_time and is made of at
+    most `MAX_LAYOVER` flights, each leaving from where the one before landed.
+    """
+    first_day = departure_time.weekday() * MINUTES_PER_DAY
+    for ticket in tickets:
+        assert ticket.origin.iata == source and ticket.destination.iata == destination
+        assert first_day <= ticket.departure_minute < first_day + MINUTES_PER_DAY
+        assert 1 <= len(ticket.flights) <= MAX_LAYOVER
+        assert ticket.flights[0].origin == ticket.origin and ticket.flights[-1].destination == ticket.destination
+        assert all(flight.destination == next_flight.origin
+                   for flight, next_flight in zip(ticket.flights, ticket.flights[1:]))
+
+
+def assert_loop_free(tickets: list[Ticket]) -> None:
+    """Check that no ticket visits an airport twice."""
+    for ticket in tickets:
+        airports = [ticket.origin] + [flight.destination for flight in ticket.flights]
+        assert len(set(airports)) == len(airports)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('searcher_class', EXACT_SEARCHERS)
+def test_exact_searchers_match_brute_force(searcher_class: type, seed: int) -> None:
+    network = random_network(seed)
+    searcher = searcher_class(network)
+    for source, destination in QUERIES:
+        paths = all_flight_paths(network, source, destination)
+        cheapest = searcher.search_cheapest_flight(source, destination, MONDAY)
+        shortest = searcher.search_shortest_flight(source, destination, MONDAY)
+        assert_valid(cheapest + shortest, source, destination, MONDAY)
+        assert_loop_free(cheapest + shortest)
+        assert [t.price for t in cheapest] == sorted(price for _, price, _ in paths)[:TOP_K_RESULTS]
+        assert [t.arrival_minute for t in shortest] == sorted(arrival for arrival, _, _ in paths)[:TOP_K_RESULTS]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('searcher_class', ALL_SEARCHERS)
+def test_searchers_return_valid_sorted_tickets(searcher_class: type, seed: int) -> None:
+    network = random_network(seed)
+    searcher = searcher_class(network)
+    for source, destination in QUERIES:
+        paths = all_flight_paths(network, source, destination)
+        cheapest = searcher.search_cheapest_flight(source, destination, MONDAY)
+        shortest = searcher.search_shortest_flight(source, destination, MONDAY)
+        assert_valid(cheapest + shortest, source, destination, MONDAY)
+        assert len(cheapest) <= TOP_K_RESULTS and len(shortest) <= TOP_K_RESULTS
+        assert [t.price for t in cheapest] == sorted(t.price for t in cheapest)
+        assert [t.arrival_minute for t in shortest] == sorted(t.arrival_minute for t in shortest)
+        assert (cheapest == []) == (paths == []) and (shortest == []) == (paths == [])
+        if paths:
+            assert cheapest[0].price <= min(price for _, price, _ in paths)
+            assert shortest[0].arrival_minute <= min(arrival for arrival, _, _ in paths)
+
+
+@pytest.mark.parametrize('searcher_class', ALL_SEARCHERS)
+def test_layover_must_be_within_the_window(searcher_class: type) -> None:
+    # SSS to MMM lands at 10:00, and the tickets on to DDD leave 89, 90, 720 and 721 minutes later.
+    network = build_network(['SSS', 'MMM', 'DDD'], [
+        (100.0, [('S1', 'SSS', 'MMM', 480, 600)]),
+        (10.0, [('D89', 'MMM', 'DDD', 689, 749)]),
+        (30.0, [('D90', 'MMM', 'DDD', 690, 750)]),
+        (20.0, [('D720', 'MMM', 'DDD', 1320, 1380)]),
+        (5.0, [('D721', 'MMM', 'DDD', 1321, 1381)]),
+    ])
+    searcher = searcher_class(network)
+    assert [flight_ids(t) for t in searcher.search_cheapest_flight('SSS', 'DDD', MONDAY)] == \
+           [('S1', 'D720'), ('S1', 'D90')]
+    assert [flight_ids(t) for t in searcher.search_shortest_flight('SSS', 'DDD', MONDAY)] == \
+           [('S1', 'D90'), ('S1', 'D720')]
+
+
+@pytest.mark.parametrize('searcher_class', ALL_SEARCHERS)
+def test_first_flight_departs_on_the_query_day(searcher_class: type) -> None:
+    network = build_network(['SSS', 'DDD'], [
+        (10.0, [('SUN', 'SSS', 'DDD', MINUTES_PER_WEEK - 1, 60)]),
+        (20.0, [('MON0', 'SSS', 'DDD', 0, 60)]),
+        (15.0, [('MON1', 'SSS', 'DDD', MINUTES_PER_DAY - 1, MINUTES_PER_DAY + 60)]),
+        (40.0, [('TUE', 'SSS', 'DDD', MINUTES_PER_DAY, MINUTES_PER_DAY + 60)]),
+    ])
+    tickets = searcher_class(network).search_cheapest_flight('SSS', 'DDD', MONDAY)
+    assert sorted(flight_ids(t) for t in tickets) == [('MON0',), ('MON1',)]
+
+
+@pytest.mark.parametrize('searcher_class', ALL_SEARCHERS)
+def test_layover_wraps_around_the_week(searcher_class: type) -> None:
+    # Land on Sunday at 20:00 and leave again on Monday at 02:00 of the following week.
+    sunday = 6 * MINUTES_PER_DAY
+    network = build_network(['SSS', 'MMM', 'DDD'], [
+        (100.0, [('S1', 'SSS', 'MMM', sunday + 18 * 60, sunday + 20 * 60)]),
+        (50.0, [('M1', 'MMM', 'DDD', 2 * 60, 4 * 60)]),
+    ])
+    tickets = searcher_class(network).search_shortest_flight('SSS', 'DDD', SUNDAY)
+    assert [(flight_ids(t), t.price) for t in tickets] == [(('S1', 'M1'), 150.0)]
+    assert tickets[0].arrival_minute == MINUTES_PER_WEEK + 4 * 60
+
+
+def test_naive_shortest_counts_from_the_departure_day() -> None:
+    # Searching on Sunday, the flight landing on Monday of the following week lands after the one landing on Sunday.
+    sunday = 6 * MINUTES_PER_DAY
+    network = build_network(['SSS', 'DDD'], [
+        (100.0, [('LATE', 'SSS', 'DDD', sunday + 20 * 60, 2 * 60)]),
+        (100.0, [('EARLY', 'SSS', 'DDD', sunday + 10 * 60, sunday + 14 * 60)]),
+    ])
+    tickets = NaiveFlightSearcher(network).search_shortest_flight('SSS', 'DDD', SUNDAY)
+    assert [flight_ids(t) for t in tickets] == [('EARLY',), ('LATE',)]
+
+
+def make_loop_network(num_cheap: int = 1) -> Network:
+    """Return a network in which the cheapest ways to reach BBB pass through CCC, so that they cannot be taken on to
+    CCC, and the only flight path from SSS to CCC is the dearer one through AAA and BBB. There are num_cheap tickets
+    through CCC, all landing at BBB at the same time.
+    """
+    itineraries = [(100.0 + i, [(f'{i}a', 'SSS', 'CCC', 480, 540), (f'{i}b', 'CCC', 'BBB', 600, 660)])
+                   for i in range(num_cheap)]
+    itineraries.append((200.0, [('Aa', 'SSS', 'AAA', 420, 510), ('Ab', 'AAA', 'BBB', 570, 660)]))
+    itineraries.append((50.0, [('B', 'BBB', 'CCC', 780, 840)]))
+    return build_network(['SSS', 'AAA', 'BBB', 'CCC'], itineraries)
+
+
+@pytest.mark.parametrize('searcher_class', LOOP_FREE_SEARCHERS)
+def test_flight_paths_do_not_revisit_an_airport(searcher_class: type) -> None:
+    searcher = searcher_class(make_loop_network())
+    for tickets in [searcher.search_cheapest_flight('SSS', 'CCC', MONDAY),
+                    searcher.search_shortest_flight('SSS', 'CCC', MONDAY)]:
+        assert [(flight_ids(t), t.price) for t in tickets] == [(('Aa', 'Ab', 'B'), 250.0)]
+
+
+@pytest.mark.parametrize('searcher_class', [NaiveFlightSearcher, ConnectionScanFlightSearcher, RaptorFlightSearcher])
+def test_labels_through_other_airports_are_kept(searcher_class: type) -> None:
+    # `TOP_K_RESULTS` cheaper labels through CCC reach BBB at the same time as the only one that can go on to CCC.
+    searcher = searcher_class(make_loop_network(num_cheap=TOP_K_RESULTS))
+    for tickets in [searcher.search_cheapest_flight('SSS', 'CCC', MONDAY),
+                    searcher.search_shortest_flight('SSS', 'CCC', MONDAY)]:
+        assert [(flight_ids(t), t.price) for t in tickets] == [(('Aa', 'Ab', 'B'), 250.0)]
+
+
+def make_crowded_network() -> Network:
+    """Return a network in which more than `TOP_K_RESULTS` cheap tickets of two flights land at BBB at the same time as
+    a dear direct ticket, and only the direct ticket leaves room for the two flights on to DDD.
+    """
+    itineraries = [(100.0 + i, [(f'{i}a', 'SSS', 'AAA', 480, 540), (f'{i}b', 'AAA', 'BBB', 600, 660)])
+                   for i in range(TOP_K_RESULTS + 2)]
+    itineraries.append((500.0, [('DIRECT', 'SSS', 'BBB', 540, 660)]))
+    itineraries.append((50.0, [('Ba', 'BBB', 'CCC', 780, 840), ('Bb', 'CCC', 'DDD', 900, 960)]))
+    return build_network(['SSS', 'AAA', 'BBB', 'CCC', 'DDD'], itineraries)
+
+
+@pytest.mark.parametrize('searcher_class', EXACT_SEARCHERS)
+def test_labels_are_kept_for_each_number_of_flights(searcher_class: type) -> None:
+    searcher = searcher_class(make_crowded_network())
+    for tickets in [searcher.search_cheapest_flight('SSS', 'DDD', MONDAY),
+                    searcher.search_shortest_flight('SSS', 'DDD', MONDAY)]:
+        assert [(flight_ids(t), t.price) for t in tickets] == [(('DIRECT', 'Ba', 'Bb'), 550.0)]
+
+    tickets = searcher.search_cheapest_flight('SSS', 'BBB', MONDAY)
+    assert [t.price for t in tickets] == [100.0 + i for i in range(TOP_K_RESULTS)]
+
+
+def test_connection_scan_stops_at_the_kth_arrival() -> None:
+    # The tickets leaving after the k-th arrival at DDD cannot arrive earlier, so the scan may stop before them.
+    itineraries = [(100.0, [(f'D{i}', 'SSS', 'DDD', 60 * i, 60 * i + 30)]) for i in range(TOP_K_RESULTS + 5)]
+    network = build_network(['SSS', 'DDD'], itineraries)
+    tickets = ConnectionScanFlightSearcher(network).search_shortest_flight('SSS', 'DDD', MONDAY)
+    assert [flight_ids(t) for t in tickets] == [(f'D{i}',) for i in range(TOP_K_RESULTS)]
+
+
+def test_connection_scan_creates_views_only_for_the_connections_taken(monkeypatch) -> None:
+    network = build_columnar_network(AIRPORTS, random_itineraries(0))
+    searcher = ConnectionScanFlightSearcher(network)
+    departure_minutes, connections = searcher.sorted_connections()
+    assert sorted(connections) == list(range(len(network.ticket_price)))
+    assert list(departure_minutes) == [network.ticket_departure[row] for row in connections] == \
+           sorted(network.ticket_departure)
+
+    created = []
+
+    class CountedTicketView(TicketView):
+        def __init__(self, flight_network: ColumnarNetwork, row: int) -> None:
+            created.append(row)
+            TicketView.__init__(self, flight_network, row)
+
+    monkeypatch.setattr(flightsearcher, 'TicketView', CountedTicketView)
+    tickets = searcher.search_cheapest_flight('AAA', 'DDD', MONDAY)
+    expected = ConnectionScanFlightSearcher(random_network(0)).search_cheapest_flight('AAA', 'DDD', MONDAY)
+    assert [describe(t) for t in tickets] == [describe(t) for t in expected]
+    assert 0 < len(created) < len(connections) // 2
+
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_raptor_search_by_stops_matches_brute_force(seed: int) -> None:
+    network = random_network(seed)
+    searcher = RaptorFlightSearcher(network)
+    for source, destination in QUERIES:
+        paths = all_flight_paths(network, source, destination)
+        by_duration, by_price = searcher.search_by_stops(source, destination, MONDAY)
+        assert len(by_duration) == len(by_price) == MAX_LAYOVER
+        for k in range(MAX_LAYOVER):
+            within = [path for path in paths if len(path[2]) <= k + 1]
+            assert [t.price for t in by_price[k]] == sorted(price for _, price, _ in within)[:TOP_K_RESULTS]
+            assert [t.arrival_minute for t in by_duration[k]] == \
+                   sorted(arrival for arrival, _, _ in within)[:TOP_K_RESULTS]
+            assert all(len(t.flights) <= k + 1 for t in by_duration[k] + by_price[k])
+
+
+def pareto_front(paths: list[tuple[int, float, tuple[str, ...]]]) -> list[tuple[int, float, int]]:
+    """Return the sorted (arrival, price, number of flights) of the flight paths that no other path beats in all three.
+    """
+    criteria = {(arrival, price, len(flights)) for arrival, price, flights in paths}
+    return sorted(c for c in criteria if not any(o != c and all(x <= y for x, y in zip(o, c)) for o in criteria))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_pareto_matches_brute_force_front(seed: int) -> None:
+    network = random_network(seed)
+    searcher = ParetoFlightSearcher(network)
+    for source, destination in QUERIES:
+        front = pareto_front(all_flight_paths(network, source, destination))
+        tickets = searcher.search_pareto_flight(source, destination, MONDAY)
+        assert_valid(tickets, source, destination, MONDAY)
+        assert_loop_free(tickets)
+        assert sorted((t.arrival_minute, t.price, len(t.flights)) for t in tickets) == front
+
+
+def test_pareto_drops_dominated_tickets() -> None:
+    network = build_network(['SSS', 'MMM', 'DDD'], [
+        (300.0, [('FAST', 'SSS', 'DDD', 480, 600)]),
+        (200.0, [('CHEAP', 'SSS', 'DDD', 480, 720)]),
+        (250.0, [('DOMINATED', 'SSS', 'DDD', 480, 780)]),
+        (90.0, [('Ma', 'SSS', 'MMM', 420, 480), ('Mb', 'MMM', 'DDD', 570, 900)]),
+    ])
+    tickets = ParetoFlightSearcher(network).search_pareto_flight('SSS', 'DDD', MONDAY)
+    assert [flight_ids(t) for t in tickets] == [('FAST',), ('CHEAP',), ('Ma', 'Mb')]
+
+
+def test_pareto_labels_with_other_airports_are_kept() -> None:
+    # The cheaper label at BBB through CCC does not dominate the dearer one, which can still go on to CCC.
+    tickets = ParetoFlightSearcher(make_loop_network(num_cheap=3)).search_pareto_flight('SSS', 'CCC', MONDAY)
+    assert [(flight_ids(t), t.price) for t in tickets] == [(('Aa', 'Ab', 'B'), 250.0)]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_k_shortest_with_large_k_finds_every_flight_path(seed: int) -> None:
+    network = random_network(seed)
+    searcher = KShortestFlightSearcher(network, k=10000)
+    for source, destination in QUERIES:
+        paths = all_flight_paths(network, source, destination)
+        tickets = searcher.search_cheapest_flight(source, destination, MONDAY)
+        assert sorted(flight_ids(t) for t in tickets) == sorted(flights for _, _, flights in paths)
+        assert [t.price for t in tickets] == sorted(t.price for t in tickets)
+
+
+def test_k_shortest_returns_k_paths_in_order() -> None:
+    # Five paths of prices 150, 160, 165, 175 and 300. The second and third deviate from the first at one ticket.
+    network = build_network(['SSS', 'MMM', 'DDD'], [
+        (100.0, [('S1', 'SSS', 'MMM', 480, 540)]),
+        (110.0, [('S2', 'SSS', 'MMM', 480, 545)]),
+        (50.0, [('M1', 'MMM', 'DDD', 700, 760)]),
+        (65.0, [('M2', 'MMM', 'DDD', 710, 770)]),
+        (300.0, [('DIRECT', 'SSS', 'DDD', 480, 600)]),
+    ])
+    tickets = KShortestFlightSearcher(network, k=3).search_cheapest_flight('SSS', 'DDD', MONDAY)
+    assert [(flight_ids(t), t.price) for t in tickets] == \
+           [(('S1', 'M1'), 150.0), (('S2', 'M1'), 160.0), (('S1', 'M2'), 165.0)]
+
+
+def test_dijkstra_keeps_the_k_best_states_of_an_airport() -> None:
+    # More than `TOP_K_RESULTS` tickets reach MMM, and every one of them can go on to DDD with the same ticket.
+    itineraries = [(100.0 + 10 * i, [(f'S{i}', 'SSS', 'MMM', 480 - i, 540)]) for i in range(TOP_K_RESULTS + 2)]
+    itineraries.append((50.0, [('M', 'MMM', 'DDD', 700, 760)]))
+    searcher = DijkstraFlightSearcher(build_network(['SSS', 'MMM', 'DDD'], itineraries))
+    tickets = searcher.search_cheapest_flight('SSS', 'DDD', MONDAY)
+    assert [t.price for t in tickets] == [150.0 + 10 * i for i in range(TOP_K_RESULTS)]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_a_star_lower_bounds_are_admissible(seed: int) -> None:
+    network = random_network(seed)
+    searcher = AStarFlightSearcher(network)
+    for destination in AIRPORTS:
+        destination_airport = network.airports[destination]
+        price_bounds = searcher._lower_bounds(destination_airport, True)
+        duration_bounds = searcher._lower_bounds(destination_airport, False)
+        assert price_bounds[destination_airport] == 0 and duration_bounds[destination_airport] == 0
+        for source in AIRPORTS:
+            if source == destination:
+                continue
+            for departure_time in [MONDAY, datetime(2023, 4, 4)]:
+                for arrival, price, _ in all_flight_paths(network, source, destination, departure_time):
+                    # A flight path reaching source after an earlier ticket waits for the layover before going on.
+                    source_airport = network.airports[source]
+                    assert price_bounds[source_airport] <= price
+                    departure = min(t.departure_minute for t in source_airport.tickets
+                                    if t.departure_minute >= departure_time.weekday() * MINUTES_PER_DAY)
+                    assert duration_bounds[source_airport] <= arrival - departure + MIN_LAYOVER_TIME
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_a_star_finds_the_best_flight_of_dijkstra(seed: int) -> None:
+    network = random_network(seed)
+    dijkstra, a_star = DijkstraFlightSearcher(network), AStarFlightSearcher(network)
+    for source, destination in QUERIES:
+        assert [t.price for t in a_star.search_cheapest_flight(source, destination, MONDAY)[:1]] == \
+               [t.price for t in dijkstra.search_cheapest_flight(source, destination, MONDAY)[:1]]
+        assert [t.arrival_minute for t in a_star.search_shortest_flight(source, destination, MONDAY)[:1]] == \
+               [t.arrival_minute for t in dijkstra.search_shortest_flight(source, destination, MONDAY)[:1]]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('searcher_class', EXACT_SEARCHERS + [ParetoFlightSearcher])
+def test_landmark_index_does_not_change_the_results(searcher_class: type, seed: int) -> None:
+    network = random_network(seed)
+    searcher, pruned = searcher_class(network), searcher_class(network)
+    pruned.use_landmark_index(PrunedLandmarkLabelling.from_network(network))
+    for source, destination in QUERIES:
+        for search in ['search_cheapest_flight', 'search_shortest_flight']:
+            assert [(flight_ids(t), t.price) for t in getattr(pruned, search)(source, destination, MONDAY)] == \
+                   [(flight_ids(t), t.price) for t in getattr(searcher, search)(source, destination, MONDAY)]
+
+
+def test_landmark_index_prunes_unreachable_airports() -> None:
+    # DDD is four flights away from SSS, one more than a flight path may take.
+    network = build_network(['SSS', 'AAA', 'BBB', 'CCC', 'DDD'], [
+        (10.0, [('1', 'SSS', 'AAA', 480, 540)]),
+        (10.0, [('2', 'AAA', 'BBB', 660, 720)]),
+        (10.0, [('3', 'BBB', 'CCC', 840, 900)]),
+        (10.0, [('4', 'CCC', 'DDD', 1020, 1080)]),
+    ])
+    searcher = NaiveFlightSearcher(network)
+    searcher.use_landmark_index(PrunedLandmarkLabelling.from_network(network))
+    assert searcher.search_cheapest_flight('SSS', 'DDD', MONDAY) == []
+    assert [t.price for t in searcher.search_cheapest_flight('SSS', 'CCC', MONDAY)] == [30.0]
+
+
+def describe(ticket: Ticket) -> tuple:
+    """Return the airports, times and price of ticket."""
+    return (tuple(flight.origin.iata for flight in ticket.flights), ticket.destination.iata, ticket.departure_minute,
+            ticket.arrival_minute, ticket.price)
+
+
+def build_columnar_network(airports: list[IATACode], itineraries: list[Itinerary]) -> ColumnarNetwork:
+    """Return the columnar network of the given airports and itineraries, as in build_network."""
+    network = ColumnarNetwork()
+    for iata in airports:
+        network.add_airport(Airport(iata=iata, name=f'{iata} Airport', city=f'{iata} City'))
+    for price, flights in itineraries:
+        network.add_itinerary(price, [(flight_id, origin, destination, 'Air X', departure % MINUTES_PER_WEEK,
+                                       arrival % MINUTES_PER_WEEK)
+                                      for flight_id, origin, destination, departure, arrival in flights])
+    network.build()
+    return network
+
+
+@pytest.mark.parametrize('seed', SEEDS[:3])
+@pytest.mark.parametrize('searcher_class', ALL_SEARCHERS)
+def test_columnar_network_gives_the_same_tickets(searcher_class: type, seed: int) -> None:
+    network = random_network(seed)
+    columnar = build_columnar_network(AIRPORTS, random_itineraries(seed))
+    searcher, columnar_searcher = searcher_class(network), searcher_class(columnar)
+    for source, destination in QUERIES:
+        for search in ['search_cheapest_flight', 'search_shortest_flight']:
+            assert [describe(t) for t in getattr(columnar_searcher, search)(source, destination, MONDAY)] == \
+                   [describe(t) for t in getattr(searcher, search)(source, destination, MONDAY)]
+
+
+def test_naive_keeps_the_best_paths_found_last() -> None:
+    # The dearest tickets depart first, so the heap is full of them before the cheaper ones are found.
+    itineraries = [(500.0 - 10 * i, [(f'D{i}', 'SSS', 'DDD', 60 * i, 1200 - 10 * i)])
+                   for i in range(TOP_K_RESULTS + 5)]
+    searcher = NaiveFlightSearcher(build_network(['SSS', 'DDD'], itineraries))
+    assert [t.price for t in searcher.search_cheapest_flight('SSS', 'DDD', MONDAY)] == \
+           [500.0 - 10 * i for i in range(TOP_K_RESULTS + 4, 4, -1)]
+    assert [t.arrival_minute for t in searcher.search_shortest_flight('SSS', 'DDD', MONDAY)] == \
+           [1200 - 10 * i for i in range(TOP_K_RESULTS + 4, 4, -1)]
+
+
+def test_naive_breaks_ties_in_the_order_found() -> None:
+    itineraries = [(100.0, [(f'D{i}', 'SSS', 'DDD', 60 * i, 60 * i + 60)]) for i in range(TOP_K_RESULTS + 2)]
+    searcher = NaiveFlightSearcher(build_network(['SSS', 'DDD'], itineraries))
+    assert [flight_ids(t) for t in searcher.search_cheapest_flight('SSS', 'DDD', MONDAY)] == \
+           [(f'D{i}',) for i in range(TOP_K_RESULTS)]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_naive_cache_gives_the_same_paths(seed: int) -> None:
+    network = random_network(seed)
+    cached, uncached = NaiveFlightSearcher(network), NaiveFlightSearcher(network, cache_size=0)
+    for _ in range(2):
+        for source, destination in QUERIES:
+            for search in ['search_cheapest_flight', 'search_shortest_flight']:
+                assert [flight_ids(t) for t in getattr(cached, search)(source, destination, MONDAY)] == \
+                       [flight_ids(t) for t in getattr(uncached, search)(source, destination, MONDAY)]
+
+
+def test_naive_cached_continuations_skip_visited_airports() -> None:
+    # Both tickets reach MMM at the same time, so they share the cached continuations of MMM, but only the one
+    # through YYY may go on to XXX.
+    network = build_network(['SSS', 'XXX', 'YYY', 'MMM'], [
+        (100.0, [('Xa', 'SSS', 'XXX', 480, 540), ('Xb', 'XXX', 'MMM', 600, 660)]),
+        (100.0, [('Ya', 'SSS', 'YYY', 480, 540), ('Yb', 'YYY', 'MMM', 600, 660)]),
+        (50.0, [('M', 'MMM', 'XXX', 780, 840)]),
+    ])
+    cached, uncached = NaiveFlightSearcher(network), NaiveFlightSearcher(network, cache_size=0)
+    for searcher in [cached, uncached]:
+        assert [flight_ids(t) for t in searcher.search_cheapest_flight('SSS', 'XXX', MONDAY)] == [('Ya', 'Yb', 'M')]
+
+
+@pytest.mark.parametrize('max_expansions', [0, 1, 5, 50])
+@pytest.mark.parametrize('searcher_class', ALL_SEARCHERS)
+def test_budget_stops_the_search(searcher_class: type, max_expansions: int) -> None:
+    network = random_network(0)
+    for source, destination in QUERIES:
+        unlimited = SearchBudget()
+        expected = searcher_class(network).search_cheapest_flight(source, destination, MONDAY, budget=unlimited)
+        assert unlimited.optimal
+
+        budget = SearchBudget(max_expansions=max_expansions)
+        tickets = searcher_class(network).search_cheapest_flight(source, destination, MONDAY, budget=budget)
+        assert_valid(tickets, source, destination, MONDAY)
+        assert budget.optimal == (unlimited.expansions <= max_expansions)
+        if budget.optimal:
+            assert [t.price for t in tickets] == [t.price for t in expected]
+
+
+def test_budget_deadline_stops_the_search() -> None:
+    network = build_network(AIRPORTS, random_itineraries(0, num_itineraries=400))
+    budget = SearchBudget(deadline_ms=0)
+    tickets = NaiveFlightSearcher(network, cache_size=0).search_cheapest_flight('AAA', 'DDD', MONDAY, budget=budget)
+    assert_valid(tickets, 'AAA', 'DDD', MONDAY)
+    assert not budget.optimal
+
+
+@pytest.mark.parametrize('searcher_class', ALL_SEARCHERS)
+def test_stats_count_the_search(searcher_class: type) -> None:
+    network = random_network(1)
+    stats = SearchStats()
+    searcher_class(network).search_cheapest_flight('AAA', 'DDD', MONDAY, stats=stats)
+    counts = stats.to_dict()
+    assert set(counts) == {'nodes_popped', 'heap_pushes', 'tickets_scanned', 'rejected_layover', 'rejected_stops',
+                           'backtrack_time', 'wall_time'}
+    for name in ['nodes_popped', 'heap_pushes', 'tickets_scanned', 'rejected_layover', 'rejected_stops']:
+        assert type(counts[name]) is int and counts[name] >= 0
+    assert counts['nodes_popped'] > 0 and counts['tickets_scanned'] > 0
+    assert 0 <= counts['backtrack_time'] <= counts['wall_time']
+
+    budget = SearchBudget(max_expansions=3)
+    stats = SearchStats()
+    searcher_class(network).search_cheapest_flight('AAA', 'DDD', MONDAY, budget=budget, stats=stats)
+    assert stats.nodes_popped <= 3
+
+
+def test_stats_add_up_over_searches() -> None:
+    network = random_network(1)
+    searcher = DijkstraFlightSearcher(network)
+    first, both = SearchStats(), SearchStats()
+    searcher.search_cheapest_flight('AAA', 'DDD', MONDAY, stats=first)
+    searcher.search_cheapest_flight('AAA', 'DDD', MONDAY, stats=both)
+    searcher.search_cheapest_flight('AAA', 'DDD', MONDAY, stats=both)
+    assert both.nodes_popped == 2 * first.nodes_popped
+    assert both.tickets_scanned == 2 * first.tickets_scanned
+
+
+@pytest.mark.parametrize('searcher_class', [NaiveFlightSearcher, ConnectionScanFlightSearcher, RaptorFlightSearcher])
+def test_stats_count_tickets_outside_the_layover_window(searcher_class: type) -> None:
+    # The flight path landing at MMM at 10:00 cannot take the tickets leaving at 10:30 and 23:00.
+    network = build_network(['SSS', 'MMM', 'DDD'], [
+        (100.0, [('S', 'SSS', 'MMM', 480, 600)]),
+        (10.0, [('EARLY', 'MMM', 'DDD', 630, 690)]),
+        (20.0, [('OK', 'MMM', 'DDD', 720, 780)]),
+        (30.0, [('LATE', 'MMM', 'DDD', 1380, 1440)]),
+    ])
+    stats = SearchStats()
+    searcher_class(network).search_cheapest_flight('SSS', 'DDD', MONDAY, stats=stats)
+    assert stats.rejected_layover == 2
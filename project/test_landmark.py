@@ -0,0 +1,69 @@
+""" Tests of the pruned landmark labelling index, checked against a dijkstra search of the airport graph
+"""
+from __future__ import annotations
+
+from heapq import heappush, heappop
+
+import pytest
+
+from landmark import METRICS, PrunedLandmarkLabelling
+from network import IATACode, MAX_LAYOVER
+from test_flightsearcher import AIRPORTS, SEEDS, random_network, build_network
+
+
+def airport_graph_distances(network, source: IATACode, metric: str) -> dict[IATACode, float]:
+    """Return the distance from source to every airport it can reach in the airport graph of network, found by a
+    dijkstra search over the tickets of every airport.
+    """
+    weight = {'flights': lambda t: len(t.flights), 'price': lambda t: t.price,
+              'duration': lambda t: t.arrival_minute - t.departure_minute}[metric]
+    distances = {}
+    heap = [(0, source)]
+    while heap:
+        distance, iata = heappop(heap)
+        if iata in distances:
+            continue
+        distances[iata] = distance
+        for ticket in network.airports[iata].tickets:
+            if ticket.destination.iata not in distances:
+                heappush(heap, (distance + weight(ticket), ticket.destination.iata))
+    return distances
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_distances_match_dijkstra(seed: int) -> None:
+    network = random_network(seed)
+    index = PrunedLandmarkLabelling.from_network(network)
+    for metric in METRICS:
+        expected = {source: airport_graph_distances(network, source, metric) for source in AIRPORTS}
+        for destination in AIRPORTS:
+            assert index.distances_to(destination, metric) == \
+                   {source: distances[destination] for source, distances in expected.items()
+                    if destination in distances}
+            for source in AIRPORTS:
+                assert index.distance(source, destination, metric) == \
+                       expected[source].get(destination, float('inf'))
+
+
+def test_reachable_within_a_number_of_flights() -> None:
+    # One ticket of two flights from AAA to CCC, and single flights on from CCC to DDD and EEE.
+    network = build_network(['AAA', 'BBB', 'CCC', 'DDD', 'EEE'], [
+        (10.0, [('1a', 'AAA', 'BBB', 480, 540), ('1b', 'BBB', 'CCC', 660, 720)]),
+        (10.0, [('2', 'CCC', 'DDD', 900, 960)]),
+        (10.0, [('3', 'DDD', 'EEE', 1080, 1140)]),
+    ])
+    index = PrunedLandmarkLabelling.from_network(network)
+    assert index.is_reachable('AAA', 'CCC', 2) and not index.is_reachable('AAA', 'CCC', 1)
+    assert index.is_reachable('AAA', 'DDD', MAX_LAYOVER) and not index.is_reachable('AAA', 'EEE', MAX_LAYOVER)
+    assert not index.is_reachable('CCC', 'AAA', MAX_LAYOVER)
+    assert index.distance('AAA', 'EEE', 'duration') == 240 + 60 + 60
+
+
+def test_save_and_load(tmp_path) -> None:
+    index = PrunedLandmarkLabelling.from_network(random_network(0))
+    index_file = str(tmp_path / 'network_landmark.json')
+    index.save(index_file)
+    loaded = PrunedLandmarkLabelling.load(index_file)
+    for metric in METRICS:
+        for destination in AIRPORTS:
+            assert loaded.distances_to(destination, metric) == index.distances_to(destination, metric)
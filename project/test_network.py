@@ -0,0 +1,153 @@
+""" Tests of the network, its minute-of-week times, ticket records and snapshots
+"""
+from __future__ import annotations
+
+import json
+import struct
+
+import pytest
+
+from network import SNAPSHOT_MAGIC, SNAPSHOT_VERSION, MINUTES_PER_WEEK
+from network import DayHourMinute, minute_of_week, day_hour_minute
+from network import Network, ColumnarNetwork, Airport, Flight, Ticket, FlightInterner
+
+
+def make_network() -> Network:
+    """Return a network of three airports with a direct ticket, a ticket of two flights and a ticket departing on
+    Sunday evening and landing on Monday morning of the following week.
+    """
+    network = Network()
+    yyz, yul, lhr = Airport('YYZ', 'Toronto Pearson', 'Toronto'), Airport('YUL', 'Montreal Trudeau', 'Montreal'), \
+        Airport('LHR', 'Heathrow', 'London')
+    for airport in [yyz, yul, lhr]:
+        network.add_airport(airport)
+
+    direct = Flight('Air Canada', 'AC 401', yyz, yul, DayHourMinute(1, 8, 0), DayHourMinute(1, 9, 15))
+    first = Flight('Air Canada', 'AC 403', yyz, yul, DayHourMinute(3, 10, 0), DayHourMinute(3, 11, 15))
+    second = Flight('British Airways', 'BA 94', yul, lhr, DayHourMinute(3, 18, 30), DayHourMinute(4, 6, 45))
+    overnight = Flight('British Airways', 'BA 97', lhr, yyz, DayHourMinute(7, 22, 0), DayHourMinute(1, 1, 5))
+
+    yyz.add_ticket(Ticket(yyz, yul, direct.departure_time, direct.arrival_time, [direct], 150.0))
+    yyz.add_ticket(Ticket(yyz, lhr, first.departure_time, second.arrival_time, [first, second], 820.5))
+    lhr.add_ticket(Ticket(lhr, yyz, overnight.departure_time, overnight.arrival_time, [overnight], 640.0))
+    return network
+
+
+def describe_tickets(network: Network) -> list[tuple]:
+    """Return the airports, times and price of every ticket of network and of its flights, by origin and then
+    departure.
+    """
+    return [(ticket.origin.iata, ticket.destination.iata, ticket.departure_minute, ticket.arrival_minute, ticket.price,
+             [(flight.airline, flight.origin.iata, flight.destination.iata, flight.departure_time, flight.arrival_time)
+              for flight in ticket.flights])
+            for iata in sorted(network.airports) for ticket in network.airports[iata].tickets]
+
+
+def ticket_records(network: Network) -> list[tuple]:
+    """Return the records of every ticket of network, by origin and then departure."""
+    return [ticket.to_record() for iata in sorted(network.airports) for ticket in network.airports[iata].tickets]
+
+
+def test_minute_of_week_round_trip() -> None:
+    for minute in [0, 1, 59, 60, 1439, 1440, 5000, MINUTES_PER_WEEK - 1]:
+        assert minute_of_week(day_hour_minute(minute)) == minute
+    assert minute_of_week(DayHourMinute(1, 0, 0)) == 0
+    assert minute_of_week(DayHourMinute(7, 23, 59)) == MINUTES_PER_WEEK - 1
+
+
+def test_ticket_landing_next_week_arrives_after_it_departs() -> None:
+    ticket = make_network().airports['LHR'].tickets[0]
+    assert ticket.departure_minute == minute_of_week(DayHourMinute(7, 22, 0))
+    assert ticket.arrival_minute == MINUTES_PER_WEEK + 65
+    assert ticket.flights[0].arrival_minute == ticket.arrival_minute
+
+
+def test_tickets_departing_wraps_around_the_week() -> None:
+    network = make_network()
+    lhr, yyz = network.airports['LHR'], network.airports['YYZ']
+    sunday_evening = minute_of_week(DayHourMinute(7, 20, 0))
+    assert lhr.get_tickets_departing(sunday_evening, sunday_evening + 300) == lhr.tickets
+    assert [t.price for t in yyz.get_tickets_departing(sunday_evening, sunday_evening + 12 * 60)] == [150.0]
+    assert yyz.get_tickets_departing(sunday_evening, sunday_evening + 60) == []
+    assert len(yyz.get_tickets_departing(0, MINUTES_PER_WEEK)) == 2
+
+
+def test_columnar_network_has_the_same_tickets() -> None:
+    network = make_network()
+    columnar = ColumnarNetwork.from_network(network)
+    assert describe_tickets(columnar) == describe_tickets(network)
+    assert [f.flight_id for f in columnar.airports['YYZ'].tickets[1].flights] == ['AC 403', 'BA 94']
+    assert list(columnar.airports['YYZ'].departure_minutes) == [480, 3480]
+    assert sorted((o.iata, d.iata, dep, arr, price, n) for o, d, dep, arr, price, n in columnar.ticket_summaries()) == \
+           sorted((o.iata, d.iata, dep, arr, price, n) for o, d, dep, arr, price, n in network.ticket_summaries())
+
+
+def test_interner_shares_flights_and_times() -> None:
+    interner = FlightInterner()
+    yyz, yul = Airport('YYZ', 'Toronto Pearson', 'Toronto'), Airport('YUL', 'Montreal Trudeau', 'Montreal')
+    first = interner.get_flight('Air Canada', 'AC 401', yyz, yul, (1, 8, 0), (1, 9, 15))
+    again = interner.get_flight('Air Canada', 'AC 999', yyz, yul, (1, 8, 0), (1, 9, 15))
+    other = interner.get_flight('Air Canada', 'AC 403', yyz, yul, (3, 10, 0), (3, 11, 15))
+    assert again is first and first.flight_id == 'AC 401'
+    assert other is not first
+    assert interner.get_time(1, 8, 0) is first.departure_time
+    assert (first.departure_minute, first.arrival_minute) == (480, 555)
+
+
+def test_ticket_record_round_trip() -> None:
+    network = make_network()
+    for ticket in [t for airport in network.airports.values() for t in airport.tickets]:
+        copy = Ticket.from_record(network, ticket.to_record())
+        assert copy.to_record() == ticket.to_record()
+        assert copy.origin is ticket.origin and copy.destination is ticket.destination
+        assert (copy.departure_minute, copy.arrival_minute) == (ticket.departure_minute, ticket.arrival_minute)
+
+    columnar = ColumnarNetwork.from_network(network)
+    assert ticket_records(columnar) == ticket_records(network)
+    ticket = columnar.airports['LHR'].tickets[0]
+    assert Ticket.from_record(columnar, ticket.to_record()).to_record() == ticket.to_record()
+
+
+def test_snapshot_round_trip(tmp_path) -> None:
+    network = make_network()
+    snapshot_file = str(tmp_path / 'network.snapshot')
+    network.save_snapshot(snapshot_file)
+    loaded = Network.load_snapshot(snapshot_file)
+
+    assert {iata: (a.name, a.city) for iata, a in loaded.airports.items()} == \
+           {iata: (a.name, a.city) for iata, a in network.airports.items()}
+    assert describe_tickets(loaded) == describe_tickets(network)
+    assert [t.arrival_minute for t in loaded.airports['LHR'].tickets] == [MINUTES_PER_WEEK + 65]
+
+    loaded.save_snapshot(str(tmp_path / 'again.snapshot'))
+    assert (tmp_path / 'again.snapshot').read_bytes() == (tmp_path / 'network.snapshot').read_bytes()
+
+
+def corrupt_header(data: bytes, change) -> bytes:
+    """Return the snapshot data with its JSON header replaced by change(header).
+    """
+    prefix = len(SNAPSHOT_MAGIC) + 8
+    _, header_length = struct.unpack('<II', data[len(SNAPSHOT_MAGIC):prefix])
+    header_bytes = json.dumps(change(json.loads(data[prefix:prefix + header_length]))).encode('utf-8')
+    return SNAPSHOT_MAGIC + struct.pack('<II', SNAPSHOT_VERSION, len(header_bytes)) + header_bytes \
+        + data[prefix + header_length:]
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: b'NOTSNAP\0' + data[len(SNAPSHOT_MAGIC):],
+    lambda data: SNAPSHOT_MAGIC + (SNAPSHOT_VERSION + 1).to_bytes(4, 'little') + data[len(SNAPSHOT_MAGIC) + 4:],
+    lambda data: b'',
+    lambda data: data[:len(SNAPSHOT_MAGIC) + 4],
+    lambda data: data[:len(SNAPSHOT_MAGIC) + 30],
+    lambda data: data[:-16],
+    lambda data: corrupt_header(data, lambda header: {key: header[key] for key in header if key != 'byteorder'}),
+    lambda data: corrupt_header(data, lambda header: {key: header[key] for key in header if key != 'airports'}),
+    lambda data: corrupt_header(data, lambda header: {key: header[key] for key in header if key != 'airlines'}),
+    lambda data: corrupt_header(data, lambda header: [header]),
+])
+def test_invalid_snapshot_is_rejected(tmp_path, corrupt) -> None:
+    snapshot_file = tmp_path / 'network.snapshot'
+    make_network().save_snapshot(str(snapshot_file))
+    snapshot_file.write_bytes(corrupt(snapshot_file.read_bytes()))
+    with pytest.raises(ValueError):
+        Network.load_snapshot(str(snapshot_file))
@@ -0,0 +1,124 @@
+""" api.py queries of the JSON search API for Django
+"""
+import json
+from datetime import datetime
+from typing import Any
+
+from .executor import SearchTimeout, submit_search, wait_search_async
+from .results import SORT_TYPES, result_cache_key
+
+MAX_BATCH_SIZE = 1000  # the most queries in one request
+DEFAULT_SEARCHER = 'dijkstra'
+DEFAULT_SORT = 'duration'
+
+
+class QueryError(ValueError):
+    """Raised when a request or one of its queries cannot be searched."""
+
+
+def parse_batch(body: bytes) -> tuple[list[Any], bool]:
+    """Return the queries of the JSON request body, and whether the results should be streamed as NDJSON.
+
+    The body is either one query, a list of queries, or an object {"queries": [...], "stream": true or false}.
+    """
+    try:
+        batch = json.loads(body)
+    except ValueError as error:
+        raise QueryError(f'invalid JSON: {error}') from error
+
+    stream = False
+    if isinstance(batch, dict) and 'queries' in batch:
+        stream = bool(batch.get('stream', False))
+        batch = batch['queries']
+    queries = batch if isinstance(batch, list) else [batch]
+    if len(queries) > MAX_BATCH_SIZE:
+        raise QueryError(f'at most {MAX_BATCH_SIZE} queries per request')
+    return queries, stream
+
+
+def parse_query(query: Any, airports: dict, searcher_types: set[str]) -> tuple[str, str, str, str, datetime]:
+    """Return the (searcher type, sort type, origin, destination, departure date) of a query, which is an object with
+    an origin and a destination IATA code, a date written YYYY-MM-DD, and optionally a sort type and a searcher type.
+    """
+    if not isinstance(query, dict):
+        raise QueryError('a query must be an object')
+
+    origin = query.get('origin')
+    destination = query.get('destination')
+    if not isinstance(origin, str) or origin not in airports:
+        raise QueryError('invalid origin')
+    if not isinstance(destination, str) or destination not in airports:
+        raise QueryError('invalid destination')
+    if origin == destination:
+        raise QueryError('origin and destination are the same')
+
+    try:
+        departure_time = datetime.strptime(str(query.get('date')), '%Y-%m-%d')
+    except ValueError as error:
+        raise QueryError('invalid date, expected YYYY-MM-DD') from error
+
+    sort_type = query.get('sort', DEFAULT_SORT)
+    if not isinstance(sort_type, str) or sort_type not in SORT_TYPES:
+        raise QueryError(f'invalid sort, expected one of {", ".join(SORT_TYPES)}')
+    flight_searcher_type = query.get('searcher', DEFAULT_SEARCHER)
+    if not isinstance(flight_searcher_type, str) or flight_searcher_type not in searcher_types:
+        raise QueryError('invalid searcher')
+
+    return flight_searcher_type, sort_type, origin, destination, departure_time
+
+
+async def run_batch(flight_searchers: dict, queries: list[Any], search_deadline: float) -> list[dict[str, Any]]:
+    """Return the result of each query, in order, waiting for the searches until search_deadline at most.
+
+    A result is {"index": i, "query": {...}, "tickets": [...], "optimal": true or false}, with the query written in
+    full, {"index": i, "query": {...}, "error": "search timed out"} if its search could not start in time, or
+    {"index": i, "error": "..."} if the query is invalid. A search that runs out of time gives the best tickets it
+    found so far, and "optimal" is false. Each ticket is {"price": price, "flights": [[airline, flight id, origin,
+    destination, [day, hour, minute] of departure, [day, hour, minute] of arrival], ...]}.
+
+    Every search of the batch is started at once in the thread pools of executor, queries that only differ in the
+    week of their date are searched once, and every search goes through the result cache.
+    """
+    airports = next(iter(flight_searchers.values())).flight_network.airports
+    parsed = []
+    futures = {}
+    for query in queries:
+        try:
+            flight_searcher_type, sort_type, origin, destination, departure_time = \
+                parse_query(query, airports, set(flight_searchers))
+        except QueryError as error:
+            parsed.append((None, str(error)))
+            continue
+
+        key = result_cache_key(flight_searcher_type, sort_type, origin, destination, departure_time.weekday())
+        if key not in futures:
+            futures[key] = submit_search(flight_searcher_type, sort_type, origin, destination, departure_time,
+                                         search_deadline)
+        parsed.append(({'origin': origin, 'destination': destination, 'date': departure_time.strftime('%Y-%m-%d'),
+                        'sort': sort_type, 'searcher': flight_searcher_type}, key))
+
+    results = []
+    found = {}
+    for i, (query, key) in enumerate(parsed):
+        if query is None:
+            results.append({'index': i, 'error': key})
+            continue
+        if key not in found:
+            try:
+                records, optimal = await wait_search_async(futures[key], search_deadline)
+                found[key] = {'tickets': [{'price': price, 'flights': flights} for price, flights in records],
+                              'optimal': optimal}
+            except SearchTimeout as error:
+                found[key] = {'error': str(error)}
+        results.append({'index': i, 'query': query, **found[key]})
+    return results
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 'datetime', 'typing', 'index.executor', 'index.results'],
+        'disable': ['unused-import', 'extra-imports', 'too-many-locals'],
+        'allowed-io': []
+    })
@@ -1,6 +1,35 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class IndexConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'index'
+
+    def ready(self):
+        """Load the network of settings.AIRPORT_FILE and settings.FLIGHT_FILE, if both are set, when a server starts.
+
+        A server that imports the application before forking its workers, such as gunicorn with --preload, loads the
+        network once and shares it between the workers, and no request ever waits for the network to load. Other
+        manage.py commands, such as migrate or shell, never load it.
+
+        The cache warmer is not started here but by the first request of each process (see state.ensure_warmer), so
+        that no thread of it runs in a process that serves no requests or while the workers are forked.
+        """
+        if settings.AIRPORT_FILE and settings.FLIGHT_FILE and _serves_requests():
+            from . import state
+            state.load_network(settings.AIRPORT_FILE, settings.FLIGHT_FILE)
+
+
+def _serves_requests() -> bool:
+    """Return whether this process is a server that should load the network as it starts: a process started with
+    settings.PRELOAD_NETWORK, or manage.py runserver, except for the autoreloader process that only restarts it.
+    """
+    if settings.PRELOAD_NETWORK:
+        return True
+    if sys.argv[1:2] != ['runserver']:
+        return False
+    return '--noreload' in sys.argv or os.environ.get('RUN_MAIN') == 'true'
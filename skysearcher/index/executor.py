@@ -0,0 +1,111 @@
+""" executor.py bounded thread pools running the searches of the views for Django
+"""
+import asyncio
+import concurrent.futures
+import sys
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+sys.path.insert(1, '../project/')
+from flightsearcher import SearchBudget
+from network import Ticket
+from . import state
+from .results import search_records
+
+SLOW_SEARCHERS = {'naive'}  # searcher types whose search may take exponential time
+BUDGET_MARGIN = 0.1  # seconds before the deadline of its request at which a running search stops
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class SearchTimeout(Exception):
+    """Raised when a search does not finish before the deadline of its request."""
+
+
+def deadline() -> float:
+    """Return the deadline, on the time.monotonic clock, of a request starting now, settings.SEARCH_TIMEOUT seconds
+    from now.
+    """
+    return time.monotonic() + settings.SEARCH_TIMEOUT
+
+
+def _pool(flight_searcher_type: str) -> concurrent.futures.ThreadPoolExecutor:
+    """Return the thread pool running the searches of flight_searcher_type, creating it on first use.
+
+    The searcher types in SLOW_SEARCHERS share a pool of settings.SLOW_SEARCH_WORKERS threads, and the others a pool
+    of settings.SEARCH_WORKERS threads, so that slow searches can neither hold up the others nor take more than their
+    share of the processor. The pools are created in the process that searches, since threads do not survive a fork.
+    """
+    name = 'slow' if flight_searcher_type in SLOW_SEARCHERS else 'fast'
+    with _POOLS_LOCK:
+        if name not in _POOLS:
+            workers = settings.SLOW_SEARCH_WORKERS if name == 'slow' else settings.SEARCH_WORKERS
+            _POOLS[name] = concurrent.futures.ThreadPoolExecutor(max_workers=workers,
+                                                                 thread_name_prefix=f'{name}-search')
+        return _POOLS[name]
+
+
+def _search_records(flight_searcher_type: str, sort_type: str, origin_iata: str, destination_iata: str,
+                    departure_time: datetime, search_deadline: float) -> tuple[list, bool]:
+    """Return the records found by a search of the loaded network, as results.search_records does, stopping
+    BUDGET_MARGIN seconds before search_deadline, and whether the search finished in time, so that they are optimal.
+    """
+    budget = SearchBudget(deadline_ms=max(search_deadline - BUDGET_MARGIN - time.monotonic(), 0) * 1000)
+    records = search_records(state.FLIGHT_SEARCHERS, flight_searcher_type, sort_type, origin_iata, destination_iata,
+                             departure_time, budget)
+    return records, budget.optimal
+
+
+def submit_search(flight_searcher_type: str, sort_type: str, origin_iata: str, destination_iata: str,
+                  departure_time: datetime, search_deadline: float) -> concurrent.futures.Future:
+    """Start a search of the loaded network in the pool of its searcher type, and return its future. The result of
+    the future is the records of the tickets found and whether they are optimal.
+
+    The search stops shortly before search_deadline and gives the best tickets found so far, which are not cached.
+    """
+    return _pool(flight_searcher_type).submit(_search_records, flight_searcher_type, sort_type, origin_iata,
+                                              destination_iata, departure_time, search_deadline)
+
+
+async def wait_search_async(future: concurrent.futures.Future, search_deadline: float) -> tuple[list, bool]:
+    """Return the result of a future from submit_search, waiting for it until search_deadline at most without holding
+    up the event loop.
+
+    If the search does not finish in time, it is cancelled if it has not started yet, and SearchTimeout is raised. A
+    search that has already started stops on its own shortly before search_deadline, so this only happens when it
+    waited too long in its pool to start.
+    """
+    if future.cancelled():  # by an earlier wait for the same search
+        raise SearchTimeout('search timed out')
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), max(search_deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError as error:
+        future.cancel()
+        raise SearchTimeout('search timed out') from error
+
+
+async def search_tickets(flight_searcher_type: str, sort_type: str, origin_iata: str, destination_iata: str,
+                         departure_time: datetime, search_deadline: float) -> tuple[list[Ticket], bool]:
+    """Return the tickets found by a search of the loaded network in the pool of its searcher type and whether they
+    are optimal, waiting for them until search_deadline at most, or raise SearchTimeout.
+    """
+    future = submit_search(flight_searcher_type, sort_type, origin_iata, destination_iata, departure_time,
+                           search_deadline)
+    records, optimal = await wait_search_async(future, search_deadline)
+    flight_network = state.FLIGHT_SEARCHERS[flight_searcher_type].flight_network
+    return [Ticket.from_record(flight_network, record) for record in records], optimal
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['asyncio', 'concurrent.futures', 'threading', 'sys', 'time', 'datetime', 'django', 'network',
+                          'flightsearcher', 'index.state', 'index.results'],
+        'disable': ['unused-import', 'extra-imports', 'too-many-arguments'],
+        'allowed-io': []
+    })
@@ -0,0 +1,208 @@
+""" results.py cache of search results for Django
+"""
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.core.cache import caches
+
+sys.path.insert(1, '../project/')
+from flightsearcher import AbstractFlightSearcher, ConnectionScanFlightSearcher, SearchBudget
+from network import IATACode, Network, Ticket
+
+# The cache alias in settings.CACHES holding search results, and how many searches were answered from it. The counts
+# are only changed with RESULT_CACHE_STATS_LOCK held, since searches run in several threads.
+RESULT_CACHE = 'search_results'
+RESULT_CACHE_STATS = {'hits': 0, 'misses': 0}
+RESULT_CACHE_STATS_LOCK = threading.Lock()
+
+# How many times each (searcher type, origin, destination) was searched since the server started. Like the counts
+# above, it is only changed or read with RESULT_CACHE_STATS_LOCK held.
+QUERY_LOG = Counter()
+
+SORT_TYPES = ('duration', 'price')
+WARM_ROUTES = 50  # routes searched ahead by CacheWarmer
+WARM_SEARCHER = 'naive'  # searcher type of the routes with the most tickets, the one selected by default on the page
+WARM_SEARCH_BUDGET_MS = 1000  # the longest a search of CacheWarmer may run; results of longer searches are not cached
+WARM_PAUSE = 0.01  # seconds CacheWarmer waits between two searches, leaving the interpreter to the request threads
+
+
+def result_cache_key(flight_searcher_type: str, sort_type: str, origin_iata: IATACode, destination_iata: IATACode,
+                     weekday: int) -> str:
+    """Return the key of a search in the result cache. Only the day of the week of the departure date is part of the
+    key, since the schedule repeats every week.
+    """
+    return f'{flight_searcher_type}:{sort_type}:{origin_iata}:{destination_iata}:{weekday}'
+
+
+def run_search(flight_searcher: AbstractFlightSearcher, sort_type: str, origin_iata: IATACode,
+               destination_iata: IATACode, departure_time: datetime,
+               budget: Optional[SearchBudget] = None) -> list[Ticket]:
+    """Return the tickets found by flight_searcher within budget, sorted by duration or price according to
+    sort_type.
+
+    Preconditions:
+        - sort_type in SORT_TYPES
+    """
+    if sort_type == 'duration':
+        return flight_searcher.search_shortest_flight(source=origin_iata,
+                                                      destination=destination_iata,
+                                                      departure_time=departure_time,
+                                                      budget=budget)
+    return flight_searcher.search_cheapest_flight(source=origin_iata,
+                                                  destination=destination_iata,
+                                                  departure_time=departure_time,
+                                                  budget=budget)
+
+
+def search_records(flight_searchers: dict[str, AbstractFlightSearcher], flight_searcher_type: str, sort_type: str,
+                   origin_iata: IATACode, destination_iata: IATACode, departure_time: datetime,
+                   budget: Optional[SearchBudget] = None) -> list[tuple[float, tuple[tuple, ...]]]:
+    """Return the tickets found by the given searcher and sort type within budget as records (see
+    Ticket.to_record), taking them from the result cache if the same search was made for the same day of the week.
+
+    The cache stores the records rather than the tickets, so that it holds no reference to the network. Only the
+    results of searches that finished within their budget are cached, so a cached result is always optimal.
+
+    Preconditions:
+        - flight_searcher_type in flight_searchers
+        - sort_type in SORT_TYPES
+    """
+    cache = caches[RESULT_CACHE]
+    key = result_cache_key(flight_searcher_type, sort_type, origin_iata, destination_iata, departure_time.weekday())
+    records = cache.get(key)
+    with RESULT_CACHE_STATS_LOCK:
+        QUERY_LOG[(flight_searcher_type, origin_iata, destination_iata)] += 1
+        RESULT_CACHE_STATS['hits' if records is not None else 'misses'] += 1
+    if records is not None:
+        return records
+
+    tickets = run_search(flight_searchers[flight_searcher_type], sort_type, origin_iata, destination_iata,
+                         departure_time, budget)
+    records = [ticket.to_record() for ticket in tickets]
+    if budget is None or budget.optimal:
+        cache.set(key, records)
+    return records
+
+
+def popular_routes(flight_network: Network, n: int) -> list[tuple[str, IATACode, IATACode]]:
+    """Return the n most popular routes of flight_network as (searcher type, origin, destination) tuples: the most
+    searched routes in QUERY_LOG first, then the origin and destination pairs with the most tickets between them,
+    searched with WARM_SEARCHER.
+    """
+    with RESULT_CACHE_STATS_LOCK:
+        query_log = QUERY_LOG.copy()
+    routes = [route for route, _ in query_log.most_common(n)
+              if route[1] in flight_network.airports and route[2] in flight_network.airports]
+
+    ticket_counts = Counter((origin.iata, destination.iata)
+                            for origin, destination, *_ in flight_network.ticket_summaries())
+    for (origin_iata, destination_iata), _ in ticket_counts.most_common():
+        if len(routes) >= n:
+            break
+        route = (WARM_SEARCHER, origin_iata, destination_iata)
+        if route not in routes:
+            routes.append(route)
+    return routes
+
+
+class CacheWarmer(threading.Thread):
+    """
+    A daemon thread that searches the most popular routes of the network for every day of the week and both sort
+    types, and stores the results in the result cache, so that popular routes are answered without searching. Once
+    every route is searched, it waits half the cache timeout and goes through the routes again, refreshing the timeout
+    of the results still cached and searching the others again. The routes are chosen again with popular_routes at the
+    start of each pass, so that they follow QUERY_LOG.
+
+    Each search stops after WARM_SEARCH_BUDGET_MS and its result is then left out of the cache, and the thread waits
+    WARM_PAUSE seconds between two searches, so that it takes little time from the requests. The thread searches with
+    its own copy of each searcher, so that it never shares the state of a searcher with a request.
+
+    Instance Attributes:
+        - flight_searchers: The searchers of the network, by searcher type.
+        - num_routes: The number of routes to search in each pass.
+        - routes: The (searcher type, origin, destination) routes of the current pass.
+        - stopped: Set to stop the thread.
+        - warmed: The number of searches made by the thread.
+    """
+    flight_searchers: dict[str, AbstractFlightSearcher]
+    num_routes: int
+    routes: list[tuple[str, IATACode, IATACode]]
+    stopped: threading.Event
+    warmed: int
+
+    def __init__(self, flight_searchers: dict[str, AbstractFlightSearcher], num_routes: int) -> None:
+        threading.Thread.__init__(self, name='result-cache-warmer', daemon=True)
+        self.flight_searchers = flight_searchers
+        self.num_routes = num_routes
+        self.routes = []
+        self.stopped = threading.Event()
+        self.warmed = 0
+
+    def run(self) -> None:
+        cache = caches[RESULT_CACHE]
+        flight_network = next(iter(self.flight_searchers.values())).flight_network
+        own_searchers = {}
+        while not self.stopped.is_set():
+            self.routes = popular_routes(flight_network, self.num_routes)
+            for flight_searcher_type, origin_iata, destination_iata in self.routes:
+                if flight_searcher_type not in own_searchers:
+                    own_searchers[flight_searcher_type] = _copy_searcher(self.flight_searchers[flight_searcher_type])
+                for weekday in range(7):
+                    departure_time = datetime(2023, 4, 3) + timedelta(days=weekday)  # 3 April 2023 is a Monday
+                    for sort_type in SORT_TYPES:
+                        key = result_cache_key(flight_searcher_type, sort_type, origin_iata, destination_iata, weekday)
+                        if self.stopped.wait(WARM_PAUSE):
+                            return
+                        if cache.touch(key):
+                            continue
+                        budget = SearchBudget(deadline_ms=WARM_SEARCH_BUDGET_MS)
+                        tickets = run_search(own_searchers[flight_searcher_type], sort_type, origin_iata,
+                                             destination_iata, departure_time, budget)
+                        if self.stopped.is_set():  # the network was reloaded during the search
+                            return
+                        if budget.optimal:
+                            cache.set(key, [ticket.to_record() for ticket in tickets])
+                        self.warmed += 1
+
+            if cache.default_timeout is None:
+                return
+            self.stopped.wait(cache.default_timeout / 2)
+
+    def stop(self) -> None:
+        """Stop the thread before its next search, without waiting for it.
+        """
+        self.stopped.set()
+
+
+def _copy_searcher(flight_searcher: AbstractFlightSearcher) -> AbstractFlightSearcher:
+    """Return a new searcher of the same type as flight_searcher, over the same network and landmark index. A connection
+    scan searcher shares the sorted connections of flight_searcher, which are only read by searches.
+    """
+    copy = type(flight_searcher)(flight_searcher.flight_network)
+    copy.use_landmark_index(flight_searcher.landmark_index)
+    if isinstance(flight_searcher, ConnectionScanFlightSearcher):
+        copy.departure_minutes, copy.connections = flight_searcher.sorted_connections()
+    return copy
+
+
+def start_warmer(flight_searchers: dict[str, AbstractFlightSearcher]) -> CacheWarmer:
+    """Start and return a warmer of the WARM_ROUTES most popular routes of the network of flight_searchers.
+    """
+    warmer = CacheWarmer(flight_searchers, WARM_ROUTES)
+    warmer.start()
+    return warmer
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['django', 'sys', 'threading', 'collections', 'datetime', 'typing', 'flightsearcher',
+                          'network'],
+        'disable': ['unused-import', 'too-many-branches', 'extra-imports', 'too-many-locals', 'too-many-nested-blocks',
+                    'too-many-arguments'],
+        'allowed-io': []
+    })
@@ -0,0 +1,87 @@
+""" state.py network and searchers shared by the views of a server process
+"""
+import gc
+import os
+import sys
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+sys.path.insert(1, '../project/')
+from main import django_helper
+from .results import RESULT_CACHE, start_warmer
+
+AIRPORT_FILE = None
+FLIGHT_FILE = None
+FLIGHT_SEARCHERS = None
+AIRPORT_OPTIONS = None
+CACHE_WARMER = None
+CACHE_WARMER_PID = None  # the process that started CACHE_WARMER
+
+_LOAD_LOCK = threading.Lock()
+_WARMER_LOCK = threading.Lock()
+
+
+def load_network(airport_file: str, flight_file: str) -> None:
+    """Load the network of airport_file and flight_file and its searchers, clear the result cache, and stop the cache
+    warmer of the previous network in this process. The warmer of the new network is started by ensure_warmer.
+
+    The loaded objects are moved to the permanent generation of the garbage collector, which never scans it. A server
+    that loads the network before forking its workers (see IndexConfig.ready) then keeps the pages of the network
+    shared between the workers, since the collector never writes to them. A memory-mapped snapshot of the network (see
+    main.load_network) is shared between all processes through the page cache in any case.
+    """
+    global AIRPORT_FILE
+    global FLIGHT_FILE
+    global FLIGHT_SEARCHERS
+    global AIRPORT_OPTIONS
+    global CACHE_WARMER
+    global CACHE_WARMER_PID
+
+    gc.unfreeze()  # so that the collector can free the previous network
+    FLIGHT_SEARCHERS, AIRPORT_OPTIONS = django_helper(airport_file, flight_file)
+    AIRPORT_FILE, FLIGHT_FILE = airport_file, flight_file
+    gc.collect()
+    gc.freeze()
+
+    caches[RESULT_CACHE].clear()
+    with _WARMER_LOCK:
+        if CACHE_WARMER is not None and CACHE_WARMER_PID == os.getpid():
+            CACHE_WARMER.stop()
+        CACHE_WARMER, CACHE_WARMER_PID = None, None
+
+
+def ensure_network() -> None:
+    """Load the network of settings.AIRPORT_FILE and settings.FLIGHT_FILE if both are set and no network is loaded
+    yet, for a server that did not load it as it started.
+    """
+    with _LOAD_LOCK:
+        if FLIGHT_SEARCHERS is None and settings.AIRPORT_FILE and settings.FLIGHT_FILE:
+            load_network(settings.AIRPORT_FILE, settings.FLIGHT_FILE)
+
+
+def ensure_warmer() -> None:
+    """Start the cache warmer of the loaded network in this process if it is not running here yet.
+
+    The warmer is started by the requests rather than when the network is loaded, so that it only runs in processes
+    that serve requests. A worker forked from the process that loaded the network starts its own on its first request.
+    """
+    global CACHE_WARMER
+    global CACHE_WARMER_PID
+
+    with _WARMER_LOCK:
+        if FLIGHT_SEARCHERS is None or CACHE_WARMER_PID == os.getpid():
+            return
+        CACHE_WARMER = start_warmer(FLIGHT_SEARCHERS)
+        CACHE_WARMER_PID = os.getpid()
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['django', 'gc', 'os', 'sys', 'threading', 'main', 'index.results'],
+        'disable': ['unused-import', 'extra-imports', 'global-statement'],
+        'allowed-io': []
+    })
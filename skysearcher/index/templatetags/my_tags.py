@@ -1,12 +1,10 @@
 """ Template Tags Helpers for HTML
 """
-from typing import TypeAlias
-from collections import namedtuple
-
 from datetime import datetime, timedelta
 from django import template
 
-DayHourMinute: TypeAlias = namedtuple('DayHourMinute', ['day', 'hour', 'minute'])
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
 register = template.Library()
 
 
@@ -55,39 +53,29 @@ def get_airlines(flights: list) -> str:
 
 
 @register.simple_tag
-def get_minute_diff(before: DayHourMinute, after: DayHourMinute) -> int:
-    """Calculate and return the difference in time(in minutes) of 'before' and 'return'.
+def get_minute_diff(before: int, after: int) -> int:
+    """Calculate and return the difference in time(in minutes) of 'before' and 'after', where both are given in
+    minutes since Monday 00:00.
     """
-    if before.day > after.day:
-        after = DayHourMinute(after.day + 7, after.hour, after.minute)
-    elif before.day == after.day and before.hour > after.hour:
-        after = DayHourMinute(after.day + 7, after.hour, after.minute)
-    elif before.day == after.day and before.hour == after.hour and before.minute > after.minute:
-        after = DayHourMinute(after.day + 7, after.hour, after.minute)
-
-    return (after.day * 1440 + after.hour * 60 + after.minute) - \
-        (before.day * 1440 + before.hour * 60 + before.minute)
+    return (after - before) % MINUTES_PER_WEEK
 
 
 @register.simple_tag
-def get_hour_minute_diff(before: DayHourMinute, after: DayHourMinute) -> str:
+def get_hour_minute_diff(before: int, after: int) -> str:
     """Returns a string representation of the difference in time of 'before' and 'after'.
     """
     min_diff = get_minute_diff(before, after)
     return f'{min_diff // 60}h {min_diff % 60}m'
 
 
-def _get_day_diff_int(before: DayHourMinute, after: DayHourMinute) -> int:
+def _get_day_diff_int(before: int, after: int) -> int:
     """Return the difference in days of the times in 'before' and 'after'.
     """
-    day_diff = after.day - before.day
-    if day_diff < 0:
-        day_diff += 7
-    return day_diff
+    return (after // MINUTES_PER_DAY - before // MINUTES_PER_DAY) % 7
 
 
 @register.simple_tag
-def get_day_diff(before: DayHourMinute, after: DayHourMinute) -> str:
+def get_day_diff(before: int, after: int) -> str:
     """Return a string representation of the difference in days of the times in 'before' and 'after'.
     """
     day_diff = _get_day_diff_int(before, after)
@@ -100,11 +88,11 @@ def get_day_diff(before: DayHourMinute, after: DayHourMinute) -> str:
 def get_layover_time(flights: list, i: int) -> str:
     """Return a string representation of the layover time between flight[i] and flight[i + 1].
     """
-    return get_hour_minute_diff(flights[i].arrival_time, flights[i + 1].departure_time)
+    return get_hour_minute_diff(flights[i].arrival_minute, flights[i + 1].departure_minute)
 
 
 @register.simple_tag
-def get_date(pivot_datetime: str, pivot_weektime: DayHourMinute, query_weektime: DayHourMinute) -> str:
+def get_date(pivot_datetime: str, pivot_weektime: int, query_weektime: int) -> str:
     """Return a string representation of the datetime that is based on query_weektime.
     """
     day_diff = _get_day_diff_int(pivot_weektime, query_weektime)
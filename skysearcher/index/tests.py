@@ -1,3 +1,123 @@
-from django.test import TestCase
+import json
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .api import MAX_BATCH_SIZE, DEFAULT_SEARCHER, DEFAULT_SORT, QueryError, parse_batch, parse_query
+
+AIRPORTS = {'YYZ': None, 'LHR': None}
+SEARCHER_TYPES = {'naive', 'dijkstra'}
+
+
+class ParseBatchTests(TestCase):
+    """Tests of the parsing of the JSON body of a POST to the search API."""
+
+    def test_one_query(self):
+        query = {'origin': 'YYZ', 'destination': 'LHR', 'date': '2023-04-03'}
+        self.assertEqual(parse_batch(json.dumps(query).encode()), ([query], False))
+
+    def test_list_of_queries(self):
+        queries = [{'origin': 'YYZ'}, {'origin': 'LHR'}]
+        self.assertEqual(parse_batch(json.dumps(queries).encode()), (queries, False))
+
+    def test_streamed_batch(self):
+        body = json.dumps({'queries': [{'origin': 'YYZ'}], 'stream': True}).encode()
+        self.assertEqual(parse_batch(body), ([{'origin': 'YYZ'}], True))
+
+    def test_invalid_json(self):
+        for body in [b'', b'{', b'not json', b'\xff']:
+            with self.assertRaisesMessage(QueryError, 'invalid JSON'):
+                parse_batch(body)
+
+    def test_too_many_queries(self):
+        parse_batch(json.dumps([{}] * MAX_BATCH_SIZE).encode())
+        with self.assertRaisesMessage(QueryError, f'at most {MAX_BATCH_SIZE} queries'):
+            parse_batch(json.dumps({'queries': [{}] * (MAX_BATCH_SIZE + 1)}).encode())
+
+
+class ParseQueryTests(TestCase):
+    """Tests of the checks of the queries of the search API."""
+
+    def parse(self, **query):
+        return parse_query({'origin': 'YYZ', 'destination': 'LHR', 'date': '2023-04-03', **query}, AIRPORTS,
+                           SEARCHER_TYPES)
+
+    def assertInvalid(self, message, query):
+        with self.assertRaisesMessage(QueryError, message):
+            parse_query(query, AIRPORTS, SEARCHER_TYPES)
+
+    def test_valid_query(self):
+        self.assertEqual(self.parse(), (DEFAULT_SEARCHER, DEFAULT_SORT, 'YYZ', 'LHR', datetime(2023, 4, 3)))
+        self.assertEqual(self.parse(sort='price', searcher='naive'),
+                         ('naive', 'price', 'YYZ', 'LHR', datetime(2023, 4, 3)))
+
+    def test_query_not_an_object(self):
+        for query in [None, 'YYZ', ['YYZ', 'LHR'], 3]:
+            self.assertInvalid('a query must be an object', query)
+
+    def test_invalid_airports(self):
+        self.assertInvalid('invalid origin', {'destination': 'LHR', 'date': '2023-04-03'})
+        self.assertInvalid('invalid origin', {'origin': 'XXX', 'destination': 'LHR', 'date': '2023-04-03'})
+        self.assertInvalid('invalid origin', {'origin': ['YYZ'], 'destination': 'LHR', 'date': '2023-04-03'})
+        self.assertInvalid('invalid destination', {'origin': 'YYZ', 'destination': 'XXX', 'date': '2023-04-03'})
+        self.assertInvalid('origin and destination are the same',
+                           {'origin': 'YYZ', 'destination': 'YYZ', 'date': '2023-04-03'})
+
+    def test_invalid_date(self):
+        for date in [None, '', '2023-4-3x', '03/04/2023', '2023-02-30', 20230403]:
+            with self.assertRaisesMessage(QueryError, 'invalid date'):
+                self.parse(date=date)
+
+    def test_invalid_sort_and_searcher(self):
+        for sort in ['', 'fastest', None, 1]:
+            with self.assertRaisesMessage(QueryError, 'invalid sort'):
+                self.parse(sort=sort)
+        for searcher in ['', 'bfs', None, ['naive']]:
+            with self.assertRaisesMessage(QueryError, 'invalid searcher'):
+                self.parse(searcher=searcher)
+
+
+# The views are imported as index.views by the URL configuration, so the state they use is index.state.
+@override_settings(AIRPORT_FILE=None, FLIGHT_FILE=None)
+@mock.patch('index.state.FLIGHT_SEARCHERS', None)
+class NoNetworkTests(TestCase):
+    """Tests of the views of a server that has no network loaded."""
+
+    def test_search_page(self):
+        response = self.client.get(reverse('index:search'), {'from_input': 'Toronto (YYZ)', 'to_input': 'London (LHR)',
+                                                              'date_input': '2023-04-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([str(message) for message in response.context['messages']], ['no network is loaded'])
+
+    def test_search_api(self):
+        response = self.client.get(reverse('index:search_api'), {'origin': 'YYZ', 'destination': 'LHR',
+                                                                  'date': '2023-04-03'})
+        self.assertEqual(response.status_code, 503)
+
+
+@mock.patch('index.state.ensure_warmer', lambda: None)
+@mock.patch('index.state.FLIGHT_SEARCHERS', {searcher: mock.Mock(flight_network=mock.Mock(airports=AIRPORTS))
+                                             for searcher in SEARCHER_TYPES})
+class SearchApiTests(TestCase):
+    """Tests of the answers of the search API to invalid requests."""
+
+    def test_invalid_get_query(self):
+        for query, message in [({'origin': 'XXX', 'destination': 'LHR', 'date': '2023-04-03'}, 'invalid origin'),
+                               ({'origin': 'YYZ', 'destination': 'LHR', 'date': '2023-02-30'}, 'invalid date'),
+                               ({'origin': 'YYZ', 'destination': 'LHR'}, 'invalid date')]:
+            response = self.client.get(reverse('index:search_api'), query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(message, response.json()['error'])
+
+    def test_invalid_post_body(self):
+        response = self.client.post(reverse('index:search_api'), b'{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('invalid JSON', response.json()['error'])
+
+    def test_invalid_query_of_a_batch(self):
+        response = self.client.post(reverse('index:search_api'), json.dumps([{'origin': 'XXX'}]),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [{'index': 0, 'error': 'invalid origin'}]})
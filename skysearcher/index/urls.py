@@ -5,4 +5,6 @@ from . import views
 app_name = 'index'
 urlpatterns = [
     path('', views.search, name='search'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
 ]
@@ -1,31 +1,72 @@
 """ views.py controller for Django
 """
-import sys
 import json
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from django.views.decorators.csrf import csrf_exempt
 
-sys.path.insert(1, '../project/')
-from main import django_helper
+from . import executor, state
+from .api import QueryError, parse_batch, run_batch
+from .results import RESULT_CACHE_STATS, SORT_TYPES
 
-AIRPORT_FILE = None
-FLIGHT_FILE = None
-NAIVE_FLIGHT_SEARCHER = None
-DIJKSTRA_FLIGHT_SEARCHER = None
-AIRPORT_OPTIONS = None
 
-@csrf_exempt
-def search(request):
+def cache_stats(request):
+    """ Function Based View returning the hit and miss counts of the result cache, and the number of searches made by
+    the cache warmer, as JSON
+    """
+    warmed = state.CACHE_WARMER.warmed if state.CACHE_WARMER is not None else 0
+    return JsonResponse({**RESULT_CACHE_STATS, 'warmed': warmed})
+
+
+async def search_api(request):
+    """ Function Based View for the JSON search API
+
+    A GET searches the one query given by its parameters. A POST searches the query or batch of queries in its JSON
+    body (see api.parse_batch), and returns the results as NDJSON, one line per query, if the body asks for it or the
+    request accepts application/x-ndjson. The searches run in the thread pools of executor, and the request waits for
+    them for settings.SEARCH_TIMEOUT seconds at most. A search still running by then gives the best tickets it found
+    so far, marked as not optimal, and a GET whose search could not start in time gets a 504 response. A GET whose
+    query is invalid gets a 400 response, like a POST whose body is.
+    """
+    search_deadline = executor.deadline()
+    await sync_to_async(state.ensure_network)()
+    if state.FLIGHT_SEARCHERS is None:
+        return JsonResponse({'error': 'no network is loaded'}, status=503)
+    state.ensure_warmer()
+
+    try:
+        if request.method == 'GET':
+            queries, stream = [request.GET.dict()], False
+        elif request.method == 'POST':
+            queries, stream = parse_batch(request.body)
+        else:
+            return HttpResponseNotAllowed(['GET', 'POST'])
+    except QueryError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    results = await run_batch(state.FLIGHT_SEARCHERS, queries, search_deadline)
+    if stream or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return StreamingHttpResponse((json.dumps(result) + '\n' for result in results),
+                                     content_type='application/x-ndjson')
+    if request.method == 'GET' and 'error' in results[0]:
+        # Only the results of valid queries hold the query they searched.
+        if 'query' not in results[0]:
+            return JsonResponse({'error': results[0]['error']}, status=400)
+        return JsonResponse({'results': results}, status=504)
+    return JsonResponse({'results': results})
+
+
+# The views are coroutines, which the csrf_exempt decorator of this version of Django does not wrap.
+search_api.csrf_exempt = True
+
+
+async def search(request):
     """ Function Based View for index.html
     """
-    global AIRPORT_FILE
-    global FLIGHT_FILE
-    global NAIVE_FLIGHT_SEARCHER
-    global DIJKSTRA_FLIGHT_SEARCHER
-    global AIRPORT_OPTIONS
+    search_deadline = executor.deadline()
 
     # assert NAIVE_FLIGHT_SEARCHER is not None
     # assert DIJKSTRA_FLIGHT_SEARCHER is not None
@@ -33,23 +74,20 @@ def search(request):
 
     # if NAIVE_FLIGHT_SEARCHER is None:
     #     NAIVE_FLIGHT_SEARCHER = get_naive_searcher()
-    # if PRUNED_FLIGHT_SEARCHER is None:
-    #     PRUNED_FLIGHT_SEARCHER = get_pruned_landmark_labelling()
     # if AIRPORT_OPTIONS is None:
     #     AIRPORT_OPTIONS = list(sorted(NAIVE_FLIGHT_SEARCHER.flight_network.airports.values(), key=lambda x: x.city))
 
     # print(request)
     if request.method == 'POST':
-        AIRPORT_FILE = request.POST.get('airport_file')
-        FLIGHT_FILE = request.POST.get('flight_file')
-        NAIVE_FLIGHT_SEARCHER, DIJKSTRA_FLIGHT_SEARCHER, AIRPORT_OPTIONS = django_helper(AIRPORT_FILE, FLIGHT_FILE)
+        await sync_to_async(state.load_network)(request.POST.get('airport_file'), request.POST.get('flight_file'))
+    else:
+        await sync_to_async(state.ensure_network)()
+    state.ensure_warmer()
 
     context = {}
     data = {}
 
     if request.method == 'GET':
-        if NAIVE_FLIGHT_SEARCHER is None and AIRPORT_FILE is not None:
-            NAIVE_FLIGHT_SEARCHER, DIJKSTRA_FLIGHT_SEARCHER, AIRPORT_OPTIONS = django_helper(AIRPORT_FILE, FLIGHT_FILE)
 
         flight_searcher_type = request.GET.get('searcher_input')
         sort_type = request.GET.get('filter_input')
@@ -76,47 +114,50 @@ def search(request):
             pass
         elif empty_count > 0:
             messages.error(request, 'empty input')
-        elif len(origin) < 4 or origin[-4:-1] not in NAIVE_FLIGHT_SEARCHER.flight_network.airports:
+        elif state.FLIGHT_SEARCHERS is None:
+            messages.error(request, 'no network is loaded')
+        elif len(origin) < 4 or origin[-4:-1] not in state.FLIGHT_SEARCHERS['naive'].flight_network.airports:
             messages.error(request, 'invalid origin')
-        elif len(destination) < 4 or destination[-4:-1] not in NAIVE_FLIGHT_SEARCHER.flight_network.airports:
+        elif len(destination) < 4 or destination[-4:-1] not in state.FLIGHT_SEARCHERS['naive'].flight_network.airports:
             messages.error(request, 'invalid destination')
         else:
-            tickets = []
             origin_iata = origin[-4:-1]
             destination_iata = destination[-4:-1]
             date = date.split('-')
             departure_time = datetime(int(date[0]), int(date[1]), int(date[2]))
 
-            if flight_searcher_type == 'naive' and sort_type == 'duration':
-                tickets = NAIVE_FLIGHT_SEARCHER.search_shortest_flight(source=origin_iata,
-                                                                       destination=destination_iata,
-                                                                       departure_time=departure_time)
-            elif flight_searcher_type == 'naive' and sort_type == 'price':
-                tickets = NAIVE_FLIGHT_SEARCHER.search_cheapest_flight(source=origin_iata,
-                                                                       destination=destination_iata,
-                                                                       departure_time=departure_time)
-            elif flight_searcher_type == 'dijkstra' and sort_type == 'duration':
-                tickets = DIJKSTRA_FLIGHT_SEARCHER.search_shortest_flight(source=origin_iata,
-                                                                          destination=destination_iata,
-                                                                          departure_time=departure_time)
-            elif flight_searcher_type == 'dijkstra' and sort_type == 'price':
-                tickets = DIJKSTRA_FLIGHT_SEARCHER.search_cheapest_flight(source=origin_iata,
-                                                                          destination=destination_iata,
-                                                                          departure_time=departure_time)
-            context['tickets'] = tickets
-            messages.success(request, 'scroll to view the generated tickets')
-
-    context['airport_options'] = AIRPORT_OPTIONS
+            tickets, optimal = [], True
+            if flight_searcher_type in state.FLIGHT_SEARCHERS and sort_type in SORT_TYPES:
+                try:
+                    tickets, optimal = await executor.search_tickets(flight_searcher_type, sort_type, origin_iata,
+                                                                     destination_iata, departure_time, search_deadline)
+                except executor.SearchTimeout:
+                    tickets = None
+            if tickets is None:
+                messages.error(request, 'search timed out')
+            else:
+                context['tickets'] = tickets
+                if optimal:
+                    messages.success(request, 'scroll to view the generated tickets')
+                else:
+                    messages.success(request, 'search stopped at the time limit, scroll to view the best tickets found')
+
+    context['airport_options'] = state.AIRPORT_OPTIONS
     context['json_data'] = json.dumps(data)
 
-    return render(request, 'index.html', context)
+    # The messages may be read from the session while rendering, which cannot be done in the event loop.
+    return await sync_to_async(render)(request, 'index.html', context)
+
+
+search.csrf_exempt = True
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['django', 'json', 'sys', 'datetime'],
+        'extra-imports': ['asgiref', 'django', 'json', 'datetime', 'index.executor', 'index.state', 'index.api',
+                          'index.results'],
         'disable': ['unused-import', 'too-many-branches', 'extra-imports', 'too-many-locals', 'too-many-nested-blocks'],
         'allowed-io': []
     })
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -96,6 +97,46 @@ DATABASES = {
 }
 
 
+# Network
+# The airport and flight files of the network. If either is unset, the network is loaded when the files are POSTed to
+# the search view instead. The network is loaded when the server starts (see index.apps.IndexConfig.ready) by
+# manage.py runserver, and by any other process started with SKYSEARCHER_PRELOAD=1, such as gunicorn --preload.
+# Otherwise, it is loaded by the first request.
+
+AIRPORT_FILE = os.environ.get('SKYSEARCHER_AIRPORT_FILE')
+FLIGHT_FILE = os.environ.get('SKYSEARCHER_FLIGHT_FILE')
+PRELOAD_NETWORK = os.environ.get('SKYSEARCHER_PRELOAD') == '1'
+
+
+# Searches
+# Searches run in bounded thread pools, the naive searcher in a pool of its own so that its slow searches cannot hold
+# up the others. A request waits for its searches for SEARCH_TIMEOUT seconds at most.
+
+SEARCH_TIMEOUT = 10
+SEARCH_WORKERS = 4
+SLOW_SEARCH_WORKERS = 2
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# search_results holds the tickets of recent searches, dropping the least recently used ones past MAX_ENTRIES and any
+# older than TIMEOUT seconds. Use django.core.cache.backends.filebased.FileBasedCache to share it between processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search_results': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'search-results',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 